@@ -1,6 +1,22 @@
 import uuid
+from sqlalchemy import DateTime, cast, func, select, type_coerce
 from app import db
 
+
+def database_now():
+    """
+    The database clock, which sets created_at and updated_at.
+
+    Returns:
+        datetime: The current naive timestamp as the database sees it.
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        now = cast(func.localtimestamp(), DateTime)
+    else:
+        now = type_coerce(func.current_timestamp(), DateTime)
+    return db.session.execute(select(now)).scalar()
+
+
 class Base(db.Model):
     """
     Base represents the base table in the database.
@@ -1,9 +1,10 @@
-import os
 import csv
+import time
 from flask import g, request, jsonify, make_response, session
 from flask_restx import Resource, fields
-from werkzeug.utils import secure_filename
-from app.config import Config
+from app import db
+from sqlalchemy.orm import joinedload, load_only
+from api.helpers import open_csv_stream, StageTimer, parse_fields, parse_expand, versioned_list_response
 from api.categories.models import CategoriesModel
 from api.categories_group.models import CategoriesGroupModel
 from api.categories_type.models import CategoriesTypeModel
@@ -58,9 +59,29 @@ class Categories(Resource):
         return make_response(jsonify({'message': 'Categories created successfully'}), 201)
 
     def get(self):
-        categories = CategoriesModel.query.all()
-        _categories = [category.to_dict() for category in categories]
-        return make_response(jsonify({'categories': _categories}), 200)
+        # ?fields= and ?expand=categories_group,categories_type select sparse output
+        try:
+            fields = parse_fields(request.args.get('fields'), CategoriesModel.SERIALIZED_COLUMNS)
+            expand = parse_expand(request.args.get('expand'), CategoriesModel.EXPAND_PATHS)
+        except ValueError as e:
+            return make_response(jsonify({'message': str(e)}), 400)
+        if fields is not None and expand is None:
+            expand = {}
+
+        def build():
+            query = CategoriesModel.query
+            if expand is not None:
+                columns = (fields or set(CategoriesModel.SERIALIZED_COLUMNS)) | {f'{name}_id' for name in expand}
+                query = query.options(
+                    load_only(*[getattr(CategoriesModel, name) for name in sorted(columns)]),
+                    *[joinedload(getattr(CategoriesModel, name)) for name in expand]
+                )
+
+            categories = query.all()
+            _categories = [category.to_dict(fields, expand) for category in categories]
+            return make_response(jsonify({'categories': _categories}), 200)
+
+        return versioned_list_response('categories', None, build)
 
 
 @g.api.route('/categories/csv_import')
@@ -75,6 +96,8 @@ class CategoriesCSVImport(Resource):
         categories,categories_group,categories_type
         Groceries,Food & Dining,Expense
         Salary,Income,Income
+
+        Pass ?dry_run=1 to report what would be created without writing anything.
         """
         user_id = session.get('_user_id')
 
@@ -92,30 +115,44 @@ class CategoriesCSVImport(Resource):
         if not file.filename.endswith('.csv'):
             return make_response(jsonify({'message': 'File must be a CSV'}), 400)
 
+        dry_run = bool(request.args.get('dry_run', default=0, type=int))
+        timer = StageTimer()
+
         try:
-            # Save the file
-            upload_folder = Config.UPLOAD_FOLDER
-            filename = secure_filename(file.filename)
-            file_path = os.path.join(upload_folder, filename)
-            file.save(file_path)
-
-            # Process the CSV
-            with open(file_path, newline='', encoding='utf-8') as csvfile:
+            # Process the CSV incrementally from the request stream
+            with open_csv_stream(file) as csvfile:
                 csvreader = csv.DictReader(csvfile)
 
                 # Validate headers
                 required_headers = ['categories', 'categories_group', 'categories_type']
-                if not all(header in csvreader.fieldnames for header in required_headers):
+                if not all(header in (csvreader.fieldnames or []) for header in required_headers):
                     return make_response(jsonify({
                         'message': f'CSV must have headers: {", ".join(required_headers)}'
                     }), 400)
 
+                # Snapshot the user's existing types, groups and categories once
+                started = time.perf_counter()
+                type_ids = {}
+                for name, _id in db.session.query(CategoriesTypeModel.name, CategoriesTypeModel.id).filter_by(user_id=user_id):
+                    type_ids.setdefault(name, _id)
+                group_ids = {}
+                for name, _id in db.session.query(CategoriesGroupModel.name, CategoriesGroupModel.id).filter_by(user_id=user_id):
+                    group_ids.setdefault(name, _id)
+                existing_categories = set(db.session.query(
+                    CategoriesModel.name,
+                    CategoriesModel.categories_group_id,
+                    CategoriesModel.categories_type_id
+                ).filter_by(user_id=user_id))
+                timer.add('lookup', time.perf_counter() - started)
+
                 created_types = {}
                 created_groups = {}
                 created_categories = 0
                 skipped_categories = 0
 
-                for row in csvreader:
+                rows_read = 0
+                for row in timer.timed(csvreader, 'read'):
+                    rows_read += 1
                     category_name = row['categories'].strip()
                     group_name = row['categories_group'].strip()
                     type_name = row['categories_type'].strip()
@@ -124,70 +161,70 @@ class CategoriesCSVImport(Resource):
                         skipped_categories += 1
                         continue
 
+                    started = time.perf_counter()
+
                     # Get or create type
                     if type_name not in created_types:
-                        cat_type = CategoriesTypeModel.query.filter_by(
-                            name=type_name,
-                            user_id=user_id
-                        ).first()
-
-                        if not cat_type:
-                            cat_type = CategoriesTypeModel(
-                                user_id=user_id,
-                                name=type_name
-                            )
-                            cat_type.save()
-
-                        created_types[type_name] = cat_type.id
+                        if type_name not in type_ids:
+                            if dry_run:
+                                type_ids[type_name] = f'dry-run:{type_name}'
+                            else:
+                                cat_type = CategoriesTypeModel(
+                                    user_id=user_id,
+                                    name=type_name
+                                )
+                                cat_type.save()
+                                type_ids[type_name] = cat_type.id
+
+                        created_types[type_name] = type_ids[type_name]
 
                     # Get or create group
                     if group_name not in created_groups:
-                        cat_group = CategoriesGroupModel.query.filter_by(
-                            name=group_name,
-                            user_id=user_id
-                        ).first()
-
-                        if not cat_group:
-                            cat_group = CategoriesGroupModel(
-                                user_id=user_id,
-                                name=group_name
-                            )
-                            cat_group.save()
-
-                        created_groups[group_name] = cat_group.id
+                        if group_name not in group_ids:
+                            if dry_run:
+                                group_ids[group_name] = f'dry-run:{group_name}'
+                            else:
+                                cat_group = CategoriesGroupModel(
+                                    user_id=user_id,
+                                    name=group_name
+                                )
+                                cat_group.save()
+                                group_ids[group_name] = cat_group.id
+
+                        created_groups[group_name] = group_ids[group_name]
 
                     # Check if category already exists
-                    existing_category = CategoriesModel.query.filter_by(
-                        name=category_name,
-                        categories_group_id=created_groups[group_name],
-                        categories_type_id=created_types[type_name],
-                        user_id=user_id
-                    ).first()
-
-                    if existing_category:
+                    key = (category_name, created_groups[group_name], created_types[type_name])
+                    if key in existing_categories:
+                        timer.add('write', time.perf_counter() - started, 1)
                         skipped_categories += 1
                         continue
 
                     # Create category
-                    new_category = CategoriesModel(
-                        user_id=user_id,
-                        categories_group_id=created_groups[group_name],
-                        categories_type_id=created_types[type_name],
-                        name=category_name
-                    )
-                    new_category.save()
+                    if not dry_run:
+                        new_category = CategoriesModel(
+                            user_id=user_id,
+                            categories_group_id=created_groups[group_name],
+                            categories_type_id=created_types[type_name],
+                            name=category_name
+                        )
+                        new_category.save()
+                    existing_categories.add(key)
                     created_categories += 1
+                    timer.add('write', time.perf_counter() - started, 1)
 
-            # Clean up the uploaded file
-            os.remove(file_path)
-
-            return make_response(jsonify({
-                'message': 'Categories imported successfully',
+            response_data = {
+                'message': 'Dry run completed, nothing was written' if dry_run else 'Categories imported successfully',
                 'categories_created': created_categories,
                 'categories_skipped': skipped_categories,
                 'types_processed': len(created_types),
-                'groups_processed': len(created_groups)
-            }), 201)
+                'groups_processed': len(created_groups),
+                'timings': timer.to_dict(rows_read)
+            }
+            if dry_run:
+                response_data['dry_run'] = True
+
+            return make_response(jsonify(response_data), 200 if dry_run else 201)
 
         except Exception as e:
             return make_response(jsonify({
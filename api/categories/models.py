@@ -20,6 +20,9 @@ class CategoriesModel(Base):
     categories_group = db.relationship('CategoriesGroupModel', backref='categories')
     categories_type = db.relationship('CategoriesTypeModel', backref='categories')
 
+    SERIALIZED_COLUMNS = ('id', 'user_id', 'categories_group_id', 'categories_type_id', 'name', 'created_at', 'updated_at')
+    EXPAND_PATHS = ('categories_group', 'categories_type')
+
     def __init__(self, user_id, categories_group_id, categories_type_id, name):
         """
         Initialize a CategoriesModel instance.
@@ -44,24 +47,37 @@ class CategoriesModel(Base):
         """
         return f'<Categories {self.name!r}>'
 
-    def to_dict(self):
+    def to_dict(self, fields=None, expand=None):
         """
         Convert the CategoriesModel instance to a dictionary.
 
+        With no arguments the group and type are always nested, as they always
+        have been. Passing fields or expand switches to sparse output.
+
+        Args:
+            fields (set): Columns to include, or None for all of SERIALIZED_COLUMNS.
+            expand (dict): Relationships to nest, e.g. {'categories_group': {}}.
+
         Returns:
             dict: Dictionary representation of the category.
         """
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'categories_group_id': self.categories_group_id,
-            'categories_type_id': self.categories_type_id,
-            'categories_group': self.categories_group.to_dict(),
-            'categories_type': self.categories_type.to_dict(),
-            'name': self.name,
-            'created_at': self.created_at,
-            'updated_at': self.updated_at
-        }
+        if fields is None and expand is None:
+            return {
+                'id': self.id,
+                'user_id': self.user_id,
+                'categories_group_id': self.categories_group_id,
+                'categories_type_id': self.categories_type_id,
+                'categories_group': self.categories_group.to_dict(),
+                'categories_type': self.categories_type.to_dict(),
+                'name': self.name,
+                'created_at': self.created_at,
+                'updated_at': self.updated_at
+            }
+
+        data = {name: getattr(self, name) for name in self.SERIALIZED_COLUMNS if fields is None or name in fields}
+        for name in (expand or {}):
+            data[name] = getattr(self, name).to_dict()
+        return data
 
     def save(self):
         """
@@ -1,6 +1,7 @@
 from flask import g, request, jsonify, make_response
 from flask_restx import Resource, fields
 from api.categories_group.models import CategoriesGroupModel
+from api.helpers import versioned_list_response
 
 categories_group_model = g.api.model('CategoriesGroup', {
     'user_id': fields.String(required=True, description='User ID'),
@@ -24,6 +25,9 @@ class CategoriesGroup(Resource):
         return make_response(jsonify({'message': 'Categories Group created successfully'}), 201)
 
     def get(self):
-        categories_group = CategoriesGroupModel.query.all()
-        _categories_group = [category_group.to_dict() for category_group in categories_group]
-        return make_response(jsonify({'categories_group': _categories_group}), 200)
+        def build():
+            categories_group = CategoriesGroupModel.query.all()
+            _categories_group = [category_group.to_dict() for category_group in categories_group]
+            return make_response(jsonify({'categories_group': _categories_group}), 200)
+
+        return versioned_list_response('categories_group', None, build)
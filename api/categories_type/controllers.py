@@ -1,6 +1,7 @@
 from flask import g, request, jsonify, make_response
 from flask_restx import Resource, fields
 from api.categories_type.models import CategoriesTypeModel
+from api.helpers import versioned_list_response
 
 categories_type_model = g.api.model('CategoriesType', {
     'user_id': fields.String(required=True, description='User ID'),
@@ -24,6 +25,9 @@ class CategoriesType(Resource):
         return make_response(jsonify({'message': 'Categories Type created successfully'}), 201)
 
     def get(self):
-        categories_type = CategoriesTypeModel.query.all()
-        _categories_type = [category_type.to_dict() for category_type in categories_type]
-        return make_response(jsonify({'categories_type': _categories_type}), 200)
+        def build():
+            categories_type = CategoriesTypeModel.query.all()
+            _categories_type = [category_type.to_dict() for category_type in categories_type]
+            return make_response(jsonify({'categories_type': _categories_type}), 200)
+
+        return versioned_list_response('categories_type', None, build)
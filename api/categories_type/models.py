@@ -7,6 +7,8 @@ class CategoriesTypeModel(Base):
     user_id = db.Column('user_id', db.Text, db.ForeignKey('user.id'), nullable=False)
     name = db.Column(db.String(255), nullable=False)
 
+    SERIALIZED_COLUMNS = ('id', 'user_id', 'name', 'created_at', 'updated_at')
+
     def __init__(self, user_id, name):
         self.user_id = user_id
         self.name = name
@@ -0,0 +1,105 @@
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from app import db
+
+
+class DataVersionModel(db.Model):
+    """
+    DataVersionModel represents the data_version table in the database.
+
+    One row per (user, resource) holds a counter that is incremented by every
+    write to that user's rows of the resource. List endpoints derive their
+    ETags from these counters, so an unchanged list can be answered with
+    304 Not Modified without being queried or serialized.
+
+    Attributes:
+        user_id (str): The ID of the user whose data changed.
+        resource (str): The resource, e.g. 'transaction' or 'categories'.
+        version (int): Incremented on every insert, update or delete.
+    """
+
+    __tablename__ = 'data_version'
+    # No foreign key: a version row is bookkeeping and must not block writes
+    user_id = db.Column('user_id', db.Text, primary_key=True)
+    resource = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __init__(self, user_id, resource, version=0):
+        """
+        Initialize a DataVersionModel instance.
+
+        Args:
+            user_id (str): The ID of the user whose data changed.
+            resource (str): The resource name.
+            version (int): The starting version.
+        """
+        self.user_id = user_id
+        self.resource = resource
+        self.version = version
+
+    def __repr__(self):
+        """
+        Return a string representation of the DataVersionModel instance.
+
+        Returns:
+            str: String representation of the data version.
+        """
+        return f'<DataVersion {self.user_id!r} {self.resource!r} {self.version!r}>'
+
+    @classmethod
+    def bump(cls, connection, user_id, resource):
+        """
+        Increment a user's version of a resource, creating the row on first write.
+
+        Runs on the caller's connection so it commits or rolls back with the write.
+
+        Args:
+            connection (Connection | Session): Where the write is happening.
+            user_id (str): The user whose data changed.
+            resource (str): The resource name.
+        """
+        table = cls.__table__
+        dialect = (connection if isinstance(connection, Connection) else connection.get_bind()).dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+            connection.execute(
+                insert(table)
+                .values(user_id=user_id, resource=resource, version=1)
+                .on_conflict_do_update(index_elements=['user_id', 'resource'], set_={'version': table.c.version + 1})
+            )
+            return
+
+        result = connection.execute(
+            update(table)
+            .where(table.c.user_id == user_id, table.c.resource == resource)
+            .values(version=table.c.version + 1)
+        )
+        if not result.rowcount:
+            connection.execute(table.insert().values(user_id=user_id, resource=resource, version=1))
+
+    @classmethod
+    def fingerprint(cls, resources, user_id=None):
+        """
+        Summarize the versions of resources, for one user or across all users.
+
+        Every write adds one to some row, so the per-resource sum of versions
+        changes whenever any of the data changes.
+
+        Args:
+            resources (tuple): Resource names the response depends on.
+            user_id (str): Limit to one user, or None for global lists.
+
+        Returns:
+            tuple: (resource, version sum, row count) for each resource, in order.
+        """
+        table = cls.__table__
+        query = (
+            select(table.c.resource, func.sum(table.c.version), func.count())
+            .where(table.c.resource.in_(resources))
+            .group_by(table.c.resource)
+        )
+        if user_id:
+            query = query.where(table.c.user_id == user_id)
+        versions = {resource: (int(total), count) for resource, total, count in db.session.execute(query)}
+        return tuple((resource, *versions.get(resource, (0, 0))) for resource in resources)
@@ -0,0 +1,41 @@
+from sqlalchemy import event
+from api.data_version.models import DataVersionModel
+from api.categories.models import CategoriesModel
+from api.categories_group.models import CategoriesGroupModel
+from api.categories_type.models import CategoriesTypeModel
+from api.institution.models import InstitutionModel
+from api.institution_account.models import InstitutionAccountModel
+
+# Resources whose ORM writes bump their data version. Transactions are bumped
+# by api/transaction/counts.py, which already hooks every transaction write path.
+TRACKED_MODELS = {
+    CategoriesModel: 'categories',
+    CategoriesGroupModel: 'categories_group',
+    CategoriesTypeModel: 'categories_type',
+    InstitutionModel: 'institution',
+    InstitutionAccountModel: 'account'
+}
+
+# What each list's response embeds, so nested changes also change its ETag
+LIST_DEPENDENCIES = {
+    'transaction': ('transaction', 'categories', 'categories_group', 'categories_type', 'account', 'institution'),
+    'categories': ('categories', 'categories_group', 'categories_type'),
+    'categories_group': ('categories_group',),
+    'categories_type': ('categories_type',),
+    'institution': ('institution',),
+    'account': ('account', 'institution')
+}
+
+
+def _bump(mapper, connection, target):
+    DataVersionModel.bump(connection, target.user_id, TRACKED_MODELS[mapper.class_])
+
+
+def track_data_versions():
+    """
+    Register the mapper events that bump data versions. Safe to call more than once.
+    """
+    for model in TRACKED_MODELS:
+        for name in ('after_insert', 'after_update', 'after_delete'):
+            if not event.contains(model, name, _bump):
+                event.listen(model, name, _bump)
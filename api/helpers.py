@@ -1,8 +1,22 @@
+import io
+import time
+import hashlib
+from flask import request, make_response
 from app.config import Config
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
 
+def open_csv_stream(file, encoding='utf-8'):
+    """
+    Wrap an uploaded file's byte stream so it can be decoded and parsed incrementally.
+
+    The upload is read straight from the werkzeug FileStorage stream instead of being
+    saved to UPLOAD_FOLDER first, so memory use stays bounded by the csv reader's
+    buffer and nothing is left on disk if the worker dies mid-import.
+    """
+    return io.TextIOWrapper(file.stream, encoding=encoding, newline='')
+
 def positive_or_negative(amount):
     if amount < 0:
         return "Withdrawal"
@@ -15,3 +29,166 @@ def clean_dollar_value(amount):
     _amount = amount.replace("$", "")
     __amount = _amount.replace(",", "")
     return float(__amount)
+
+class StageTimer:
+    """
+    Accumulate wall-clock time and row counts per stage of a long-running job.
+
+    Hot loops call add() with their own perf_counter() readings, iterators can
+    be wrapped with timed(), and to_dict() renders the `timings` block returned
+    by the importers.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+
+    def add(self, stage, seconds, rows=0):
+        """
+        Add time and rows to a stage.
+
+        Args:
+            stage (str): The stage name, e.g. 'parse'.
+            seconds (float): Wall-clock time spent in the stage.
+            rows (int): Rows handled by the stage.
+        """
+        totals = self.stages.get(stage)
+        if totals is None:
+            totals = self.stages[stage] = [0.0, 0]
+        totals[0] += seconds
+        totals[1] += rows
+
+    def timed(self, iterable, stage):
+        """
+        Yield from an iterable, charging the time spent producing each item to a stage.
+
+        Args:
+            iterable (iterable): The source, e.g. a csv.DictReader.
+            stage (str): The stage name.
+
+        Yields:
+            The items of the iterable.
+        """
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(stage, time.perf_counter() - started)
+                return
+            self.add(stage, time.perf_counter() - started, 1)
+            yield item
+
+    def elapsed(self):
+        """
+        Returns:
+            float: Seconds since the timer was created.
+        """
+        return time.perf_counter() - self.started
+
+    def to_dict(self, rows=None):
+        """
+        Render the timings block.
+
+        Args:
+            rows (int): Total rows processed, used for the overall throughput.
+
+        Returns:
+            dict: Total seconds, rows per second and per-stage seconds and rows.
+        """
+        total = self.elapsed()
+        return {
+            'total_seconds': round(total, 4),
+            'rows_per_sec': round(rows / total, 1) if rows is not None and total > 0 else None,
+            'stages': {
+                stage: {'seconds': round(seconds, 4), 'rows': stage_rows}
+                for stage, (seconds, stage_rows) in self.stages.items()
+            }
+        }
+
+def parse_fields(value, allowed):
+    """
+    Parse a ?fields= parameter into the set of columns to serialize.
+
+    Args:
+        value (str): Comma-separated column names, or None.
+        allowed (tuple): The columns the model can serialize.
+
+    Returns:
+        set: The requested columns plus 'id', or None when the parameter is absent.
+
+    Raises:
+        ValueError: If a name is not in allowed.
+    """
+    if value is None:
+        return None
+    fields = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = fields - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return fields | {'id'}
+
+def parse_expand(value, allowed):
+    """
+    Parse a ?expand= parameter into a tree of relationships to nest.
+
+    Dotted paths expand deeper, e.g. 'account.institution' nests the account
+    and its institution. Expanded objects only carry their own columns plus
+    whatever is expanded beneath them.
+
+    Args:
+        value (str): Comma-separated relationship paths, or None.
+        allowed (tuple): The dotted paths the model can expand.
+
+    Returns:
+        dict: Relationship name -> nested expand dict, or None when the parameter is absent.
+
+    Raises:
+        ValueError: If a path is not in allowed.
+    """
+    if value is None:
+        return None
+    tree = {}
+    for path in (path.strip() for path in value.split(',')):
+        if not path:
+            continue
+        if path not in allowed:
+            raise ValueError(f"Cannot expand '{path}', expected one of: {', '.join(allowed)}")
+        node = tree
+        for name in path.split('.'):
+            node = node.setdefault(name, {})
+    return tree
+
+def versioned_list_response(resource, user_id, build):
+    """
+    Answer a list request with an ETag, or 304 Not Modified if the client's copy is current.
+
+    The ETag hashes the data versions of everything the list embeds (see
+    api/data_version/tracking.py), the user it is scoped to and the query
+    string, so nothing is queried or serialized when the list is unchanged.
+
+    Args:
+        resource (str): The list's resource, a key of LIST_DEPENDENCIES.
+        user_id (str): The user the list is scoped to, or None for global lists.
+        build (callable): Returns the full response when the list has changed.
+
+    Returns:
+        Response: The built response with an ETag, or an empty 304.
+    """
+    from api.data_version.models import DataVersionModel
+    from api.data_version.tracking import LIST_DEPENDENCIES
+
+    fingerprint = DataVersionModel.fingerprint(LIST_DEPENDENCIES[resource], user_id)
+    key = repr((resource, user_id, fingerprint, sorted(request.args.items(multi=True))))
+    etag = hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    if etag in request.if_none_match:
+        response = make_response('', 304)
+        response.set_etag(etag)
+        return response
+
+    response = build()
+    if response.status_code == 200:
+        response.set_etag(etag)
+    return response
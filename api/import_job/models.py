@@ -0,0 +1,133 @@
+import json
+from datetime import datetime
+from app import db
+from api.base.models import Base
+
+class ImportJobModel(Base):
+    """
+    ImportJobModel represents the import_job table in the database.
+
+    A job row is created when an import is submitted and updated by the
+    background worker after every chunk, so progress can be polled from any
+    process. Jobs do not resume after a restart: `flask recover-import-jobs`
+    submits queued jobs again and fails the ones that were running.
+
+    Attributes:
+        user_id (str): The ID of the user who submitted the import.
+        kind (str): What is being imported, e.g. 'transactions'.
+        status (str): queued, running, completed or failed.
+        filename (str): The name of the uploaded file.
+        file_path (str): Where the upload is spooled until the worker reads it.
+        total_bytes (int): The size of the upload.
+        bytes_processed (int): How much of the upload has been parsed.
+        rows_parsed (int): Rows read from the CSV so far.
+        rows_created (int): Rows inserted so far.
+        rows_skipped (int): Empty or duplicate rows so far.
+        rows_errored (int): Rejected rows so far.
+        started_at (datetime): When the worker picked the job up.
+        finished_at (datetime): When the job completed or failed.
+        result (str): The final import response, JSON encoded.
+        error (str): Why the job failed.
+    """
+
+    __tablename__ = 'import_job'
+    user_id = db.Column('user_id', db.Text, db.ForeignKey('user.id'), nullable=False)
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.Enum('queued', 'running', 'completed', 'failed', name='import_job_status_enum'), nullable=False)
+    filename = db.Column(db.String(255), nullable=True)
+    file_path = db.Column(db.String(1024), nullable=True)
+    total_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    bytes_processed = db.Column(db.BigInteger, nullable=False, default=0)
+    rows_parsed = db.Column(db.Integer, nullable=False, default=0)
+    rows_created = db.Column(db.Integer, nullable=False, default=0)
+    rows_skipped = db.Column(db.Integer, nullable=False, default=0)
+    rows_errored = db.Column(db.Integer, nullable=False, default=0)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    result = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    def __init__(self, user_id, kind, filename, file_path, total_bytes):
+        """
+        Initialize an ImportJobModel instance in the queued state.
+
+        Args:
+            user_id (str): The ID of the user who submitted the import.
+            kind (str): What is being imported, e.g. 'transactions'.
+            filename (str): The name of the uploaded file.
+            file_path (str): Where the upload is spooled until the worker reads it.
+            total_bytes (int): The size of the upload.
+        """
+        self.user_id = user_id
+        self.kind = kind
+        self.status = 'queued'
+        self.filename = filename
+        self.file_path = file_path
+        self.total_bytes = total_bytes
+        self.bytes_processed = 0
+        self.rows_parsed = 0
+        self.rows_created = 0
+        self.rows_skipped = 0
+        self.rows_errored = 0
+
+    def __repr__(self):
+        """
+        Return a string representation of the ImportJobModel instance.
+
+        Returns:
+            str: String representation of the import job.
+        """
+        return f'<ImportJob {self.id!r} {self.status!r}>'
+
+    def to_dict(self):
+        """
+        Convert the ImportJobModel instance to a dictionary, including throughput and ETA.
+
+        Returns:
+            dict: Dictionary representation of the import job.
+        """
+        rows_per_sec = None
+        eta_seconds = None
+        if self.started_at:
+            elapsed = ((self.finished_at or datetime.utcnow()) - self.started_at).total_seconds()
+            if elapsed > 0:
+                rows_per_sec = round(self.rows_parsed / elapsed, 1)
+                if self.status == 'running' and self.bytes_processed:
+                    remaining = max(self.total_bytes - self.bytes_processed, 0)
+                    eta_seconds = round(elapsed * remaining / self.bytes_processed, 1)
+
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'kind': self.kind,
+            'status': self.status,
+            'filename': self.filename,
+            'total_bytes': self.total_bytes,
+            'bytes_processed': self.bytes_processed,
+            'rows_parsed': self.rows_parsed,
+            'rows_created': self.rows_created,
+            'rows_skipped': self.rows_skipped,
+            'rows_errored': self.rows_errored,
+            'rows_per_sec': rows_per_sec,
+            'eta_seconds': eta_seconds,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
+        }
+
+    def save(self):
+        """
+        Save the ImportJobModel instance to the database.
+        """
+        db.session.add(self)
+        db.session.commit()
+
+    def delete(self):
+        """
+        Delete the ImportJobModel instance from the database.
+        """
+        db.session.delete(self)
+        db.session.commit()
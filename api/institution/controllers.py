@@ -1,6 +1,7 @@
 from flask import g, request, jsonify, make_response
 from flask_restx import Resource, fields
 from api.institution.models import InstitutionModel
+from api.helpers import versioned_list_response
 
 institution_model = g.api.model('Institution', {
     'user_id': fields.String(requierd=True, description='User ID'),
@@ -36,9 +37,12 @@ class Institution(Resource):
         return make_response(jsonify({'message': 'Institution created successfully'}), 201)
 
     def get(self):
-        institutions = InstitutionModel.query.all()
-        _isntitutions = [institution.to_dict() for institution in institutions]
-        return make_response(jsonify({'institutions': _isntitutions}), 200)
+        def build():
+            institutions = InstitutionModel.query.all()
+            _isntitutions = [institution.to_dict() for institution in institutions]
+            return make_response(jsonify({'institutions': _isntitutions}), 200)
+
+        return versioned_list_response('institution', None, build)
 
 @g.api.route('/institution/<string:id>')
 class InstitutionDetail(Resource):
@@ -8,6 +8,7 @@ class InstitutionModel(Base):
     location = db.Column(db.String(255), nullable=True)
     description = db.Column(db.Text, nullable=True)
 
+    SERIALIZED_COLUMNS = ('id', 'user_id', 'name', 'location', 'description', 'created_at', 'updated_at')
 
     def __init__(self, user_id, name, location, description):
         self.user_id = user_id
@@ -0,0 +1,191 @@
+from collections import defaultdict
+from sqlalchemy import bindparam, event, func, inspect, select, update
+from app import db
+from api.institution_account.models import InstitutionAccountModel
+from api.transaction.models import TransactionModel
+from api.data_version.models import DataVersionModel
+
+DEFAULT_RECOMPUTE_CHUNK_SIZE = 500
+# Differences below a cent are float noise, not drift
+BALANCE_TOLERANCE = 0.005
+
+
+def balance_deltas(rows):
+    """
+    Sum transaction amounts per account.
+
+    Args:
+        rows (iterable): (account_id, amount) pairs.
+
+    Returns:
+        dict: {account_id: total amount}.
+    """
+    deltas = defaultdict(float)
+    for account_id, amount in rows:
+        deltas[account_id] += amount
+    return dict(deltas)
+
+
+def adjust_balances(connection, user_id, deltas):
+    """
+    Add per-account deltas to stored balances.
+
+    Each account gets an atomic balance = balance + :delta, so concurrent
+    writers never overwrite each other, and all of them go to the database
+    as one executemany. Runs on the caller's connection so the balances
+    commit or roll back with the transaction writes they account for. ORM
+    writes call it through the mapper events below; bulk statements (the
+    CSV importer, the batch endpoints) must call it themselves.
+
+    Args:
+        connection (Connection | Session): Where the write is happening.
+        user_id (str): The user whose transactions changed.
+        deltas (dict): {account_id: amount to add}, see balance_deltas().
+    """
+    deltas = {account_id: delta for account_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    account = InstitutionAccountModel.__table__
+    connection.execute(
+        update(account)
+        .where(account.c.id == bindparam('account_id'))
+        .values(balance=func.coalesce(account.c.balance, account.c.starting_balance, 0) + bindparam('delta')),
+        [{'account_id': account_id, 'delta': delta} for account_id, delta in deltas.items()]
+    )
+    # Bulk updates skip the mapper events that keep account list ETags current
+    DataVersionModel.bump(connection, user_id, 'account')
+
+
+def recompute_balances(connection, user_id=None, account_ids=None):
+    """
+    Set account balances to starting_balance plus the sum of their transactions.
+
+    The sums come from one GROUP BY over the transactions of the selected
+    accounts, joined into a single UPDATE ... FROM, so the cost is one
+    statement however many accounts and transactions there are. Accounts
+    without transactions are reset to their starting balance. Runs on the
+    caller's connection; the caller commits.
+
+    Args:
+        connection (Connection | Session): Where to run the update.
+        user_id (str): Only recompute this user's accounts.
+        account_ids (list): Only recompute these accounts.
+
+    Returns:
+        int: The number of accounts updated.
+    """
+    account = InstitutionAccountModel.__table__
+    transaction = TransactionModel.__table__
+
+    conditions = []
+    if user_id is not None:
+        conditions.append(account.c.user_id == user_id)
+    if account_ids is not None:
+        conditions.append(account.c.id.in_(account_ids))
+
+    totals = (
+        select(account.c.id, func.coalesce(func.sum(transaction.c.amount), 0).label('total'))
+        .select_from(account.outerjoin(transaction, transaction.c.account_id == account.c.id))
+        .where(*conditions)
+        .group_by(account.c.id)
+        .subquery()
+    )
+    result = connection.execute(
+        update(account)
+        .where(account.c.id == totals.c.id)
+        .values(balance=func.coalesce(account.c.starting_balance, 0) + totals.c.total)
+    )
+
+    # Bulk updates skip the mapper events that keep account list ETags current
+    users = [user_id] if user_id is not None else connection.execute(
+        select(account.c.user_id).where(*conditions).distinct()
+    ).scalars().all()
+    for user in users:
+        DataVersionModel.bump(connection, user, 'account')
+    return result.rowcount
+
+
+def recompute_all_balances(chunk_size=DEFAULT_RECOMPUTE_CHUNK_SIZE):
+    """
+    Recompute every account's balance, committing after each chunk of accounts.
+
+    Accounts are walked in ID order, so each chunk is one short transaction
+    and a long run never holds locks on the whole account table.
+
+    Args:
+        chunk_size (int): Accounts per UPDATE and commit.
+
+    Returns:
+        int: The number of accounts updated.
+    """
+    account = InstitutionAccountModel.__table__
+    updated = 0
+    last_id = None
+    while True:
+        query = select(account.c.id).order_by(account.c.id).limit(chunk_size)
+        if last_id is not None:
+            query = query.where(account.c.id > last_id)
+        account_ids = db.session.execute(query).scalars().all()
+        if not account_ids:
+            return updated
+
+        updated += recompute_balances(db.session, account_ids=account_ids)
+        db.session.commit()
+        last_id = account_ids[-1]
+
+
+def verify_balances(user_id=None):
+    """
+    Compare stored balances against a full recompute, without changing them.
+
+    Args:
+        user_id (str): Only check this user's accounts.
+
+    Returns:
+        list: {'account_id', 'user_id', 'name', 'stored', 'expected'} for every
+            account whose stored balance is off by more than BALANCE_TOLERANCE.
+    """
+    account = InstitutionAccountModel.__table__
+    transaction = TransactionModel.__table__
+
+    expected = func.coalesce(account.c.starting_balance, 0) + func.coalesce(func.sum(transaction.c.amount), 0)
+    query = (
+        select(account.c.id, account.c.user_id, account.c.name, account.c.balance, expected.label('expected'))
+        .select_from(account.outerjoin(transaction, transaction.c.account_id == account.c.id))
+        .group_by(account.c.id, account.c.user_id, account.c.name, account.c.balance, account.c.starting_balance)
+        .order_by(account.c.id)
+    )
+    if user_id is not None:
+        query = query.where(account.c.user_id == user_id)
+
+    return [
+        {'account_id': row.id, 'user_id': row.user_id, 'name': row.name, 'stored': row.balance, 'expected': row.expected}
+        for row in db.session.execute(query)
+        if row.balance is None or abs(row.balance - row.expected) > BALANCE_TOLERANCE
+    ]
+
+
+def _old_value(target, name):
+    history = inspect(target).attrs[name].history
+    return history.deleted[0] if history.deleted else getattr(target, name)
+
+
+@event.listens_for(TransactionModel, 'after_insert')
+def _balance_insert(mapper, connection, target):
+    adjust_balances(connection, target.user_id, {target.account_id: target.amount})
+
+
+@event.listens_for(TransactionModel, 'after_delete')
+def _balance_delete(mapper, connection, target):
+    adjust_balances(connection, target.user_id, {target.account_id: -target.amount})
+
+
+@event.listens_for(TransactionModel, 'after_update')
+def _balance_update(mapper, connection, target):
+    # Move the old amount out of the old account and the new amount into the new one
+    deltas = balance_deltas([
+        (_old_value(target, 'account_id'), -_old_value(target, 'amount')),
+        (target.account_id, target.amount)
+    ])
+    adjust_balances(connection, target.user_id, deltas)
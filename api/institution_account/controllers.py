@@ -1,7 +1,14 @@
+from datetime import datetime
 from flask import g, request, jsonify, make_response, session
 from flask_restx import Resource, fields
+from sqlalchemy.orm import joinedload, load_only
+from app import db
 from api.institution_account.models import InstitutionAccountModel
+from api.institution_account.balances import recompute_balances
+from api.institution_account.history import balance_history
+from api.transaction.periods import PERIODS
 from api.transaction.models import TransactionModel
+from api.helpers import parse_fields, parse_expand, versioned_list_response
 
 institution_account_model = g.api.model('InstitutionAccount', {
     'institution_id': fields.String(required=True, description='Institution ID'),
@@ -66,31 +73,54 @@ class InstitutionAccount(Resource):
         return make_response(jsonify({'message': 'Account created successfully'}), 201)
 
     def get(self):
-        accounts = InstitutionAccountModel.query.all()
-        _accounts = [account.to_dict() for account in accounts]
-        return make_response(jsonify({'accounts': _accounts}), 200)
+        # ?fields= and ?expand=institution select sparse output
+        try:
+            fields = parse_fields(request.args.get('fields'), InstitutionAccountModel.SERIALIZED_COLUMNS)
+            expand = parse_expand(request.args.get('expand'), InstitutionAccountModel.EXPAND_PATHS)
+        except ValueError as e:
+            return make_response(jsonify({'message': str(e)}), 400)
+        if fields is not None and expand is None:
+            expand = {}
+
+        def build():
+            query = InstitutionAccountModel.query
+            if expand is not None:
+                columns = (fields or set(InstitutionAccountModel.SERIALIZED_COLUMNS)) | {f'{name}_id' for name in expand}
+                query = query.options(
+                    load_only(*[getattr(InstitutionAccountModel, name) for name in sorted(columns)]),
+                    *[joinedload(getattr(InstitutionAccountModel, name)) for name in expand]
+                )
+
+            accounts = query.all()
+            _accounts = [account.to_dict(fields, expand) for account in accounts]
+            return make_response(jsonify({'accounts': _accounts}), 200)
+
+        return versioned_list_response('account', None, build)
     
 @g.api.route('/institution/account/update_balance')
 class InstitutionAccountUpdateBalance(Resource):
-    def get(self):
-        __accounts = []
+    def post(self):
+        """
+        Recompute the user's account balances from their transactions
+
+        Every balance becomes starting_balance plus the sum of the account's
+        transactions, in one UPDATE (see api/institution_account/balances.py).
+        Only the session user's accounts are recomputed; recomputing every
+        user's is left to the recompute-balances CLI command.
+        """
         user_id = session.get('_user_id')
-        accounts = InstitutionAccountModel.query.all()
-        for account in accounts:
-            # get the current account balance
-            starting_balance = account.starting_balance
-            # get all the transactions for that account
-            transactions = TransactionModel.query.filter_by(account_id=account.id, user_id=user_id).all()
-            # sum up all the transactions for the account
-            total = sum([transaction.amount for transaction in transactions])
-            # update the account balance
-            new_account_balance = starting_balance + total
-            # we need to offset the transactions
-            print(f'Updating account {account.name} balance from {account.balance} to {new_account_balance}')
-            account.balance = new_account_balance
-            account.save()
-            __accounts.append(account.to_dict())
-        return make_response(jsonify({'accounts': __accounts}), 200)
+        if not user_id:
+            return make_response(jsonify({'message': 'User not authenticated'}), 401)
+
+        updated = recompute_balances(db.session, user_id=user_id)
+        db.session.commit()
+
+        accounts = InstitutionAccountModel.query.filter_by(user_id=user_id).order_by(InstitutionAccountModel.name).all()
+        return make_response(jsonify({
+            'message': 'Account balances updated successfully',
+            'updated': updated,
+            'accounts': [account.to_dict() for account in accounts]
+        }), 200)
 
 @g.api.route('/institution/account/<string:id>')
 class InstitutionAccountDetail(Resource):
@@ -168,4 +198,43 @@ class InstitutionAccountDetail(Resource):
 
         account.delete()
 
-        return make_response(jsonify({'message': 'Account deleted successfully'}), 200)
\ No newline at end of file
+        return make_response(jsonify({'message': 'Account deleted successfully'}), 200)
+
+
+@g.api.route('/institution/account/<string:id>/balance_history')
+class InstitutionAccountBalanceHistory(Resource):
+    def get(self, id):
+        """
+        The account's balance at the end of each day, week or month
+
+        ?interval= is day (the default), week or month; ?from= and ?to= are
+        inclusive YYYY-MM-DD bounds, by default the first transaction and
+        today. Balances are starting_balance plus a running sum of the
+        transactions, cached per account (see api/institution_account/history.py).
+        """
+        account = InstitutionAccountModel.query.get(id)
+        if not account:
+            return make_response(jsonify({'message': 'Account not found'}), 404)
+
+        interval = request.args.get('interval') or 'day'
+        if interval not in PERIODS:
+            return make_response(jsonify({'message': f"interval must be one of: {', '.join(PERIODS)}"}), 400)
+        try:
+            bounds = [
+                datetime.strptime(request.args[name], '%Y-%m-%d').date() if request.args.get(name) else None
+                for name in ('from', 'to')
+            ]
+        except ValueError:
+            return make_response(jsonify({'message': 'from and to must be dates in YYYY-MM-DD format'}), 400)
+
+        try:
+            points = balance_history(account, interval, *bounds)
+        except ValueError as e:
+            return make_response(jsonify({'message': str(e)}), 400)
+
+        return make_response(jsonify({
+            'account_id': account.id,
+            'interval': interval,
+            'starting_balance': account.starting_balance,
+            'balances': points
+        }), 200)
@@ -0,0 +1,146 @@
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import date, datetime, time
+from flask import current_app
+from sqlalchemy import func, select
+from app import db
+from api.transaction.models import TransactionModel
+from api.transaction.periods import truncate_date, period_start, next_period
+from api.data_version.models import DataVersionModel
+
+DEFAULT_HISTORY_CACHE_SIZE = 256
+# A chart wider than this is almost certainly a wrong interval
+MAX_HISTORY_POINTS = 3700
+
+_history_cache = OrderedDict()
+_history_cache_lock = threading.Lock()
+
+
+class InvalidHistory(ValueError):
+    """Raised when a balance history request cannot be answered"""
+
+
+def _dated_transactions(account):
+    return (
+        TransactionModel.user_id == account.user_id,
+        TransactionModel.account_id == account.id,
+        TransactionModel.external_date.isnot(None)
+    )
+
+
+def _running_totals(account, interval, start, end):
+    """
+    Cumulative transaction totals per period, from one grouped query with a window SUM.
+
+    Args:
+        account (InstitutionAccountModel): The account.
+        interval (str): One of periods.PERIODS.
+        start (datetime): Only count transactions from here, or None for all.
+        end (datetime): Only count transactions before here.
+
+    Returns:
+        tuple: (period starts, running totals through each of them), for periods with transactions.
+    """
+    period = truncate_date(TransactionModel.external_date, interval, db.session.get_bind().dialect.name)
+    query = (
+        select(period, func.sum(func.sum(TransactionModel.amount)).over(order_by=period))
+        .where(*_dated_transactions(account), TransactionModel.external_date < end)
+        .group_by(period)
+        .order_by(period)
+    )
+    if start is not None:
+        query = query.where(TransactionModel.external_date >= start)
+    rows = db.session.execute(query).all()
+    return [row[0] for row in rows], [row[1] for row in rows]
+
+
+def _cached_totals(account, interval, end):
+    """
+    Running totals per period up to end, from the cache where it is still valid.
+
+    Entries are kept per (account, interval) with the user's transaction data
+    version, which every transaction write bumps in its own transaction. An
+    entry is used only while that version is unchanged and rebuilt after any
+    write. A request past the cached end extends the entry with a query over
+    the new periods only.
+    """
+    key = (account.id, interval)
+    version = DataVersionModel.fingerprint(('transaction',), account.user_id)
+    with _history_cache_lock:
+        entry = _history_cache.get(key)
+        if entry is not None:
+            _history_cache.move_to_end(key)
+
+    if entry is not None and entry['version'] != version:
+        entry = None
+    if entry is not None and entry['end'] >= end:
+        return entry['periods'], entry['totals']
+
+    if entry is None:
+        periods, totals = _running_totals(account, interval, None, end)
+    else:
+        # Only the periods after the cached range are new; their running totals continue from it
+        new_periods, new_totals = _running_totals(account, interval, entry['end'], end)
+        carried = entry['totals'][-1] if entry['totals'] else 0
+        periods = entry['periods'] + new_periods
+        totals = entry['totals'] + [carried + total for total in new_totals]
+
+    _store(key, {'version': version, 'end': end, 'periods': periods, 'totals': totals})
+    return periods, totals
+
+
+def _store(key, entry):
+    size = current_app.config.get('BALANCE_HISTORY_CACHE_SIZE', DEFAULT_HISTORY_CACHE_SIZE)
+    if not size:
+        return
+    with _history_cache_lock:
+        _history_cache[key] = entry
+        _history_cache.move_to_end(key)
+        while len(_history_cache) > size:
+            _history_cache.popitem(last=False)
+
+
+def balance_history(account, interval, start=None, end=None):
+    """
+    The account's closing balance for each period between two dates.
+
+    Each balance is starting_balance plus the running SUM(amount) OVER
+    (ORDER BY period) of the account's transactions up to the end of the
+    period. Periods without transactions carry the previous balance forward.
+    Transactions without an external_date have no place in time and are
+    left out.
+
+    Args:
+        account (InstitutionAccountModel): The account.
+        interval (str): One of periods.PERIODS.
+        start (date): The first day to include, or None to start at the first transaction.
+        end (date): The last day to include, or None for today.
+
+    Returns:
+        list: {'date', 'balance'} per period, date being the period's first day.
+
+    Raises:
+        InvalidHistory: If the range is reversed or has too many periods.
+    """
+    end = end or date.today()
+    last = period_start(end, interval)
+    periods, totals = _cached_totals(account, interval, datetime.combine(next_period(last, interval), time()))
+
+    first = period_start(start, interval) if start is not None else (periods[0] if periods else last)
+    if first > last:
+        raise InvalidHistory('from must not be after to')
+
+    starting_balance = account.starting_balance or 0
+    points = []
+    current = first
+    while current <= last:
+        if len(points) == MAX_HISTORY_POINTS:
+            raise InvalidHistory(f'At most {MAX_HISTORY_POINTS} periods can be returned; use a longer interval')
+        index = bisect_right(periods, current) - 1
+        points.append({
+            'date': current.isoformat(),
+            'balance': round(starting_balance + (totals[index] if index >= 0 else 0), 2)
+        })
+        current = next_period(current, interval)
+    return points
@@ -14,6 +14,12 @@ class InstitutionAccountModel(Base):
     account_class = db.Column(db.Enum('asset','liability', name='account_class_enum'), nullable=True)
     number = db.Column(db.String(255), nullable=True)
 
+    SERIALIZED_COLUMNS = (
+        'id', 'institution_id', 'user_id', 'name', 'status', 'balance', 'starting_balance',
+        'account_type', 'account_class', 'number', 'created_at', 'updated_at'
+    )
+    EXPAND_PATHS = ('institution',)
+
     def __init__(self, institution_id, user_id, name, status, balance, starting_balance, account_type, account_class, number):
         self.institution_id = institution_id
         self.user_id = user_id
@@ -28,22 +34,29 @@ class InstitutionAccountModel(Base):
     def __repr__(self):
         return f'<Account {self.name!r}>'
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'institution_id': self.institution_id,
-            'institution': self.institution.to_dict(),
-            'user_id': self.user_id,
-            'name': self.name,
-            'status': self.status,
-            'balance': self.balance,
-            'starting_balance': self.starting_balance,
-            'account_type': self.account_type,
-            'account_class': self.account_class,
-            'number': self.number,
-            'created_at': self.created_at,
-            'updated_at': self.updated_at
-        }
+    def to_dict(self, fields=None, expand=None):
+        if fields is None and expand is None:
+            return {
+                'id': self.id,
+                'institution_id': self.institution_id,
+                'institution': self.institution.to_dict(),
+                'user_id': self.user_id,
+                'name': self.name,
+                'status': self.status,
+                'balance': self.balance,
+                'starting_balance': self.starting_balance,
+                'account_type': self.account_type,
+                'account_class': self.account_class,
+                'number': self.number,
+                'created_at': self.created_at,
+                'updated_at': self.updated_at
+            }
+
+        # Sparse output: only the requested columns, and the institution only when expanded
+        data = {name: getattr(self, name) for name in self.SERIALIZED_COLUMNS if fields is None or name in fields}
+        if 'institution' in (expand or {}):
+            data['institution'] = self.institution.to_dict()
+        return data
 
     def save(self):
         db.session.add(self)
@@ -0,0 +1,39 @@
+from flask import g, request, jsonify, make_response, session
+from flask_restx import Resource
+from werkzeug.datastructures import MultiDict
+from api.transaction.filters import scope_user_id
+from api.reports.summary import summarize
+
+from api.helpers import versioned_list_response
+
+
+@g.api.route('/reports/summary')
+class ReportSummary(Resource):
+    def get(self):
+        """
+        Sum and count transactions per group, computed in SQL.
+
+        ?group_by= is one of month (the default), week, category,
+        categories_group, categories_type, account or merchant. ?from= and
+        ?to= are inclusive YYYY-MM-DD bounds, aliases of the list's
+        date_from/date_to; every other transaction list filter and the user
+        scoping work as on /transaction. See api/reports/summary.py.
+
+        Responses carry an ETag; a matching If-None-Match gets 304 Not Modified.
+        """
+        user_id = scope_user_id(request.args, session.get('_user_id'))
+        return versioned_list_response('transaction', user_id, lambda: self.build_summary(user_id))
+
+    def build_summary(self, user_id):
+        """Run the grouped query for the request"""
+        args = MultiDict(request.args)
+        for alias, name in (('from', 'date_from'), ('to', 'date_to')):
+            if args.get(alias):
+                args[name] = args[alias]
+
+        try:
+            summary = summarize(args, user_id)
+        except ValueError as e:
+            return make_response(jsonify({'message': str(e)}), 400)
+        summary.update({'from': args.get('date_from'), 'to': args.get('date_to')})
+        return make_response(jsonify(summary), 200)
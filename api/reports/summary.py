@@ -0,0 +1,204 @@
+from sqlalchemy import func
+from app import db
+from api.transaction.models import TransactionModel
+from api.transaction.filters import InvalidFilter, apply_filters, apply_reference_filters, parse_date_range, FILTER_PARAMS
+from api.transaction.periods import truncate_date
+from api.transaction_rollup.models import TransactionRollupModel
+from api.categories.models import CategoriesModel
+from api.categories_group.models import CategoriesGroupModel
+from api.categories_type.models import CategoriesTypeModel
+from api.institution_account.models import InstitutionAccountModel
+
+GROUP_BY = ('month', 'week', 'category', 'categories_group', 'categories_type', 'account', 'merchant')
+DEFAULT_GROUP_BY = 'month'
+# Groupings the rollup table can answer, and the filters it can apply
+ROLLUP_GROUP_BY = ('month', 'category', 'categories_group', 'categories_type', 'account')
+ROLLUP_FILTERS = ('date_from', 'date_to', 'account_id', 'categories_id', 'categories_group_id', 'categories_type_id')
+
+
+def parse_group_by(value):
+    """
+    Validate a group_by parameter against GROUP_BY.
+
+    Args:
+        value (str): The parameter, or None for DEFAULT_GROUP_BY.
+
+    Returns:
+        str: The grouping.
+
+    Raises:
+        InvalidFilter: If the grouping is not supported.
+    """
+    value = value or DEFAULT_GROUP_BY
+    if value not in GROUP_BY:
+        raise InvalidFilter(f"Cannot group by '{value}', expected one of: {', '.join(GROUP_BY)}")
+    return value
+
+
+def use_rollups(group_by, args, user_id=None):
+    """
+    Whether the rollup table gives the same answer as scanning transactions.
+
+    Rollup rows cover whole months of one category and account, so the
+    grouping must not be finer than that, only account and category filters
+    may be set, and date bounds must fall on month boundaries. Rollups leave
+    out undated transactions, which only the month grouping and date-bounded
+    reports leave out too.
+
+    Databases upgraded from before the rollup table start with it empty until
+    scripts/add_transaction_rollups.py has run, so users without any rollup
+    rows are always answered from their transactions.
+
+    Args:
+        group_by (str): The grouping, see parse_group_by().
+        args (MultiDict): The request query parameters.
+        user_id (str): The user the report is restricted to, if any.
+
+    Returns:
+        bool: True to read transaction_rollup.
+    """
+    if group_by not in ROLLUP_GROUP_BY:
+        return False
+    if any(args.get(name) for name in FILTER_PARAMS if name not in ROLLUP_FILTERS):
+        return False
+    start, end = parse_date_range(args)
+    if any(bound is not None and bound.day != 1 for bound in (start, end)):
+        return False
+    if group_by != 'month' and start is None and end is None:
+        return False
+    return _rollups_built(user_id)
+
+
+def _rollups_built(user_id):
+    query = db.session.query(TransactionRollupModel.user_id)
+    if user_id is not None:
+        query = query.filter(TransactionRollupModel.user_id == user_id)
+    return db.session.query(query.exists()).scalar()
+
+
+def _grouping(group_by, date, categories_id, account_id, merchant, dialect):
+    """
+    The key and label columns of a grouping, and the joins that provide them.
+
+    Returns:
+        tuple: (key, label or None, [(target, onclause), ...]).
+    """
+    if group_by in ('month', 'week'):
+        return truncate_date(date, group_by, dialect), None, []
+    if group_by == 'merchant':
+        return merchant, None, []
+    if group_by == 'account':
+        return account_id, InstitutionAccountModel.name, [(InstitutionAccountModel, InstitutionAccountModel.id == account_id)]
+
+    category_join = (CategoriesModel, CategoriesModel.id == categories_id)
+    if group_by == 'category':
+        return categories_id, CategoriesModel.name, [category_join]
+    if group_by == 'categories_group':
+        return CategoriesGroupModel.id, CategoriesGroupModel.name, [
+            category_join, (CategoriesGroupModel, CategoriesGroupModel.id == CategoriesModel.categories_group_id)
+        ]
+    return CategoriesTypeModel.id, CategoriesTypeModel.name, [
+        category_join, (CategoriesTypeModel, CategoriesTypeModel.id == CategoriesModel.categories_type_id)
+    ]
+
+
+def _transaction_query(group_by, args, user_id, dialect):
+    query = apply_filters(TransactionModel.query, args, user_id)
+    key, label, joins = _grouping(
+        group_by, TransactionModel.external_date, TransactionModel.categories_id,
+        TransactionModel.account_id, TransactionModel.merchant, dialect
+    )
+    if group_by in ('month', 'week'):
+        # Undated transactions belong to no period
+        query = query.filter(TransactionModel.external_date.isnot(None))
+    aggregates = (
+        func.sum(TransactionModel.amount), func.count(),
+        func.min(TransactionModel.amount), func.max(TransactionModel.amount)
+    )
+    return query, key, label, joins, aggregates
+
+
+def _rollup_query(group_by, args, user_id, dialect):
+    query = TransactionRollupModel.query
+    if user_id:
+        query = query.filter(TransactionRollupModel.user_id == user_id)
+    start, end = parse_date_range(args)
+    if start is not None:
+        query = query.filter(TransactionRollupModel.month >= start.date())
+    if end is not None:
+        query = query.filter(TransactionRollupModel.month < end.date())
+    query = apply_reference_filters(query, args, TransactionRollupModel.account_id, TransactionRollupModel.categories_id)
+
+    if group_by == 'month':
+        key, label, joins = TransactionRollupModel.month, None, []
+    else:
+        key, label, joins = _grouping(
+            group_by, None, TransactionRollupModel.categories_id, TransactionRollupModel.account_id, None, dialect
+        )
+    aggregates = (
+        func.sum(TransactionRollupModel.total), func.sum(TransactionRollupModel.count),
+        func.min(TransactionRollupModel.min_amount), func.max(TransactionRollupModel.max_amount)
+    )
+    return query, key, label, joins, aggregates
+
+
+def summarize(args, user_id=None):
+    """
+    Sum transaction amounts per group with one GROUP BY.
+
+    Accepts the transaction list filters (see filters.apply_filters()).
+    Reports the rollup table can answer (see use_rollups()) read a few rows
+    per month from transaction_rollup; the rest aggregate the transactions
+    themselves, with month and week keys truncated in SQL (date_trunc on
+    PostgreSQL, date() modifiers on SQLite).
+
+    Args:
+        args (MultiDict): The request query parameters, with group_by.
+        user_id (str): Restrict to this user's transactions, see filters.scope_user_id().
+
+    Returns:
+        dict: {'group_by', 'source', 'groups', 'total', 'count'}; each group has
+            its key, label (the category, group, type or account name, else None),
+            total, count, min and max. Periods are in date order, other groups
+            by total, largest outflow first.
+
+    Raises:
+        InvalidFilter: If a parameter cannot be parsed.
+    """
+    group_by = parse_group_by(args.get('group_by'))
+    dialect = db.session.get_bind().dialect.name
+    rollups = use_rollups(group_by, args, user_id)
+    build = _rollup_query if rollups else _transaction_query
+    query, key, label, joins, aggregates = build(group_by, args, user_id, dialect)
+
+    for target, onclause in joins:
+        query = query.join(target, onclause)
+    columns = (key, label) if label is not None else (key,)
+    query = query.order_by(None).with_entities(*columns, *aggregates).group_by(*columns)
+    if group_by in ('month', 'week'):
+        query = query.order_by(key)
+    else:
+        query = query.order_by(aggregates[0], key)
+
+    groups = []
+    for row in query:
+        row = tuple(row)
+        group_key = row[0].isoformat() if group_by in ('month', 'week') else row[0]
+        group_label = row[1] if label is not None else None
+        total, count, low, high = row[-4:]
+        groups.append({
+            'key': group_key,
+            'label': group_label,
+            'total': round(total or 0, 2),
+            'count': int(count),
+            'min': low,
+            'max': high
+        })
+
+    return {
+        'group_by': group_by,
+        'source': 'rollup' if rollups else 'transactions',
+        'groups': groups,
+        'total': round(sum(group['total'] for group in groups), 2),
+        'count': sum(group['count'] for group in groups)
+    }
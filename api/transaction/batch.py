@@ -0,0 +1,357 @@
+import uuid
+from collections import Counter, defaultdict
+from sqlalchemy import select, func, tuple_
+from werkzeug.datastructures import MultiDict
+from app import db
+from api.transaction.models import TransactionModel
+from api.transaction.filters import apply_filters, FILTER_PARAMS
+from api.transaction.counts import adjust_transaction_count
+from api.institution_account.balances import adjust_balances, balance_deltas
+from api.transaction.rollups import add_to_rollups, recompute_rollups, rollup_keys
+from api.transaction.periods import period_start
+from api.transaction.parsing import parse_external_date
+from api.categories.models import CategoriesModel
+from api.institution_account.models import InstitutionAccountModel
+
+MAX_BATCH_SIZE = 1000
+
+# user_id is always the session user's, never taken from the body
+REQUIRED_FIELDS = ('categories_id', 'account_id', 'amount', 'transaction_type', 'external_id')
+OPTIONAL_FIELDS = ('external_date', 'merchant', 'original_statement', 'notes', 'tags', 'description')
+# Changing any of these moves transactions between rollup rows or changes their totals
+ROLLUP_FIELDS = ('categories_id', 'account_id', 'amount', 'external_date')
+# external_id is unique per user, so it cannot be set on many rows at once
+UPDATE_FIELDS = (
+    'categories_id', 'account_id', 'amount', 'transaction_type', 'external_date',
+    'merchant', 'original_statement', 'notes', 'tags', 'description'
+)
+
+
+class InvalidBatch(ValueError):
+    """
+    Raised when a batch request cannot be applied.
+
+    Attributes:
+        errors (list): Per-item messages, e.g. {'index': 3, 'message': '...'}.
+        status (int): The HTTP status to answer with.
+    """
+
+    def __init__(self, message, errors=None, status=400):
+        super().__init__(message)
+        self.errors = errors or []
+        self.status = status
+
+
+def _parse_amount(value):
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        raise ValueError('Amount must be a valid number')
+
+
+def _parse_date(value):
+    try:
+        return parse_external_date(value)
+    except ValueError:
+        raise ValueError('external_date must be a valid date')
+
+
+def missing_ids(model, ids, user_id):
+    """
+    Find which of a set of IDs do not exist or belong to another user, with one query.
+
+    Args:
+        model (Model): The model the IDs should refer to.
+        ids (iterable): IDs to check.
+        user_id (str): The user the rows must belong to.
+
+    Returns:
+        set: The IDs with no matching row of the user's.
+    """
+    ids = set(ids)
+    if not ids:
+        return set()
+    found = db.session.execute(select(model.id).where(model.id.in_(ids), model.user_id == user_id)).scalars()
+    return ids - set(found)
+
+
+def check_references(items, user_id):
+    """
+    Validate the categories_id and account_id of many items at once.
+
+    Args:
+        items (list): (index, values) pairs; index is None for a shared change set.
+        user_id (str): The user the categories and accounts must belong to.
+
+    Raises:
+        InvalidBatch: Listing every item that refers to a missing or another user's category or account.
+    """
+    errors = []
+    for column, model in (('categories_id', CategoriesModel), ('account_id', InstitutionAccountModel)):
+        missing = missing_ids(model, (values[column] for _, values in items if column in values), user_id)
+        errors.extend(
+            {'index': index, 'message': f'Invalid {column}'}
+            for index, values in items if values.get(column) in missing
+        )
+    if errors:
+        raise InvalidBatch('Some transactions refer to missing categories or accounts', errors)
+
+
+def parse_new_transactions(items, user_id):
+    """
+    Validate the body of a batch create.
+
+    Args:
+        items (list): Transaction objects, with the same fields as POST /transaction.
+            A user_id in them is ignored.
+        user_id (str): The session user, who owns every new transaction.
+
+    Returns:
+        list: Column values for each transaction, ready for a multi-row INSERT.
+
+    Raises:
+        InvalidBatch: With one error per invalid item; nothing is created.
+    """
+    if not isinstance(items, list) or not items:
+        raise InvalidBatch('transactions must be a non-empty list')
+    if len(items) > MAX_BATCH_SIZE:
+        raise InvalidBatch(f'At most {MAX_BATCH_SIZE} transactions can be sent at once')
+
+    rows, errors = [], []
+    for index, data in enumerate(items):
+        if not isinstance(data, dict) or not all(data.get(name) not in (None, '') for name in REQUIRED_FIELDS):
+            errors.append({'index': index, 'message': f"Required fields: {', '.join(REQUIRED_FIELDS)}"})
+            continue
+        try:
+            row = {name: data[name] for name in REQUIRED_FIELDS}
+            row['user_id'] = user_id
+            row.update({name: data.get(name) for name in OPTIONAL_FIELDS})
+            row['amount'] = _parse_amount(row['amount'])
+            row['external_date'] = _parse_date(row['external_date'])
+        except ValueError as e:
+            errors.append({'index': index, 'message': str(e)})
+            continue
+        rows.append((index, row))
+    if errors:
+        raise InvalidBatch('Some transactions are invalid', errors)
+
+    check_references(rows, user_id)
+
+    # external_id is unique per user: reject repeats within the batch and
+    # clashes with stored rows (one query for the whole batch)
+    seen = Counter((row['user_id'], row['external_id']) for _, row in rows)
+    pairs = list(seen)
+    taken = set(db.session.execute(
+        select(TransactionModel.user_id, TransactionModel.external_id)
+        .where(tuple_(TransactionModel.user_id, TransactionModel.external_id).in_(pairs))
+    ).tuples())
+    errors = [
+        {'index': index, 'message': 'A transaction with this external_id already exists'}
+        for index, row in rows
+        if (row['user_id'], row['external_id']) in taken or seen[(row['user_id'], row['external_id'])] > 1
+    ]
+    if errors:
+        raise InvalidBatch('Some external_ids are already taken', errors, status=409)
+
+    return [row for _, row in rows]
+
+
+def parse_changes(changes, user_id):
+    """
+    Validate the change set of a batch update.
+
+    Args:
+        changes (dict): Column values to set on every matched transaction.
+        user_id (str): The session user, who must own any category or account set.
+
+    Returns:
+        dict: The values for the UPDATE statement.
+
+    Raises:
+        InvalidBatch: If a column cannot be updated or a value is invalid.
+    """
+    if not isinstance(changes, dict) or not changes:
+        raise InvalidBatch(f"changes must set at least one of: {', '.join(UPDATE_FIELDS)}")
+    unknown = sorted(set(changes) - set(UPDATE_FIELDS))
+    if unknown:
+        raise InvalidBatch(f"Cannot update {', '.join(unknown)}; expected one of: {', '.join(UPDATE_FIELDS)}")
+
+    values = dict(changes)
+    try:
+        if 'amount' in values:
+            values['amount'] = _parse_amount(values['amount'])
+        if 'external_date' in values:
+            values['external_date'] = _parse_date(values['external_date'])
+    except ValueError as e:
+        raise InvalidBatch(str(e))
+    for name in ('categories_id', 'account_id', 'amount', 'transaction_type'):
+        if name in values and values[name] is None:
+            raise InvalidBatch(f'{name} cannot be null')
+
+    check_references([(None, values)], user_id)
+    return values
+
+
+def select_transactions(data, user_id):
+    """
+    Build the query for the transactions a batch update or delete targets.
+
+    Targets are given either as {'ids': [...]} or as {'filter': {...}} using
+    the list's filter parameters (see filters.apply_filters()). Both are
+    always limited to the session user's transactions; a user_id in the
+    filter is ignored. Every listed ID must exist and belong to the user,
+    otherwise nothing is changed.
+
+    Args:
+        data (dict): The request body.
+        user_id (str): The session user.
+
+    Returns:
+        Query: A TransactionModel query matching the targets.
+
+    Raises:
+        InvalidBatch: If the targets are missing, invalid or not found.
+    """
+    if ('ids' in data) == ('filter' in data):
+        raise InvalidBatch('Pass exactly one of ids or filter')
+
+    if 'ids' in data:
+        ids = data['ids']
+        if not isinstance(ids, list) or not ids:
+            raise InvalidBatch('ids must be a non-empty list')
+        if len(ids) > MAX_BATCH_SIZE:
+            raise InvalidBatch(f'At most {MAX_BATCH_SIZE} ids can be sent at once')
+        query = TransactionModel.query.filter(
+            TransactionModel.id.in_(set(map(str, ids))), TransactionModel.user_id == user_id
+        )
+        missing = set(map(str, ids)) - {id for id, in query.with_entities(TransactionModel.id)}
+        if missing:
+            raise InvalidBatch(
+                'Some transactions were not found',
+                [{'id': id, 'message': 'Transaction not found'} for id in sorted(missing)],
+                status=404
+            )
+        return query
+
+    filters = data['filter']
+    if not isinstance(filters, dict) or not any(filters.get(name) for name in FILTER_PARAMS):
+        raise InvalidBatch(f"filter must set at least one of: {', '.join(FILTER_PARAMS)}")
+    try:
+        filters = MultiDict({name: str(value) for name, value in filters.items() if value is not None})
+        return apply_filters(TransactionModel.query, filters, user_id)
+    except ValueError as e:
+        raise InvalidBatch(str(e))
+
+
+def affected_accounts(query):
+    """
+    Total the rows a query matches per user and account, before they are changed.
+
+    Returns:
+        list: (user_id, account_id, amount sum, row count) tuples.
+    """
+    return query.order_by(None).with_entities(
+        TransactionModel.user_id, TransactionModel.account_id, func.sum(TransactionModel.amount), func.count()
+    ).group_by(TransactionModel.user_id, TransactionModel.account_id).all()
+
+
+def create_transactions(rows):
+    """
+    Insert many transactions with one multi-row INSERT.
+
+    Bulk statements skip the mapper events, so each user's transaction count,
+    account balances, rollups and data versions are adjusted here. The caller
+    commits.
+
+    Args:
+        rows (list): Column values from parse_new_transactions().
+
+    Returns:
+        list: The IDs of the new transactions, in request order.
+    """
+    rows = [dict(row, id=str(uuid.uuid4())) for row in rows]
+    db.session.execute(TransactionModel.__table__.insert(), rows)
+    for user_id, created in Counter(row['user_id'] for row in rows).items():
+        adjust_transaction_count(db.session, user_id, created)
+        user_rows = [row for row in rows if row['user_id'] == user_id]
+        adjust_balances(db.session, user_id, balance_deltas((row['account_id'], row['amount']) for row in user_rows))
+        add_to_rollups(db.session, user_id, [
+            (row['account_id'], row['amount'], row['categories_id'], row['external_date']) for row in user_rows
+        ])
+    return [row['id'] for row in rows]
+
+
+def update_transactions(query, values):
+    """
+    Apply one change set to every transaction a query matches, with one UPDATE.
+
+    The change set is the same for every row, so the balance deltas follow
+    from the per-account totals taken before the update: each group's sum
+    leaves its old account, and either the same sum or count * new amount
+    arrives at the new one. Rollup rows the transactions leave or join are
+    recomputed when the change touches amounts, categories, accounts or dates.
+
+    Args:
+        query (Query): Targets from select_transactions().
+        values (dict): Values from parse_changes().
+
+    Returns:
+        int: The number of transactions updated.
+    """
+    groups = affected_accounts(query)
+    rollups = any(name in values for name in ROLLUP_FIELDS)
+    if rollups:
+        old_keys = rollup_keys(query)
+        # Rows without a date have no rollup key yet, but a new date gives them one
+        targets = query.order_by(None).with_entities(
+            TransactionModel.user_id, TransactionModel.categories_id, TransactionModel.account_id
+        ).distinct().all() if values.get('external_date') else []
+    updated = query.order_by(None).update(values, synchronize_session=False)
+
+    if rollups:
+        if 'external_date' in values:
+            month = period_start(values['external_date'], 'month')
+            new_keys = {
+                (user_id, month, values.get('categories_id', categories_id), values.get('account_id', account_id))
+                for user_id, categories_id, account_id in targets
+            }
+        else:
+            new_keys = {
+                (user_id, month, values.get('categories_id', categories_id), values.get('account_id', account_id))
+                for user_id, month, categories_id, account_id in old_keys
+            }
+        recompute_rollups(db.session, old_keys | new_keys)
+
+    moves = defaultdict(list)
+    for user_id, account_id, total, count in groups:
+        new_total = values['amount'] * count if 'amount' in values else total
+        moves[user_id] += [(account_id, -total), (values.get('account_id', account_id), new_total)]
+    for user_id in moves:
+        adjust_transaction_count(db.session, user_id, 0)
+        adjust_balances(db.session, user_id, balance_deltas(moves[user_id]))
+    return updated
+
+
+def delete_transactions(query):
+    """
+    Delete every transaction a query matches with one DELETE.
+
+    Args:
+        query (Query): Targets from select_transactions().
+
+    Returns:
+        int: The number of transactions deleted.
+    """
+    groups = affected_accounts(query)
+    old_keys = rollup_keys(query)
+    deleted = query.order_by(None).delete(synchronize_session=False)
+    recompute_rollups(db.session, old_keys)
+
+    counts, moves = Counter(), defaultdict(list)
+    for user_id, account_id, total, count in groups:
+        counts[user_id] += count
+        moves[user_id].append((account_id, -total))
+    for user_id, count in counts.items():
+        adjust_transaction_count(db.session, user_id, -count)
+        adjust_balances(db.session, user_id, balance_deltas(moves[user_id]))
+    return deleted
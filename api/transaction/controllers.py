@@ -1,18 +1,26 @@
-import os
 import csv
-from datetime import datetime
-from math import ceil
-from flask import g, request, jsonify, make_response, session
+from flask import g, request, jsonify, make_response, session, Response, stream_with_context, current_app
 from flask_restx import Resource, fields
-from werkzeug.utils import secure_filename
+from sqlalchemy.exc import IntegrityError
 from app import db
-from api.transaction.models import TransactionModel
+from api.transaction.models import TransactionModel, eager_relationships, sparse_columns
+from api.transaction.filters import apply_filters, filter_signature, scope_user_id, parse_sort, DEFAULT_SORT
+from api.transaction.counts import count_transactions
+from api.transaction.projection import project
+from api.transaction.pagination import keyset_page, keyset_order, InvalidCursor, DEFAULT_PER_PAGE, MAX_PER_PAGE
+from api.transaction.batch import (
+    InvalidBatch, parse_new_transactions, parse_changes, select_transactions,
+    create_transactions, update_transactions, delete_transactions
+)
+from api.transaction.search import search_page, search_tokens
+from api.transaction.export import export_rows, ndjson_lines, csv_chunks, EXPORT_FORMATS, DEFAULT_EXPORT_BATCH_SIZE
+from api.transaction.importer import TransactionImporter, REQUIRED_HEADERS, submit_import_job
+from api.transaction.parsing import parse_external_date
+from api.import_job.models import ImportJobModel
 from api.categories.models import CategoriesModel
 from api.institution_account.models import InstitutionAccountModel
-from api.institution.models import InstitutionModel
 
-from app.config import Config
-from api.helpers import allowed_file, positive_or_negative, clean_dollar_value
+from api.helpers import open_csv_stream, parse_fields, parse_expand, versioned_list_response
 
 transaction_model = g.api.model('Transaction', {
     'user_id': fields.String(required=True, description='User ID'),
@@ -29,6 +37,37 @@ transaction_model = g.api.model('Transaction', {
     'description': fields.String(description='Description')
 })
 
+def external_id_taken(user_id, external_id, exclude_id=None):
+    """Check whether another transaction already uses this (user_id, external_id) pair"""
+    if external_id is None:
+        return False
+    query = TransactionModel.query.filter_by(user_id=user_id, external_id=external_id)
+    if exclude_id:
+        query = query.filter(TransactionModel.id != exclude_id)
+    return db.session.query(query.exists()).scalar()
+
+
+def serialization_args():
+    """
+    Parse ?fields= and ?expand= for transaction responses.
+
+    With neither parameter the legacy full output is kept, with the category
+    and account nested. With either, only the requested columns (default all)
+    and only the expanded relationships are returned.
+
+    Returns:
+        tuple: (fields, expand), both None for the legacy output.
+
+    Raises:
+        ValueError: If a field or relationship is unknown.
+    """
+    fields = parse_fields(request.args.get('fields'), TransactionModel.SERIALIZED_COLUMNS)
+    expand = parse_expand(request.args.get('expand'), TransactionModel.EXPAND_PATHS)
+    if fields is not None and expand is None:
+        expand = {}
+    return fields, expand
+
+
 @g.api.route('/transaction')
 class Transaction(Resource):
     @g.api.expect(transaction_model)
@@ -61,6 +100,13 @@ class Transaction(Resource):
                 'message': 'Amount must be a valid number'
             }), 400)
 
+        try:
+            external_date = parse_external_date(external_date)
+        except ValueError:
+            return make_response(jsonify({
+                'message': 'external_date must be a valid date'
+            }), 400)
+
         new_transaction = TransactionModel(
             user_id=user_id,
             categories_id=categories_id,
@@ -75,28 +121,99 @@ class Transaction(Resource):
             tags=tags,
             description=description
         )
-        new_transaction.save()
+        try:
+            new_transaction.save()
+        except IntegrityError:
+            db.session.rollback()
+            if not external_id_taken(user_id, external_id):
+                raise
+            return make_response(jsonify({
+                'message': 'A transaction with this external_id already exists'
+            }), 409)
 
         return make_response(jsonify({'message': 'Transaction created successfully'}), 201)
 
     def get(self):
-        # Extract page and per_page from query parameters, default to page 1, 10 items per page
+        """
+        List transactions, newest first.
+
+        Filters (see api/transaction/filters.py) and a whitelisted ?sort= are
+        applied in SQL. Results are scoped to the session user, or to ?user_id=
+        for callers without a session.
+
+        Pass ?cursor= (empty for the first page) to page with an opaque
+        next_cursor instead of page numbers. Cursor pages skip the COUNT unless
+        ?include_total=1 is given. Without a cursor, ?page=&per_page= keep working.
+
+        ?fields= and ?expand= select sparse output, see serialization_args().
+        With PROJECTED_READS set, rows are serialized without building models
+        (see api/transaction/projection.py); the output is the same.
+
+        Responses carry an ETag; a matching If-None-Match gets 304 Not Modified.
+        """
+        user_id = scope_user_id(request.args, session.get('_user_id'))
+        return versioned_list_response('transaction', user_id, lambda: self.build_list(user_id))
+
+    def build_list(self, user_id):
+        """Query and serialize one page of the transaction list"""
+        per_page = request.args.get('per_page', default=DEFAULT_PER_PAGE, type=int)
+        sort = request.args.get('sort') or DEFAULT_SORT
+
+        try:
+            order = keyset_order(sort)
+            fields, expand = serialization_args()
+            query = apply_filters(TransactionModel.query, request.args, user_id)
+        except ValueError as e:
+            return make_response(jsonify({'message': str(e)}), 400)
+        filtered = query
+
+        # Projected reads fetch plain rows instead of building models, see api/transaction/projection.py
+        if current_app.config.get('PROJECTED_READS', False):
+            query, serialize = project(query, fields, expand, parse_sort(sort)[1])
+        else:
+            query = query.options(*eager_relationships(expand))
+            if expand is not None:
+                query = query.options(sparse_columns(fields, expand, parse_sort(sort)[1]))
+            serialize = lambda transactions: [transaction.to_dict(fields, expand) for transaction in transactions]
+
+        if 'cursor' in request.args:
+            per_page = max(1, min(per_page, MAX_PER_PAGE))
+            try:
+                transactions, next_cursor = keyset_page(query, per_page, request.args.get('cursor'), sort)
+            except InvalidCursor as e:
+                return make_response(jsonify({'message': str(e)}), 400)
+
+            pagination_info = {
+                'per_page': per_page,
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
+            }
+            if request.args.get('include_total', default=0, type=int):
+                pagination_info['total'] = count_transactions(filtered, user_id, filter_signature(request.args))
+
+            return make_response(jsonify({
+                'transactions': serialize(transactions),
+                'pagination': pagination_info
+            }), 200)
+
+        # Extract page and per_page from query parameters, default to page 1, 100 items per page
         page = request.args.get('page', default=1, type=int)
-        per_page = request.args.get('per_page', default=100, type=int)
 
-        # Query with pagination
-        transactions_query = TransactionModel.query.paginate(page=page, per_page=per_page, error_out=False)
+        # Query with pagination, in the same stable order as cursor pages. The total comes
+        # from the per-user counter or the filtered-count cache instead of a COUNT per page.
+        transactions_query = query.order_by(*order).paginate(page=page, per_page=per_page, error_out=False, count=False)
+        transactions_query.total = count_transactions(filtered, user_id, filter_signature(request.args))
 
         # Get the items for the current page
         transactions = transactions_query.items
 
         # Convert transactions to dictionaries
-        _transactions = [transaction.to_dict() for transaction in transactions]
+        _transactions = serialize(transactions)
 
         # Metadata for pagination
         pagination_info = {
             'total': transactions_query.total,  # Total number of items
-            'pages': ceil(transactions_query.total / per_page),  # Total number of pages
+            'pages': transactions_query.pages,  # Total number of pages
             'current_page': transactions_query.page,  # Current page number
             'per_page': transactions_query.per_page  # Items per page
         }
@@ -105,6 +222,162 @@ class Transaction(Resource):
         return make_response(jsonify({'transactions': _transactions, 'pagination': pagination_info}), 200)
 
 
+@g.api.route('/transaction/batch')
+class TransactionBatch(Resource):
+    """
+    Create, update or delete many transactions in one request
+
+    Every verb needs a session and only touches the session user's
+    transactions, categories and accounts. Referenced categories and accounts
+    are checked with one query per table, changes are applied with single
+    INSERT/UPDATE/DELETE statements, and the whole batch commits or rolls
+    back as one transaction.
+    """
+
+    def post(self):
+        """Create transactions from {'transactions': [...]}"""
+        user_id = session.get('_user_id')
+        if not user_id:
+            return make_response(jsonify({'message': 'User not authenticated'}), 401)
+
+        data = request.get_json(silent=True) or {}
+        try:
+            rows = parse_new_transactions(data.get('transactions'), user_id)
+            ids = create_transactions(rows)
+            db.session.commit()
+        except InvalidBatch as e:
+            db.session.rollback()
+            return make_response(jsonify({'message': str(e), 'errors': e.errors}), e.status)
+        except IntegrityError:
+            # Lost a race with another writer for the same external_id
+            db.session.rollback()
+            return make_response(jsonify({
+                'message': 'A transaction with this external_id already exists'
+            }), 409)
+
+        return make_response(jsonify({
+            'message': 'Transactions created successfully', 'created': len(ids), 'ids': ids
+        }), 201)
+
+    def patch(self):
+        """Apply {'changes': {...}} to the transactions in {'ids': [...]} or matching {'filter': {...}}"""
+        user_id = session.get('_user_id')
+        if not user_id:
+            return make_response(jsonify({'message': 'User not authenticated'}), 401)
+
+        data = request.get_json(silent=True) or {}
+        try:
+            values = parse_changes(data.get('changes'), user_id)
+            updated = update_transactions(select_transactions(data, user_id), values)
+            db.session.commit()
+        except InvalidBatch as e:
+            db.session.rollback()
+            return make_response(jsonify({'message': str(e), 'errors': e.errors}), e.status)
+
+        return make_response(jsonify({'message': 'Transactions updated successfully', 'updated': updated}), 200)
+
+    def delete(self):
+        """Delete the transactions in {'ids': [...]} or matching {'filter': {...}}"""
+        user_id = session.get('_user_id')
+        if not user_id:
+            return make_response(jsonify({'message': 'User not authenticated'}), 401)
+
+        data = request.get_json(silent=True) or {}
+        try:
+            deleted = delete_transactions(select_transactions(data, user_id))
+            db.session.commit()
+        except InvalidBatch as e:
+            db.session.rollback()
+            return make_response(jsonify({'message': str(e), 'errors': e.errors}), e.status)
+
+        return make_response(jsonify({'message': 'Transactions deleted successfully', 'deleted': deleted}), 200)
+
+
+@g.api.route('/transaction/search')
+class TransactionSearch(Resource):
+    def get(self):
+        """
+        Full-text search over merchant, original_statement and notes
+
+        Every word of ?q= must match, as a prefix, in one of the three columns.
+        Results are ranked best first and paged with an opaque ?cursor=; each
+        carries its 'rank'. Accepts the same filters, user scoping, ?fields=
+        and ?expand= as the list.
+        """
+        q = request.args.get('q', default='')
+        if not search_tokens(q):
+            return make_response(jsonify({'message': 'q must contain at least one word'}), 400)
+
+        user_id = scope_user_id(request.args, session.get('_user_id'))
+        return versioned_list_response('transaction', user_id, lambda: self.build_results(q, user_id))
+
+    def build_results(self, q, user_id):
+        """Query and serialize one page of search results"""
+        per_page = request.args.get('per_page', default=DEFAULT_PER_PAGE, type=int)
+        per_page = max(1, min(per_page, MAX_PER_PAGE))
+
+        try:
+            fields, expand = serialization_args()
+            query = apply_filters(TransactionModel.query, request.args, user_id)
+        except ValueError as e:
+            return make_response(jsonify({'message': str(e)}), 400)
+        query = query.options(*eager_relationships(expand))
+        if expand is not None:
+            query = query.options(sparse_columns(fields, expand))
+
+        dialect = db.session.get_bind().dialect.name
+        try:
+            results, next_cursor = search_page(query, q, dialect, per_page, request.args.get('cursor'))
+        except InvalidCursor as e:
+            return make_response(jsonify({'message': str(e)}), 400)
+
+        return make_response(jsonify({
+            'transactions': [{**transaction.to_dict(fields, expand), 'rank': rank} for transaction, rank in results],
+            'pagination': {
+                'per_page': per_page,
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
+            }
+        }), 200)
+
+
+@g.api.route('/transaction/export')
+class TransactionExport(Resource):
+    def get(self):
+        """
+        Stream transactions as NDJSON or CSV
+
+        Pass ?format=ndjson (default) or ?format=csv. Accepts the same filters,
+        ?sort= and user scoping as the list, plus ?fields= to pick columns.
+        Rows are streamed from a server-side cursor, so memory use does not
+        grow with the size of the export.
+        """
+        export_format = request.args.get('format', default='ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return make_response(jsonify({
+                'message': f"format must be one of: {', '.join(EXPORT_FORMATS)}"
+            }), 400)
+
+        user_id = scope_user_id(request.args, session.get('_user_id'))
+        try:
+            order = keyset_order(request.args.get('sort') or DEFAULT_SORT)
+            fields = parse_fields(request.args.get('fields'), TransactionModel.SERIALIZED_COLUMNS)
+            query = apply_filters(TransactionModel.query, request.args, user_id)
+        except ValueError as e:
+            return make_response(jsonify({'message': str(e)}), 400)
+
+        columns = [name for name in TransactionModel.SERIALIZED_COLUMNS if fields is None or name in fields]
+        batch_size = current_app.config.get('EXPORT_BATCH_SIZE', DEFAULT_EXPORT_BATCH_SIZE)
+        rows = export_rows(query.order_by(*order), columns, batch_size)
+        body = ndjson_lines(rows, columns) if export_format == 'ndjson' else csv_chunks(rows, columns, batch_size)
+
+        return Response(
+            stream_with_context(body),
+            mimetype=EXPORT_FORMATS[export_format],
+            headers={'Content-Disposition': f'attachment; filename=transactions.{export_format}'}
+        )
+
+
 @g.api.route('/transaction/csv_import')
 class TransactionCSVImport(Resource):
     """
@@ -112,6 +385,15 @@ class TransactionCSVImport(Resource):
 
     Expected CSV format:
     Date,Merchant,Category,Account,Original Statement,Notes,Amount,Tags
+
+    Pass ?async=1 to queue the import as a background job. The response is
+    202 with a job id that can be polled at /transaction/csv_import/<job_id>.
+    The import page does. Synchronous stays the default because API clients
+    and the dashboard upload read the 201 response with the import results,
+    which a 202 would silently break.
+
+    Pass ?dry_run=1 to validate the file and report how many rows would be
+    created, skipped or rejected without writing anything.
     """
 
     def post(self):
@@ -131,275 +413,61 @@ class TransactionCSVImport(Resource):
         if not file.filename.endswith('.csv'):
             return make_response(jsonify({'message': 'File must be a CSV'}), 400)
 
-        try:
-            upload_folder = Config.UPLOAD_FOLDER
-            filename = secure_filename(file.filename)
-            file_path = os.path.join(upload_folder, filename)
-            file.save(file_path)
+        dry_run = bool(request.args.get('dry_run', default=0, type=int))
 
-            created_count = 0
-            skipped_count = 0
-            error_count = 0
-            errors = []
+        if request.args.get('async', default=0, type=int) and not dry_run:
+            job = submit_import_job(file, user_id)
+            return make_response(jsonify({
+                'message': 'Import queued',
+                'job_id': job.id,
+                'status_url': f'/api/transaction/csv_import/{job.id}'
+            }), 202)
 
-            with open(file_path, newline='', encoding='utf-8') as csvfile:
+        try:
+            # Parse the upload incrementally from the request stream
+            with open_csv_stream(file) as csvfile:
                 csvreader = csv.DictReader(csvfile)
 
                 # Validate required headers
-                required_headers = ['Date', 'Merchant', 'Category', 'Account', 'Amount']
-                if not all(header in csvreader.fieldnames for header in required_headers):
-                    os.remove(file_path)
+                if not all(header in (csvreader.fieldnames or []) for header in REQUIRED_HEADERS):
                     return make_response(jsonify({
-                        'message': f'CSV must have headers: {", ".join(required_headers)}'
+                        'message': f'CSV must have headers: {", ".join(REQUIRED_HEADERS)}'
                     }), 400)
 
-                for row_num, row in enumerate(csvreader, start=2):  # Start at 2 (after header)
-                    try:
-                        # Get required fields
-                        date_str = row.get('Date', '').strip()
-                        merchant = row.get('Merchant', '').strip()
-                        category_name = row.get('Category', '').strip()
-                        account_name = row.get('Account', '').strip()
-                        amount_str = row.get('Amount', '').strip()
-
-                        # Get optional fields
-                        original_statement = row.get('Original Statement', '').strip()
-                        notes = row.get('Notes', '').strip()
-                        tags = row.get('Tags', '').strip()
-
-                        # Skip empty rows
-                        if not all([date_str, merchant, category_name, account_name, amount_str]):
-                            skipped_count += 1
-                            continue
-
-                        # Parse date
-                        try:
-                            # Try multiple date formats
-                            for date_format in ["%m/%d/%Y", "%Y-%m-%d", "%m-%d-%Y", "%d/%m/%Y"]:
-                                try:
-                                    dt_object = datetime.strptime(date_str, date_format)
-                                    break
-                                except ValueError:
-                                    continue
-                            else:
-                                raise ValueError(f"Unable to parse date: {date_str}")
-
-                            formatted_timestamp = dt_object.strftime("%Y-%m-%d %H:%M:%S")
-                        except ValueError as e:
-                            errors.append(f"Row {row_num}: {str(e)}")
-                            error_count += 1
-                            continue
-
-                        # Parse amount
-                        try:
-                            _amount = clean_dollar_value(amount_str)
-                        except:
-                            errors.append(f"Row {row_num}: Invalid amount '{amount_str}'")
-                            error_count += 1
-                            continue
-
-                        _transaction_type = positive_or_negative(_amount)
-
-                        # Create unique external ID from date + merchant + amount
-                        external_id = f"{date_str}-{merchant}-{amount_str}".replace('/', '-').replace(' ', '-')
-
-                        # Check if transaction already exists
-                        if self.check_transaction_by_external_id(external_id):
-                            skipped_count += 1
-                            continue
-
-                        # Ensure category exists
-                        category_id = self.ensure_category_exists(category_name)
-                        if not category_id:
-                            errors.append(f"Row {row_num}: Category '{category_name}' not found")
-                            error_count += 1
-                            continue
-
-                        # Ensure account exists (create if needed with merchant as institution)
-                        account_id = self.ensure_account_exists_smart(account_name, merchant)
-                        if not account_id:
-                            errors.append(f"Row {row_num}: Could not create account '{account_name}'")
-                            error_count += 1
-                            continue
-
-                        # Store fields separately (no joining)
-                        # Description can be used for additional custom info if needed
-                        description = None  # Keep empty unless specifically provided
-
-                        # Create transaction with all fields separate
-                        self.create_transaction(
-                            user_id=user_id,
-                            categories_id=category_id,
-                            account_id=account_id,
-                            amount=_amount,
-                            transaction_type=_transaction_type,
-                            external_id=external_id,
-                            external_date=formatted_timestamp,
-                            merchant=merchant,
-                            original_statement=original_statement,
-                            notes=notes,
-                            tags=tags,
-                            description=description
-                        )
-                        created_count += 1
-
-                    except Exception as e:
-                        errors.append(f"Row {row_num}: {str(e)}")
-                        error_count += 1
-                        continue
-
-            # Clean up uploaded file
-            os.remove(file_path)
-
-            response_data = {
-                'message': 'Import completed',
-                'transactions_created': created_count,
-                'transactions_skipped': skipped_count,
-                'errors': error_count
-            }
+                importer = TransactionImporter(user_id, dry_run=dry_run)
+                importer.import_rows(csvreader)
 
-            if errors:
-                # Show first 50 errors to understand patterns
-                response_data['error_details'] = errors[:50]
-                # Also include a summary of error types
-                error_summary = {}
-                for error in errors:
-                    # Extract error type
-                    if "Category" in error and "not found" in error:
-                        error_summary['category_not_found'] = error_summary.get('category_not_found', 0) + 1
-                    elif "Could not create account" in error:
-                        error_summary['account_creation_failed'] = error_summary.get('account_creation_failed', 0) + 1
-                    elif "Could not parse" in error:
-                        error_summary['date_parse_error'] = error_summary.get('date_parse_error', 0) + 1
-                    elif "Invalid amount" in error:
-                        error_summary['invalid_amount'] = error_summary.get('invalid_amount', 0) + 1
-                    else:
-                        error_summary['other'] = error_summary.get('other', 0) + 1
-                response_data['error_summary'] = error_summary
-
-            return make_response(jsonify(response_data), 201 if created_count > 0 else 200)
+            return make_response(jsonify(importer.results()), 201 if importer.created_count > 0 and not dry_run else 200)
 
         except Exception as e:
-            if os.path.exists(file_path):
-                os.remove(file_path)
             return make_response(jsonify({'message': f'Error processing CSV: {str(e)}'}), 500)
 
-    def check_transaction_by_external_id(self,external_id):
-        user_id = session.get('_user_id')
-        transaction = TransactionModel.query.filter_by(external_id=external_id, user_id=user_id).first()
-        return transaction is not None
 
-    def ensure_category_exists(self, category_name):
-        """Find category by name, return ID or None if not found"""
-        user_id = session.get('_user_id')
-        category = CategoriesModel.query.filter_by(name=category_name, user_id=user_id).first()
-        if category:
-            return category.id
-        return None
+@g.api.route('/transaction/csv_import/<string:job_id>')
+class TransactionCSVImportJob(Resource):
+    def get(self, job_id):
+        """Get the progress of a background CSV import"""
+        job = ImportJobModel.query.filter_by(id=job_id, user_id=session.get('_user_id')).first()
+        if not job:
+            return make_response(jsonify({'message': 'Import job not found'}), 404)
 
-    def ensure_institution_exists(self,institution_name):
-        user_id = session.get('_user_id')
-        institution = InstitutionModel.query.filter_by(name=institution_name,user_id=user_id).first()
-        if not institution:
-            print(f"InstitutionModel '{institution_name}' does not exist. Creating...")
-            institution = InstitutionModel(name=institution_name,user_id=user_id,location="Unknown",description="Unknown")
-            db.session.add(institution)
-            db.session.commit()
-        return institution.id
-
-    def ensure_account_exists(self, account_name, institution_id):
-        """Legacy method for backward compatibility"""
-        user_id = session.get('_user_id')
-        account = InstitutionAccountModel.query.filter_by(name=account_name, user_id=user_id).first()
-        if not account:
-            account = InstitutionAccountModel(
-                name=account_name,
-                institution_id=institution_id,
-                user_id=user_id,
-                number="Unknown",
-                status='active',
-                balance=0,
-                starting_balance=0,
-                account_type='other',
-                account_class='asset'
-            )
-            db.session.add(account)
-            db.session.commit()
-        return account.id
-
-    def ensure_account_exists_smart(self, account_name, merchant_name):
-        """
-        Find or create account with smart institution handling
-        Uses merchant name as institution if institution doesn't exist
-        """
-        user_id = session.get('_user_id')
-
-        # Check if account exists
-        account = InstitutionAccountModel.query.filter_by(name=account_name, user_id=user_id).first()
-        if account:
-            return account.id
-
-        # Account doesn't exist, create it with institution
-        # Use merchant as institution name
-        institution = InstitutionModel.query.filter_by(name=merchant_name, user_id=user_id).first()
-        if not institution:
-            # Create institution with merchant name
-            institution = InstitutionModel(
-                user_id=user_id,
-                name=merchant_name,
-                location="Auto-created",
-                description=f"Auto-created from transaction import for {account_name}"
-            )
-            db.session.add(institution)
-            db.session.commit()
-
-        # Create account
-        account = InstitutionAccountModel(
-            name=account_name,
-            institution_id=institution.id,
-            user_id=user_id,
-            number="Auto-imported",
-            status='active',
-            balance=0,
-            starting_balance=0,
-            account_type='checking',
-            account_class='asset'
-        )
-        db.session.add(account)
-        db.session.commit()
-
-        return account.id
-
-    def create_transaction(self,user_id, categories_id, account_id, amount, transaction_type, external_id, external_date, merchant=None, original_statement=None, notes=None, tags=None, description=None):
-        print(f"Creating transaction {external_id}...")
-        transaction = TransactionModel(
-            user_id=user_id,
-            categories_id=categories_id,
-            account_id=account_id,
-            amount=amount,
-            transaction_type=transaction_type,
-            external_id=external_id,
-            external_date=external_date,
-            merchant=merchant,
-            original_statement=original_statement,
-            notes=notes,
-            tags=tags,
-            description=description
-        )
-        db.session.add(transaction)
-        db.session.commit()
-        print(f"Transaction {external_id} created successfully.")
+        return make_response(jsonify({'job': job.to_dict()}), 200)
 
 
 @g.api.route('/transaction/<string:id>')
 class TransactionDetail(Resource):
     def get(self, id):
-        """Get a single transaction by ID"""
-        transaction = TransactionModel.query.get(id)
+        """Get a single transaction by ID, honouring ?fields= and ?expand="""
+        try:
+            fields, expand = serialization_args()
+        except ValueError as e:
+            return make_response(jsonify({'message': str(e)}), 400)
+
+        transaction = db.session.get(TransactionModel, id, options=eager_relationships(expand))
         if not transaction:
             return make_response(jsonify({'message': 'Transaction not found'}), 404)
 
-        return make_response(jsonify({'transaction': transaction.to_dict()}), 200)
+        return make_response(jsonify({'transaction': transaction.to_dict(fields, expand)}), 200)
 
     @g.api.expect(transaction_model)
     def put(self, id):
@@ -419,6 +487,14 @@ class TransactionDetail(Resource):
                     'message': 'Amount must be a valid number'
                 }), 400)
 
+        if 'external_date' in data:
+            try:
+                external_date = parse_external_date(data['external_date'])
+            except ValueError:
+                return make_response(jsonify({
+                    'message': 'external_date must be a valid date'
+                }), 400)
+
         # Validate foreign keys if provided
         if 'categories_id' in data:
             category = CategoriesModel.query.get(data['categories_id'])
@@ -454,11 +530,19 @@ class TransactionDetail(Resource):
         if 'transaction_type' in data:
             transaction.transaction_type = data['transaction_type']
         if 'external_date' in data:
-            transaction.external_date = data['external_date']
+            transaction.external_date = external_date
         if 'external_id' in data:
             transaction.external_id = data['external_id']
 
-        transaction.save()
+        try:
+            transaction.save()
+        except IntegrityError:
+            db.session.rollback()
+            if not external_id_taken(transaction.user_id, data.get('external_id'), exclude_id=id):
+                raise
+            return make_response(jsonify({
+                'message': 'A transaction with this external_id already exists'
+            }), 409)
 
         return make_response(jsonify({'message': 'Transaction updated successfully', 'transaction': transaction.to_dict()}), 200)
 
@@ -0,0 +1,217 @@
+import threading
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy import event, func, literal, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from api.transaction.models import TransactionModel
+from api.transaction_count.models import TransactionCountModel
+from api.data_version.models import DataVersionModel
+
+DEFAULT_COUNT_CACHE_SIZE = 1024
+
+_count_cache = OrderedDict()
+_count_cache_lock = threading.Lock()
+# Filters matched through the category, whose cached counts also depend on the categories
+CATEGORY_FILTERS = ('categories_group_id', 'categories_type_id')
+
+
+def _create_counter(connection, user_id, delta):
+    """
+    Create a user's counter row from COUNT(*) in one INSERT ... SELECT.
+
+    Called by a write that found no counter row, after the write, so the
+    count includes it. The count and the insert are one statement, so no
+    other write can land between them; a row another writer created in the
+    meantime gets this write's delta added instead, after waiting for that
+    insert to commit.
+
+    Args:
+        connection (Connection | Session): Where the write is happening.
+        user_id (str): The user whose transactions changed.
+        delta (int): The write's change, added when the row already exists.
+    """
+    table = TransactionCountModel.__table__
+    counted = (
+        select(literal(user_id, table.c.user_id.type), func.count(), literal(1))
+        .select_from(TransactionModel.__table__)
+        .where(TransactionModel.user_id == user_id)
+    )
+    columns = ['user_id', 'total', 'version']
+
+    dialect = (connection if isinstance(connection, Connection) else connection.get_bind()).dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        statement = insert(table).from_select(columns, counted).on_conflict_do_update(
+            index_elements=['user_id'],
+            set_={'total': table.c.total + delta, 'version': table.c.version + 1}
+        )
+    else:
+        statement = table.insert().from_select(columns, counted)
+    connection.execute(statement)
+
+
+def adjust_transaction_count(connection, user_id, delta):
+    """
+    Add delta to a user's transaction count and bump the versions.
+
+    Both the counter version and the user's 'transaction' data version (which
+    drives list ETags, see api/data_version) are incremented.
+
+    Runs on the caller's connection so it commits or rolls back together with
+    the write it accounts for, and must run after that write. ORM inserts,
+    updates and deletes call it through the mapper events below; Core and bulk
+    statements (the CSV importer, bulk Query.delete()) must call it themselves.
+    The first write for a user without a counter row creates it from a
+    COUNT(*) that includes the write, see _create_counter().
+
+    Args:
+        connection (Connection | Session): Where the write is happening.
+        user_id (str): The user whose transactions changed.
+        delta (int): Rows inserted minus rows deleted; 0 for updates.
+    """
+    table = TransactionCountModel.__table__
+    result = connection.execute(
+        update(table)
+        .where(table.c.user_id == user_id)
+        .values(total=table.c.total + delta, version=table.c.version + 1)
+    )
+    if not result.rowcount:
+        _create_counter(connection, user_id, delta)
+    DataVersionModel.bump(connection, user_id, 'transaction')
+
+
+def get_transaction_counter(user_id):
+    """
+    Read a user's (total, version) without writing.
+
+    Counter rows are only created by writes (see adjust_transaction_count()),
+    so a user without one, including an ID that belongs to nobody, is counted
+    with COUNT(*) at version 0. The first write creates the row at version 1,
+    which invalidates counts cached under version 0.
+
+    Args:
+        user_id (str): The user.
+
+    Returns:
+        tuple: (total, version).
+    """
+    table = TransactionCountModel.__table__
+    row = db.session.execute(select(table.c.total, table.c.version).where(table.c.user_id == user_id)).first()
+    if row is not None:
+        return row.total, row.version
+
+    total = db.session.execute(
+        select(func.count()).select_from(TransactionModel.__table__).where(TransactionModel.user_id == user_id)
+    ).scalar()
+    return total, 0
+
+
+def verify_transaction_counts(user_id=None):
+    """
+    Compare stored transaction counts against COUNT(*), without changing them.
+
+    Args:
+        user_id (str): Only check this user's counter.
+
+    Returns:
+        list: {'user_id', 'stored', 'expected'} for every counter that drifted.
+    """
+    table = TransactionCountModel.__table__
+    transaction = TransactionModel.__table__
+    expected = (
+        select(func.count())
+        .where(transaction.c.user_id == table.c.user_id)
+        .scalar_subquery()
+    )
+    query = select(table.c.user_id, table.c.total, expected.label('expected')).order_by(table.c.user_id)
+    if user_id is not None:
+        query = query.where(table.c.user_id == user_id)
+
+    return [
+        {'user_id': row.user_id, 'stored': row.total, 'expected': row.expected}
+        for row in db.session.execute(query)
+        if row.total != row.expected
+    ]
+
+
+def recount_transactions(user_ids):
+    """
+    Reset counters to COUNT(*) and bump their versions, which drops the cached filtered counts.
+
+    Args:
+        user_ids (list): The users whose counters to reset.
+    """
+    table = TransactionCountModel.__table__
+    transaction = TransactionModel.__table__
+    for user_id in user_ids:
+        db.session.execute(
+            update(table)
+            .where(table.c.user_id == user_id)
+            .values(
+                total=select(func.count()).where(transaction.c.user_id == user_id).scalar_subquery(),
+                version=table.c.version + 1
+            )
+        )
+        DataVersionModel.bump(db.session, user_id, 'transaction')
+
+
+def count_transactions(query, user_id, signature):
+    """
+    Count the rows of a filtered transaction list without scanning when possible.
+
+    Unfiltered per-user counts come straight from the counter table. Filtered
+    per-user counts are cached in-process under (user_id, signature, version),
+    so any write to the user's transactions invalidates them. Filters matched
+    through the category (CATEGORY_FILTERS) also key on the user's categories
+    data version, since moving a category to another group or type changes
+    them without touching a transaction. Lists that are not scoped to a user
+    fall back to COUNT(*).
+
+    Args:
+        query (Query): The filtered TransactionModel query.
+        user_id (str): The user the list is scoped to, or None.
+        signature (tuple): The filters applied, see filters.filter_signature().
+
+    Returns:
+        int: The number of matching rows.
+    """
+    if not user_id:
+        return query.order_by(None).count()
+
+    total, version = get_transaction_counter(user_id)
+    if not signature:
+        return total
+
+    size = current_app.config.get('TRANSACTION_COUNT_CACHE_SIZE', DEFAULT_COUNT_CACHE_SIZE)
+    key = (user_id, signature, version)
+    if any(name in CATEGORY_FILTERS for name, _ in signature):
+        key += DataVersionModel.fingerprint(('categories',), user_id)
+    with _count_cache_lock:
+        if key in _count_cache:
+            _count_cache.move_to_end(key)
+            return _count_cache[key]
+
+    total = query.order_by(None).count()
+    if size:
+        with _count_cache_lock:
+            _count_cache[key] = total
+            while len(_count_cache) > size:
+                _count_cache.popitem(last=False)
+    return total
+
+
+@event.listens_for(TransactionModel, 'after_insert')
+def _count_insert(mapper, connection, target):
+    adjust_transaction_count(connection, target.user_id, 1)
+
+
+@event.listens_for(TransactionModel, 'after_delete')
+def _count_delete(mapper, connection, target):
+    adjust_transaction_count(connection, target.user_id, -1)
+
+
+@event.listens_for(TransactionModel, 'after_update')
+def _count_update(mapper, connection, target):
+    adjust_transaction_count(connection, target.user_id, 0)
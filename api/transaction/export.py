@@ -0,0 +1,79 @@
+import io
+import csv
+import json
+from datetime import datetime
+from api.transaction.models import TransactionModel
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+DEFAULT_EXPORT_BATCH_SIZE = 1000
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def export_rows(query, columns, batch_size=DEFAULT_EXPORT_BATCH_SIZE):
+    """
+    Stream a transaction query as plain tuples.
+
+    Only the exported columns are selected, and yield_per() makes the driver
+    use a server-side cursor where it can (psycopg2 named cursors), so at most
+    one batch of rows is held in memory however long the history is.
+
+    Args:
+        query (Query): A filtered and ordered TransactionModel query.
+        columns (list): Column names to export.
+        batch_size (int): Rows fetched per round trip.
+
+    Yields:
+        Row: One tuple per transaction, in column order.
+    """
+    entities = [getattr(TransactionModel, name) for name in columns]
+    yield from query.with_entities(*entities).yield_per(batch_size)
+
+
+def ndjson_lines(rows, columns):
+    """
+    Render rows as newline-delimited JSON, one object per line.
+
+    Args:
+        rows (iterable): Tuples from export_rows().
+        columns (list): Column names, used as keys.
+
+    Yields:
+        str: One JSON document per row, newline terminated.
+    """
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), default=_json_default) + '\n'
+
+
+def csv_chunks(rows, columns, batch_size=DEFAULT_EXPORT_BATCH_SIZE):
+    """
+    Render rows as CSV with a header line.
+
+    Rows are written into a small buffer and emitted a batch at a time, so the
+    response is not split into one network write per row.
+
+    Args:
+        rows (iterable): Tuples from export_rows().
+        columns (list): Column names, used as the header.
+        batch_size (int): Rows per emitted chunk.
+
+    Yields:
+        str: CSV text.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(['' if value is None else value.isoformat() if isinstance(value, datetime) else value for value in row])
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,192 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from api.transaction.models import TransactionModel
+from api.categories.models import CategoriesModel
+
+# Columns the list may be sorted by; prefix with '-' for descending
+SORT_FIELDS = {
+    'external_date': TransactionModel.external_date,
+    'amount': TransactionModel.amount,
+    'merchant': TransactionModel.merchant,
+    'created_at': TransactionModel.created_at
+}
+DEFAULT_SORT = '-external_date'
+
+# Query parameters read by apply_filters()
+FILTER_PARAMS = (
+    'date_from', 'date_to', 'account_id', 'categories_id', 'categories_group_id', 'categories_type_id',
+    'amount_min', 'amount_max', 'transaction_type', 'merchant', 'tags'
+)
+
+
+class InvalidFilter(ValueError):
+    """Raised when a filter or sort query parameter cannot be applied"""
+
+
+def parse_sort(sort):
+    """
+    Validate a sort parameter against SORT_FIELDS.
+
+    Args:
+        sort (str): e.g. 'amount' or '-external_date', or None for DEFAULT_SORT.
+
+    Returns:
+        tuple: (normalized sort string, column, descending).
+
+    Raises:
+        InvalidFilter: If the field is not whitelisted.
+    """
+    sort = sort or DEFAULT_SORT
+    descending = sort.startswith('-')
+    field = sort.lstrip('-')
+    if field not in SORT_FIELDS:
+        raise InvalidFilter(f"Cannot sort by '{field}', expected one of: {', '.join(sorted(SORT_FIELDS))}")
+    return ('-' if descending else '') + field, SORT_FIELDS[field], descending
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise InvalidFilter(f"{name} must be a date in YYYY-MM-DD format")
+
+
+def parse_date_range(args):
+    """
+    Parse the date_from/date_to filters into a half-open range.
+
+    Args:
+        args (MultiDict): The request query parameters.
+
+    Returns:
+        tuple: (start, end) datetimes with end exclusive, either None when not given.
+
+    Raises:
+        InvalidFilter: If a date is not in YYYY-MM-DD format.
+    """
+    start = _parse_date(args['date_from'], 'date_from') if args.get('date_from') else None
+    end = _parse_date(args['date_to'], 'date_to') + timedelta(days=1) if args.get('date_to') else None
+    return start, end
+
+
+def _parse_amount(value, name):
+    try:
+        return float(value)
+    except ValueError:
+        raise InvalidFilter(f"{name} must be a number")
+
+
+def _split(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def filter_signature(args):
+    """
+    Reduce the filter parameters of a request to a hashable key.
+
+    Paging, sorting and serialization parameters are ignored, so every page of
+    the same filtered list shares one signature.
+
+    Args:
+        args (MultiDict): The request query parameters.
+
+    Returns:
+        tuple: (name, value) pairs for the filters that are set, empty when unfiltered.
+    """
+    return tuple((name, args[name]) for name in FILTER_PARAMS if args.get(name))
+
+
+def scope_user_id(args, session_user_id):
+    """
+    Work out whose transactions a request may see.
+
+    The session user wins. Without a session, an explicit ?user_id= is honoured
+    so server-side pages that call the API without cookies can still scope
+    their requests. Otherwise the list stays global, as it always was.
+
+    Args:
+        args (MultiDict): The request query parameters.
+        session_user_id (str): The logged-in user, if any.
+
+    Returns:
+        str: The user ID to filter on, or None for no user filter.
+    """
+    return session_user_id or args.get('user_id') or None
+
+
+def apply_reference_filters(query, args, account_id, categories_id):
+    """
+    Apply the account and category filters to any table that carries both IDs.
+
+    Args:
+        query (Query): The query to filter.
+        args (MultiDict): The request query parameters.
+        account_id (ColumnElement): The account ID column to filter on.
+        categories_id (ColumnElement): The category ID column to filter on.
+
+    Returns:
+        Query: The filtered query.
+    """
+    if args.get('account_id'):
+        query = query.filter(account_id.in_(_split(args['account_id'])))
+    if args.get('categories_id'):
+        query = query.filter(categories_id.in_(_split(args['categories_id'])))
+
+    # Group and type live on the category; filter through a subquery so no join is needed
+    category_conditions = []
+    if args.get('categories_group_id'):
+        category_conditions.append(CategoriesModel.categories_group_id.in_(_split(args['categories_group_id'])))
+    if args.get('categories_type_id'):
+        category_conditions.append(CategoriesModel.categories_type_id.in_(_split(args['categories_type_id'])))
+    if category_conditions:
+        query = query.filter(categories_id.in_(select(CategoriesModel.id).where(*category_conditions)))
+    return query
+
+
+def apply_filters(query, args, user_id=None):
+    """
+    Push the transaction list filters from the query string into SQL.
+
+    Supported parameters:
+        date_from, date_to: Inclusive YYYY-MM-DD bounds on external_date.
+        account_id, categories_id: One ID or a comma-separated list.
+        categories_group_id, categories_type_id: Match through the transaction's category.
+        amount_min, amount_max: Inclusive bounds on amount.
+        transaction_type: Exact match, e.g. Withdrawal.
+        merchant, tags: Case-insensitive substring match.
+
+    Args:
+        query (Query): A TransactionModel query.
+        args (MultiDict): The request query parameters.
+        user_id (str): Restrict to this user's transactions, see scope_user_id().
+
+    Returns:
+        Query: The filtered query.
+
+    Raises:
+        InvalidFilter: If a parameter cannot be parsed.
+    """
+    if user_id:
+        query = query.filter(TransactionModel.user_id == user_id)
+
+    start, end = parse_date_range(args)
+    if start is not None:
+        query = query.filter(TransactionModel.external_date >= start)
+    if end is not None:
+        query = query.filter(TransactionModel.external_date < end)
+
+    query = apply_reference_filters(query, args, TransactionModel.account_id, TransactionModel.categories_id)
+
+    if args.get('amount_min'):
+        query = query.filter(TransactionModel.amount >= _parse_amount(args['amount_min'], 'amount_min'))
+    if args.get('amount_max'):
+        query = query.filter(TransactionModel.amount <= _parse_amount(args['amount_max'], 'amount_max'))
+
+    if args.get('transaction_type'):
+        query = query.filter(TransactionModel.transaction_type == args['transaction_type'])
+    if args.get('merchant'):
+        query = query.filter(TransactionModel.merchant.icontains(args['merchant'], autoescape=True))
+    if args.get('tags'):
+        query = query.filter(TransactionModel.tags.icontains(args['tags'], autoescape=True))
+
+    return query
@@ -0,0 +1,823 @@
+import io
+import os
+import csv
+import json
+import time
+import uuid
+import glob
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from itertools import chain, islice
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError, DBAPIError
+from app import db
+from api.transaction.models import TransactionModel
+from api.categories.models import CategoriesModel
+from api.institution_account.models import InstitutionAccountModel
+from api.institution.models import InstitutionModel
+from api.base.models import database_now
+from api.import_job.models import ImportJobModel
+from api.transaction.counts import adjust_transaction_count
+from api.institution_account.balances import adjust_balances, balance_deltas
+from api.transaction.rollups import add_to_rollups
+from api.helpers import StageTimer
+from api.transaction.parsing import (
+    DateParser, DATE_SNIFF_ROWS, parse_row, find_record_end, split_csv_ranges, parse_csv_range
+)
+
+REQUIRED_HEADERS = ['Date', 'Merchant', 'Category', 'Account', 'Amount']
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_IMPORT_WORKERS = 2
+DEFAULT_PARALLEL_CHUNK_BYTES = 8 * 1024 * 1024
+DEFAULT_PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+DEFAULT_PARALLEL_WORKERS = os.cpu_count() or 1
+# A running job whose row has not been touched for this long lost its worker
+DEFAULT_IMPORT_STALE_SECONDS = 300
+SPOOL_PATTERN = 'import-*.csv'
+
+# Columns written through the PostgreSQL COPY fast path
+COPY_COLUMNS = [
+    'id', 'user_id', 'categories_id', 'account_id', 'amount', 'transaction_type', 'external_id',
+    'external_date', 'merchant', 'original_statement', 'notes', 'tags', 'description'
+]
+COPY_STAGE_TABLE = 'transaction_import_stage'
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _copy_field(value):
+    """
+    Format one value for COPY in CSV format.
+
+    NULL is the only unquoted field, and an empty one, which is COPY's CSV
+    default; every other value is quoted, so empty strings and text that
+    looks like a NULL marker (e.g. \\N) load as themselves.
+    """
+    if value is None:
+        return ''
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+class TransactionImporter:
+    """
+    Import transactions from a parsed CSV for a single user.
+
+    Validated rows are buffered and written in chunks with one multi-row
+    INSERT and one commit per chunk. Duplicates are resolved by the database
+    against the unique (user_id, external_id) index with ON CONFLICT DO NOTHING,
+    and rows the INSERT did not affect are counted as skipped. If a chunk fails,
+    it is rolled back and replayed row by row so errors are still reported per row.
+
+    Attributes:
+        user_id (str): The ID of the user the transactions are imported for.
+        chunk_size (int): The number of rows written per INSERT/commit.
+        bytes_processed (int): How far import_file has got through the file.
+        rows_parsed (int): The number of CSV rows read so far.
+        created_count (int): The number of transactions created.
+        skipped_count (int): The number of rows skipped (empty or duplicate).
+        error_count (int): The number of rows rejected.
+        errors (list): Per-row error messages.
+        category_ids (dict): Category name -> ID for the user, loaded once per import.
+        account_ids (dict): Account name -> ID for the user, loaded once per import.
+        institution_ids (dict): Institution name -> ID for the user, loaded once per import.
+        dry_run (bool): Validate and count without writing anything.
+        timer (StageTimer): Wall-clock time and rows per stage (read, parse, dedup,
+            lookup, insert, commit), returned as the `timings` block of results().
+        chunks_written (int): The number of chunks flushed so far.
+    """
+
+    def __init__(self, user_id, chunk_size=None, on_flush=None, use_copy=None, dry_run=False):
+        """
+        Initialize a TransactionImporter instance.
+
+        Args:
+            user_id (str): The ID of the user the transactions are imported for.
+            chunk_size (int): Rows per chunk, defaults to IMPORT_CHUNK_SIZE from the app config.
+            on_flush (callable): Called with the importer after every committed chunk.
+            use_copy (bool): Use COPY on psycopg2 connections, defaults to IMPORT_USE_COPY from the app config.
+            dry_run (bool): Run the full parse and lookup pipeline against in-memory
+                snapshots of the user's data and report what would happen, without writing.
+        """
+        self.user_id = user_id
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size or current_app.config.get('IMPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+        self.use_copy = current_app.config.get('IMPORT_USE_COPY', True) if use_copy is None else use_copy
+        self.on_flush = on_flush
+        self.date_parser = DateParser()
+        self.bytes_processed = 0
+        self.rows_parsed = 0
+        self.created_count = 0
+        self.skipped_count = 0
+        self.error_count = 0
+        self.errors = []
+        self.timer = StageTimer()
+        self.chunks_written = 0
+        self._pending = []
+        self._pending_external_ids = set()
+        started = time.perf_counter()
+        self.load_lookups()
+        if dry_run:
+            self.load_external_ids()
+        self.timer.add('lookup', time.perf_counter() - started)
+
+    def load_lookups(self):
+        """
+        Load the user's categories, accounts and institutions into name -> ID maps.
+
+        Only the name and id columns are selected. When names repeat, the first
+        row wins, matching the previous filter_by(...).first() lookups.
+        """
+        self.category_ids = {}
+        for name, _id in db.session.query(CategoriesModel.name, CategoriesModel.id).filter_by(user_id=self.user_id):
+            self.category_ids.setdefault(name, _id)
+
+        self.account_ids = {}
+        for name, _id in db.session.query(InstitutionAccountModel.name, InstitutionAccountModel.id).filter_by(user_id=self.user_id):
+            self.account_ids.setdefault(name, _id)
+
+        self.institution_ids = {}
+        for name, _id in db.session.query(InstitutionModel.name, InstitutionModel.id).filter_by(user_id=self.user_id):
+            self.institution_ids.setdefault(name, _id)
+
+    def load_external_ids(self):
+        """
+        Snapshot the user's stored external IDs so a dry run can count duplicates in memory.
+        """
+        query = db.session.query(TransactionModel.external_id).filter_by(user_id=self.user_id)
+        self.stored_external_ids = {external_id for external_id, in query}
+
+    def import_rows(self, csvreader):
+        """
+        Validate every row from a csv.DictReader and write them in chunks.
+
+        Args:
+            csvreader (csv.DictReader): Reader positioned after the header row.
+        """
+        # Reading covers pulling bytes from the upload and decoding the CSV
+        reader = self.timer.timed(csvreader, 'read')
+
+        # Detect the date layout from the first rows, then replay them
+        head = list(islice(reader, DATE_SNIFF_ROWS))
+        started = time.perf_counter()
+        self.date_parser.sniff([(row.get('Date') or '').strip() for row in head])
+        self.timer.add('parse', time.perf_counter() - started)
+
+        for row_num, row in enumerate(chain(head, reader), start=2):  # Start at 2 (after header)
+            self.rows_parsed += 1
+            try:
+                self.process_row(row_num, row)
+            except Exception as e:
+                self.add_error(row_num, str(e))
+                continue
+
+            if len(self._pending) >= self.chunk_size:
+                self.flush()
+
+        self.flush()
+
+    def import_file(self, path, workers, chunk_bytes=None):
+        """
+        Parse a CSV file in parallel worker processes and write the results in order.
+
+        The file is split into byte ranges aligned on record boundaries. Each range
+        is parsed and validated by parse_csv_range in a ProcessPoolExecutor, while
+        this process consumes the results in file order and does all database work,
+        so row numbers in error messages match a sequential import. The 'parse'
+        stage is the time spent waiting on the workers.
+
+        Args:
+            path (str): The CSV file.
+            workers (int): How many parser processes to start.
+            chunk_bytes (int): The approximate size of each range, defaults to IMPORT_PARALLEL_CHUNK_BYTES.
+        """
+        chunk_bytes = chunk_bytes or current_app.config.get('IMPORT_PARALLEL_CHUNK_BYTES', DEFAULT_PARALLEL_CHUNK_BYTES)
+
+        started = time.perf_counter()
+        with open(path, 'rb') as f:
+            data_start = find_record_end(f, 0)
+        with open(path, newline='', encoding='utf-8') as csvfile:
+            csvreader = csv.DictReader(csvfile)
+            fieldnames = csvreader.fieldnames
+            head = list(islice(csvreader, DATE_SNIFF_ROWS))
+        date_format = self.date_parser.sniff([(row.get('Date') or '').strip() for row in head])
+        self.timer.add('read', time.perf_counter() - started)
+
+        row_num = 1  # The header is row 1
+        ranges = split_csv_ranges(path, data_start, chunk_bytes)
+        in_flight = deque()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            def submit_next():
+                for start, end in islice(ranges, 1):
+                    in_flight.append((end, executor.submit(parse_csv_range, path, start, end, fieldnames, date_format)))
+
+            # Keep a bounded number of ranges parsed ahead of the writer
+            for _ in range(workers * 2):
+                submit_next()
+
+            while in_flight:
+                end, future = in_flight.popleft()
+                started = time.perf_counter()
+                results = future.result()
+                self.timer.add('parse', time.perf_counter() - started, len(results))
+                for parsed in results:
+                    row_num += 1
+                    self.rows_parsed += 1
+                    try:
+                        self.process_parsed(row_num, parsed)
+                    except Exception as e:
+                        self.add_error(row_num, str(e))
+                        continue
+
+                    if len(self._pending) >= self.chunk_size:
+                        self.flush()
+                self.bytes_processed = end
+                submit_next()
+
+        self.flush()
+
+    def process_row(self, row_num, row):
+        """
+        Validate a single CSV row and buffer it for the next chunk.
+
+        Args:
+            row_num (int): The line number of the row in the CSV file.
+            row (dict): The row as returned by csv.DictReader.
+        """
+        started = time.perf_counter()
+        parsed = parse_row(row, self.date_parser)
+        self.timer.add('parse', time.perf_counter() - started, 1)
+        self.process_parsed(row_num, parsed)
+
+    def process_parsed(self, row_num, parsed):
+        """
+        Resolve lookups for a parsed row and buffer it for the next chunk.
+
+        Args:
+            row_num (int): The line number of the row in the CSV file.
+            parsed (tuple): The result of parse_row for the row.
+        """
+        status, values = parsed
+        if status == 'skipped':
+            self.skipped_count += 1
+            return
+        if status == 'error':
+            self.add_error(row_num, values)
+            return
+
+        external_id = values['external_id']
+        category_name = values['category_name']
+        account_name = values['account_name']
+        merchant = values['merchant']
+
+        # Skip duplicates within the current chunk; stored duplicates are skipped on insert
+        started = time.perf_counter()
+        duplicate = external_id in self._pending_external_ids
+        looked_up = time.perf_counter()
+        self.timer.add('dedup', looked_up - started, 1)
+        if duplicate:
+            self.skipped_count += 1
+            return
+
+        # Ensure category exists
+        category_id = self.ensure_category_exists(category_name)
+        if not category_id:
+            self.timer.add('lookup', time.perf_counter() - looked_up, 1)
+            self.add_error(row_num, f"Category '{category_name}' not found")
+            return
+
+        # Ensure account exists (create if needed with merchant as institution)
+        account_id = self.ensure_account_exists_smart(account_name, merchant)
+        self.timer.add('lookup', time.perf_counter() - looked_up, 1)
+        if not account_id:
+            self.add_error(row_num, f"Could not create account '{account_name}'")
+            return
+
+        # Store fields separately (no joining)
+        # Description can be used for additional custom info if needed
+        self._pending.append((row_num, {
+            'user_id': self.user_id,
+            'categories_id': category_id,
+            'account_id': account_id,
+            'amount': values['amount'],
+            'transaction_type': values['transaction_type'],
+            'external_id': external_id,
+            'external_date': values['external_date'],
+            'merchant': merchant,
+            'original_statement': values['original_statement'],
+            'notes': values['notes'],
+            'tags': values['tags'],
+            'description': None  # Keep empty unless specifically provided
+        }))
+        self._pending_external_ids.add(external_id)
+
+    def flush(self):
+        """
+        Write the buffered rows with a single multi-row INSERT and commit.
+
+        A failing chunk is rolled back and retried one row at a time so the
+        offending rows can be reported individually. One structured log line
+        is emitted per chunk.
+        """
+        if not self._pending:
+            return
+
+        pending = self._pending
+        self._pending = []
+        self._pending_external_ids = set()
+        created_before = self.created_count
+        skipped_before = self.skipped_count
+        errors_before = self.error_count
+        insert_seconds = commit_seconds = 0.0
+        replayed = False
+
+        if self.dry_run:
+            started = time.perf_counter()
+            for _, values in pending:
+                if values['external_id'] in self.stored_external_ids:
+                    self.skipped_count += 1
+                else:
+                    self.stored_external_ids.add(values['external_id'])
+                    self.created_count += 1
+            self.timer.add('dedup', time.perf_counter() - started, len(pending))
+        else:
+            started = time.perf_counter()
+            try:
+                written = self.insert_chunk([values for _, values in pending])
+                created = len(written)
+                if created:
+                    adjust_transaction_count(db.session, self.user_id, created)
+                    adjust_balances(db.session, self.user_id, balance_deltas(row[:2] for row in written))
+                    add_to_rollups(db.session, self.user_id, written)
+                inserted = time.perf_counter()
+                db.session.commit()
+                insert_seconds = inserted - started
+                commit_seconds = time.perf_counter() - inserted
+                self.created_count += created
+                self.skipped_count += len(pending) - created
+            except SQLAlchemyError:
+                db.session.rollback()
+                replayed = True
+                self.flush_rows_individually(pending)
+                insert_seconds = time.perf_counter() - started
+            self.timer.add('insert', insert_seconds, len(pending))
+            self.timer.add('commit', commit_seconds)
+
+        self.chunks_written += 1
+        self.log_chunk(
+            rows=len(pending),
+            created=self.created_count - created_before,
+            skipped=self.skipped_count - skipped_before,
+            errors=self.error_count - errors_before,
+            insert_ms=round(insert_seconds * 1000, 2),
+            commit_ms=round(commit_seconds * 1000, 2),
+            replayed=replayed
+        )
+
+        if not self.dry_run and self.on_flush:
+            self.on_flush(self)
+
+    def flush_rows_individually(self, pending):
+        """
+        Write buffered rows one at a time, recording an error for each row that fails.
+
+        Args:
+            pending (list): (row_num, values) tuples from a chunk that failed as a whole.
+        """
+        for row_num, values in pending:
+            try:
+                written = self.insert_chunk([values])
+                created = len(written)
+                if created:
+                    adjust_transaction_count(db.session, self.user_id, created)
+                    adjust_balances(db.session, self.user_id, balance_deltas(row[:2] for row in written))
+                    add_to_rollups(db.session, self.user_id, written)
+                db.session.commit()
+                self.created_count += created
+                self.skipped_count += 1 - created
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                self.add_error(row_num, str(e))
+
+    def insert_chunk(self, rows):
+        """
+        Insert rows, ignoring those whose (user_id, external_id) already exists.
+
+        On psycopg2 connections rows are streamed with COPY (see copy_chunk).
+        Otherwise PostgreSQL and SQLite use a multi-row INSERT ... ON CONFLICT
+        DO NOTHING, and other dialects fall back to a single IN query for the
+        chunk's external IDs followed by an executemany INSERT.
+
+        Args:
+            rows (list): Column values for each transaction.
+
+        Returns:
+            list: (account_id, amount, categories_id, external_date) of each row actually
+                inserted, for the balances and rollups.
+        """
+        table = TransactionModel.__table__
+        bind = db.session.get_bind()
+        dialect = bind.dialect.name
+
+        if dialect == 'postgresql' and bind.dialect.driver == 'psycopg2' and self.use_copy:
+            return self.copy_chunk(rows)
+
+        if dialect in ('postgresql', 'sqlite'):
+            insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+            stmt = (
+                insert(table).values(rows)
+                .on_conflict_do_nothing(index_elements=['user_id', 'external_id'])
+                .returning(table.c.account_id, table.c.amount, table.c.categories_id, table.c.external_date)
+            )
+            return db.session.execute(stmt).all()
+
+        existing = self.existing_external_ids([row['external_id'] for row in rows])
+        rows = [row for row in rows if row['external_id'] not in existing]
+        if rows:
+            db.session.execute(table.insert(), rows)
+        return [(row['account_id'], row['amount'], row['categories_id'], row['external_date']) for row in rows]
+
+    def copy_chunk(self, rows):
+        """
+        Load rows with COPY FROM STDIN into a staging table, then merge them.
+
+        The staging table is a temporary copy of the transaction table that is
+        emptied on commit. The merge is a single INSERT ... SELECT ... ON CONFLICT
+        DO NOTHING, so duplicates are still skipped by the unique index.
+
+        Args:
+            rows (list): Column values for each transaction.
+
+        Returns:
+            list: (account_id, amount, categories_id, external_date) of each row actually inserted.
+        """
+        buffer = io.StringIO()
+        for row in rows:
+            values = dict(row, id=row.get('id') or str(uuid.uuid4()))
+            buffer.write(','.join(_copy_field(values[column]) for column in COPY_COLUMNS) + '\n')
+        buffer.seek(0)
+
+        columns = ', '.join(COPY_COLUMNS)
+        dbapi_error = db.session.get_bind().dialect.loaded_dbapi.Error
+        cursor = db.session.connection().connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(
+                f'CREATE TEMP TABLE IF NOT EXISTS {COPY_STAGE_TABLE} '
+                f'(LIKE "transaction" INCLUDING DEFAULTS) ON COMMIT DELETE ROWS'
+            )
+            cursor.copy_expert(
+                f'COPY {COPY_STAGE_TABLE} ({columns}) FROM STDIN WITH (FORMAT csv)',
+                buffer
+            )
+            # created_at/updated_at have Python-side defaults, so set them here
+            cursor.execute(
+                f'INSERT INTO "transaction" ({columns}, created_at, updated_at) '
+                f'SELECT {columns}, now(), now() FROM {COPY_STAGE_TABLE} '
+                f'ON CONFLICT (user_id, external_id) DO NOTHING '
+                f'RETURNING account_id, amount, categories_id, external_date'
+            )
+            written = cursor.fetchall()
+            cursor.execute(f'TRUNCATE {COPY_STAGE_TABLE}')
+        except dbapi_error as e:
+            # Surface driver errors like any other statement so the chunk is replayed row by row
+            raise DBAPIError.instance(None, None, e, dbapi_error) from e
+        finally:
+            cursor.close()
+        return written
+
+    def log_chunk(self, **fields):
+        """
+        Emit one structured log line for a flushed chunk.
+
+        Args:
+            **fields: Per-chunk counters and timings to include.
+        """
+        logger.info('import_chunk %s', json.dumps({
+            'user_id': self.user_id,
+            'chunk': self.chunks_written,
+            'dry_run': self.dry_run,
+            **fields,
+            'rows_parsed': self.rows_parsed,
+            'elapsed_ms': round(self.timer.elapsed() * 1000, 2)
+        }))
+
+    def existing_external_ids(self, external_ids):
+        """
+        Find which of the given external IDs the user already has.
+
+        Args:
+            external_ids (list): External IDs to check.
+
+        Returns:
+            set: The external IDs that are already stored.
+        """
+        query = db.session.query(TransactionModel.external_id).filter(
+            TransactionModel.user_id == self.user_id,
+            TransactionModel.external_id.in_(external_ids)
+        )
+        return {external_id for external_id, in query}
+
+    def add_error(self, row_num, message):
+        """
+        Record a rejected row.
+
+        Args:
+            row_num (int): The line number of the row in the CSV file.
+            message (str): Why the row was rejected.
+        """
+        self.errors.append(f"Row {row_num}: {message}")
+        self.error_count += 1
+
+    def results(self):
+        """
+        Build the import response payload.
+
+        Returns:
+            dict: Counts and per-stage timings, plus the first 50 errors and an
+            error summary when any rows failed.
+        """
+        response_data = {
+            'message': 'Dry run completed, nothing was written' if self.dry_run else 'Import completed',
+            'transactions_created': self.created_count,
+            'transactions_skipped': self.skipped_count,
+            'errors': self.error_count,
+            'timings': self.timer.to_dict(self.rows_parsed)
+        }
+        if self.dry_run:
+            response_data['dry_run'] = True
+
+        if self.errors:
+            # Show first 50 errors to understand patterns
+            response_data['error_details'] = self.errors[:50]
+            # Also include a summary of error types
+            error_summary = {}
+            for error in self.errors:
+                # Extract error type
+                if "Category" in error and "not found" in error:
+                    error_summary['category_not_found'] = error_summary.get('category_not_found', 0) + 1
+                elif "Could not create account" in error:
+                    error_summary['account_creation_failed'] = error_summary.get('account_creation_failed', 0) + 1
+                elif "Unable to parse date" in error:
+                    error_summary['date_parse_error'] = error_summary.get('date_parse_error', 0) + 1
+                elif "Invalid amount" in error:
+                    error_summary['invalid_amount'] = error_summary.get('invalid_amount', 0) + 1
+                else:
+                    error_summary['other'] = error_summary.get('other', 0) + 1
+            response_data['error_summary'] = error_summary
+
+        return response_data
+
+    def ensure_category_exists(self, category_name):
+        """Find category by name, return ID or None if not found"""
+        return self.category_ids.get(category_name)
+
+    def ensure_account_exists_smart(self, account_name, merchant_name):
+        """
+        Find or create account with smart institution handling
+        Uses merchant name as institution if institution doesn't exist
+        """
+        # Check if account exists
+        account_id = self.account_ids.get(account_name)
+        if account_id:
+            return account_id
+
+        if self.dry_run:
+            # Record placeholders so later rows resolve without creating anything
+            self.institution_ids.setdefault(merchant_name, f'dry-run:{merchant_name}')
+            account_id = self.account_ids[account_name] = f'dry-run:{account_name}'
+            return account_id
+
+        # Account doesn't exist, create it with institution
+        # Use merchant as institution name
+        institution_id = self.institution_ids.get(merchant_name)
+        if not institution_id:
+            # Create institution with merchant name
+            institution = InstitutionModel(
+                user_id=self.user_id,
+                name=merchant_name,
+                location="Auto-created",
+                description=f"Auto-created from transaction import for {account_name}"
+            )
+            db.session.add(institution)
+            db.session.flush()
+            institution_id = self.institution_ids[merchant_name] = institution.id
+            db.session.commit()
+
+        # Create account
+        account = InstitutionAccountModel(
+            name=account_name,
+            institution_id=institution_id,
+            user_id=self.user_id,
+            number="Auto-imported",
+            status='active',
+            balance=0,
+            starting_balance=0,
+            account_type='checking',
+            account_class='asset'
+        )
+        db.session.add(account)
+        db.session.flush()
+        account_id = self.account_ids[account_name] = account.id
+        db.session.commit()
+
+        return account_id
+
+
+def get_import_executor():
+    """
+    Return the process-wide pool that runs background import jobs.
+
+    The pool is created on first use and bounded by IMPORT_WORKERS.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config.get('IMPORT_WORKERS', DEFAULT_IMPORT_WORKERS),
+                thread_name_prefix='import-job'
+            )
+    return _executor
+
+
+def submit_import_job(file, user_id):
+    """
+    Queue a transactions CSV import to run in the background.
+
+    The request stream is gone once the response is sent, so the upload is
+    spooled to UPLOAD_FOLDER and removed by the worker when it finishes.
+
+    Args:
+        file (FileStorage): The uploaded CSV file.
+        user_id (str): The ID of the user the transactions are imported for.
+
+    Returns:
+        ImportJobModel: The queued job.
+    """
+    upload_folder = current_app.config.get('UPLOAD_FOLDER', 'uploads')
+    os.makedirs(upload_folder, exist_ok=True)
+    file_path = os.path.join(upload_folder, SPOOL_PATTERN.replace('*', str(uuid.uuid4())))
+    file.save(file_path)
+
+    job = ImportJobModel(
+        user_id=user_id,
+        kind='transactions',
+        filename=file.filename,
+        file_path=file_path,
+        total_bytes=os.path.getsize(file_path)
+    )
+    job.save()
+
+    get_import_executor().submit(run_import_job, current_app._get_current_object(), job.id)
+    return job
+
+
+def update_import_job(job_id, **values):
+    """
+    Persist job state with a single UPDATE and commit.
+
+    Args:
+        job_id (str): The ID of the import job.
+        **values: Columns to set.
+    """
+    ImportJobModel.query.filter_by(id=job_id).update(values)
+    db.session.commit()
+
+
+def run_import_job(app, job_id):
+    """
+    Run a queued import job inside its own application context.
+
+    Progress counters are written to the job row after every chunk. Files of at
+    least IMPORT_PARALLEL_MIN_BYTES are parsed by IMPORT_PARALLEL_WORKERS processes.
+    The job is claimed with a conditional UPDATE, so a job submitted twice (see
+    recover_import_jobs()) only runs once.
+
+    Args:
+        app (Flask): The application to run in.
+        job_id (str): The ID of the import job.
+    """
+    with app.app_context():
+        claimed = ImportJobModel.query.filter_by(id=job_id, status='queued').update(
+            {'status': 'running', 'started_at': datetime.utcnow()}
+        )
+        db.session.commit()
+        if not claimed:
+            db.session.remove()
+            return
+
+        job = db.session.get(ImportJobModel, job_id)
+        user_id, file_path = job.user_id, job.file_path
+        workers = app.config.get('IMPORT_PARALLEL_WORKERS', DEFAULT_PARALLEL_WORKERS)
+        parallel = workers > 1 and job.total_bytes >= app.config.get('IMPORT_PARALLEL_MIN_BYTES', DEFAULT_PARALLEL_MIN_BYTES)
+
+        try:
+            with open(file_path, newline='', encoding='utf-8') as csvfile:
+                csvreader = csv.DictReader(csvfile)
+                if not all(header in (csvreader.fieldnames or []) for header in REQUIRED_HEADERS):
+                    raise ValueError(f'CSV must have headers: {", ".join(REQUIRED_HEADERS)}')
+
+                def report_progress(importer):
+                    update_import_job(
+                        job_id,
+                        bytes_processed=importer.bytes_processed if parallel else csvfile.buffer.tell(),
+                        rows_parsed=importer.rows_parsed,
+                        rows_created=importer.created_count,
+                        rows_skipped=importer.skipped_count,
+                        rows_errored=importer.error_count
+                    )
+
+                importer = TransactionImporter(user_id, on_flush=report_progress)
+                if parallel:
+                    importer.import_file(file_path, workers)
+                else:
+                    importer.import_rows(csvreader)
+                report_progress(importer)
+
+            update_import_job(
+                job_id,
+                status='completed',
+                finished_at=datetime.utcnow(),
+                result=json.dumps(importer.results())
+            )
+        except Exception as e:
+            db.session.rollback()
+            update_import_job(job_id, status='failed', finished_at=datetime.utcnow(), error=str(e))
+        finally:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            db.session.remove()
+
+
+def recover_import_jobs(app):
+    """
+    Pick up the import jobs a previous process left behind.
+
+    Run by `flask recover-import-jobs` once per deployment, before the web
+    workers start, and never from app construction, where it would race
+    workers that are still importing. Queued jobs whose spooled upload is
+    still there are submitted again; queued jobs whose upload is gone fail.
+    Running jobs whose row has not been updated for IMPORT_JOB_STALE_SECONDS
+    lost their worker: they fail and their upload is removed. Rows they
+    already committed are kept, and re-uploading the file skips them as
+    duplicates. Spool files no queued or running job refers to are removed
+    once they are that old too, so an upload still being saved is left alone.
+
+    Args:
+        app (Flask): The application whose jobs and UPLOAD_FOLDER to recover.
+
+    Returns:
+        dict: Counts of the jobs 'resubmitted' and 'failed' and the spool files 'removed'.
+    """
+    stale_after = timedelta(seconds=app.config.get('IMPORT_JOB_STALE_SECONDS', DEFAULT_IMPORT_STALE_SECONDS))
+    recovered = {'resubmitted': 0, 'failed': 0, 'removed': 0}
+
+    with app.app_context():
+        cutoff = database_now() - stale_after
+        kept_files = set()
+        for job in ImportJobModel.query.filter(ImportJobModel.status.in_(('queued', 'running'))).all():
+            if job.status == 'queued' and job.file_path and os.path.exists(job.file_path):
+                get_import_executor().submit(run_import_job, app, job.id)
+                kept_files.add(os.path.abspath(job.file_path))
+                recovered['resubmitted'] += 1
+                continue
+            if job.status == 'running' and job.updated_at is not None and job.updated_at >= cutoff:
+                # Still making progress in another process
+                if job.file_path:
+                    kept_files.add(os.path.abspath(job.file_path))
+                continue
+
+            error = 'The uploaded file was lost before the import started' if job.status == 'queued' else \
+                'Interrupted by a restart; rows imported before that were kept'
+            claimed = ImportJobModel.query.filter_by(id=job.id, status=job.status).update(
+                {'status': 'failed', 'finished_at': datetime.utcnow(), 'error': error}
+            )
+            db.session.commit()
+            if claimed:
+                recovered['failed'] += 1
+                if job.file_path and os.path.exists(job.file_path):
+                    os.remove(job.file_path)
+
+        upload_folder = app.config.get('UPLOAD_FOLDER', 'uploads')
+        oldest = time.time() - stale_after.total_seconds()
+        for file_path in glob.glob(os.path.join(upload_folder, SPOOL_PATTERN)):
+            try:
+                if os.path.abspath(file_path) in kept_files or os.path.getmtime(file_path) >= oldest:
+                    continue
+                os.remove(file_path)
+            except FileNotFoundError:
+                # Another process got to it first
+                continue
+            recovered['removed'] += 1
+
+        db.session.remove()
+
+    if any(recovered.values()):
+        logger.info('Recovered import jobs: %s', recovered)
+    return recovered
@@ -1,3 +1,5 @@
+from sqlalchemy import DDL, event
+from sqlalchemy.orm import joinedload, selectinload, load_only
 from app import db
 from api.base.models import Base
 
@@ -16,21 +18,36 @@ class TransactionModel(Base):
     """
 
     __tablename__ = 'transaction'
+    __table_args__ = (
+        db.Index('ix_transaction_user_external_id', 'user_id', 'external_id', unique=True),
+    )
     user_id = db.Column('user_id', db.Text, db.ForeignKey('user.id'), nullable=False)
-    categories_id = db.Column('categories_id', db.Text, db.ForeignKey('categories.id'), nullable=False)
+    # active_history keeps the previous category, account, amount and date on update,
+    # so balances and rollups can take the old values back out
+    categories_id = db.column_property(db.Column('categories_id', db.Text, db.ForeignKey('categories.id'), nullable=False), active_history=True)
     categories = db.relationship('CategoriesModel', backref='transaction')
-    account_id = db.Column('account_id', db.Text, db.ForeignKey('account.id'), nullable=False)
+    account_id = db.column_property(db.Column('account_id', db.Text, db.ForeignKey('account.id'), nullable=False), active_history=True)
     account = db.relationship('InstitutionAccountModel', backref='transaction')
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.column_property(db.Column(db.Float, nullable=False), active_history=True)
     transaction_type = db.Column(db.String(255), nullable=False)
     external_id = db.Column(db.String(255), nullable=False)
-    external_date = db.Column(db.DateTime, nullable=True)
+    external_date = db.column_property(db.Column(db.DateTime, nullable=True), active_history=True)
     merchant = db.Column(db.String(255), nullable=True)
     original_statement = db.Column(db.String(255), nullable=True)
     notes = db.Column(db.Text, nullable=True)
     tags = db.Column(db.String(255), nullable=True)
     description = db.Column(db.String(255), nullable=True)
 
+    SERIALIZED_COLUMNS = (
+        'id', 'user_id', 'categories_id', 'account_id', 'amount', 'transaction_type', 'external_id',
+        'external_date', 'merchant', 'original_statement', 'notes', 'tags', 'description',
+        'created_at', 'updated_at'
+    )
+    EXPAND_PATHS = (
+        'categories', 'categories.categories_group', 'categories.categories_type',
+        'account', 'account.institution'
+    )
+
     def __init__(self, user_id, categories_id, account_id, amount, transaction_type, external_id, external_date, merchant=None, original_statement=None, notes=None, tags=None, description=None):
         """
         Initialize a TransactionModel instance.
@@ -71,32 +88,46 @@ class TransactionModel(Base):
         """
         return f'<Transaction {self.id!r}>'
 
-    def to_dict(self):
+    def to_dict(self, fields=None, expand=None):
         """
         Convert the TransactionModel instance to a dictionary.
 
+        With no arguments the category and account are nested in full, as they
+        always have been. Passing fields or expand switches to sparse output:
+        only the requested columns, and only the expanded relationships.
+
+        Args:
+            fields (set): Columns to include, or None for all of SERIALIZED_COLUMNS.
+            expand (dict): Relationships to nest, e.g. {'account': {'institution': {}}}.
+
         Returns:
             dict: Dictionary representation of the transaction.
         """
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'categories_id': self.categories_id,
-            'categories': self.categories.to_dict(),
-            'account_id': self.account_id,
-            'account': self.account.to_dict(),
-            'amount': self.amount,
-            'transaction_type': self.transaction_type,
-            'external_id': self.external_id,
-            'external_date': self.external_date,
-            'merchant': self.merchant,
-            'original_statement': self.original_statement,
-            'notes': self.notes,
-            'tags': self.tags,
-            'description': self.description,
-            'created_at': self.created_at,
-            'updated_at': self.updated_at
-        }
+        if fields is None and expand is None:
+            return {
+                'id': self.id,
+                'user_id': self.user_id,
+                'categories_id': self.categories_id,
+                'categories': self.categories.to_dict(),
+                'account_id': self.account_id,
+                'account': self.account.to_dict(),
+                'amount': self.amount,
+                'transaction_type': self.transaction_type,
+                'external_id': self.external_id,
+                'external_date': self.external_date,
+                'merchant': self.merchant,
+                'original_statement': self.original_statement,
+                'notes': self.notes,
+                'tags': self.tags,
+                'description': self.description,
+                'created_at': self.created_at,
+                'updated_at': self.updated_at
+            }
+
+        data = {name: getattr(self, name) for name in self.SERIALIZED_COLUMNS if fields is None or name in fields}
+        for name, nested in (expand or {}).items():
+            data[name] = getattr(self, name).to_dict(expand=nested)
+        return data
 
     def save(self):
         """
@@ -111,3 +142,134 @@ class TransactionModel(Base):
         """
         db.session.delete(self)
         db.session.commit()
+
+
+def eager_relationships(expand=None):
+    """
+    Loader options for the relationships TransactionModel.to_dict() dereferences.
+
+    Categories and accounts are each fetched with one extra SELECT ... IN per page,
+    with their group, type and institution joined in, so serializing a page costs
+    three queries however many rows it has.
+
+    Args:
+        expand (dict): Only load these relationships, as parsed by helpers.parse_expand().
+            None loads everything the legacy full output nests.
+
+    Returns:
+        tuple: Options to pass to Query.options().
+    """
+    from api.categories.models import CategoriesModel
+    from api.institution_account.models import InstitutionAccountModel
+
+    if expand is None:
+        expand = {
+            'categories': {'categories_group': {}, 'categories_type': {}},
+            'account': {'institution': {}}
+        }
+
+    options = []
+    if 'categories' in expand:
+        options.append(selectinload(TransactionModel.categories).options(*[
+            joinedload(getattr(CategoriesModel, name)) for name in expand['categories']
+        ]))
+    if 'account' in expand:
+        options.append(selectinload(TransactionModel.account).options(*[
+            joinedload(getattr(InstitutionAccountModel, name)) for name in expand['account']
+        ]))
+    return tuple(options)
+
+
+def sparse_columns(fields, expand, sort_column=None):
+    """
+    Loader option that selects only the columns a sparse response needs.
+
+    Args:
+        fields (set): Requested columns, or None for all of them.
+        expand (dict): Expanded relationships; their foreign keys are loaded too.
+        sort_column (InstrumentedAttribute): The list's sort column, needed to build cursors.
+
+    Returns:
+        Load: A load_only() option for Query.options().
+    """
+    names = set(TransactionModel.SERIALIZED_COLUMNS if fields is None else fields) | {'id'}
+    if 'categories' in expand:
+        names.add('categories_id')
+    if 'account' in expand:
+        names.add('account_id')
+    if sort_column is not None:
+        names.add(sort_column.key)
+    return load_only(*[getattr(TransactionModel, name) for name in sorted(names)])
+
+
+def _not_postgresql(ddl, target, bind, compiler=None, **kw):
+    dialect = bind.dialect if bind is not None else compiler.dialect
+    return dialect.name != 'postgresql'
+
+
+def list_index(name, *prefix):
+    """
+    Declare an index matching the default keyset ORDER BY of the transaction list.
+
+    PostgreSQL gets (..., external_date DESC NULLS LAST, id DESC). SQLite cannot
+    put NULLS LAST in an index definition, but already sorts NULLs last under
+    DESC, so other dialects get a plain (..., external_date DESC, id DESC).
+
+    Args:
+        name (str): The index name.
+        *prefix: Equality-filtered columns that lead the index, e.g. user_id.
+    """
+    date, id = TransactionModel.external_date, TransactionModel.id
+    db.Index(name, *prefix, date.desc().nulls_last(), id.desc()).ddl_if(dialect='postgresql')
+    db.Index(name, *prefix, date.desc(), id.desc()).ddl_if(callable_=_not_postgresql)
+
+
+# Serve the list globally and for the per-user filters in api/transaction/filters.py
+list_index('ix_transaction_external_date_id')
+list_index('ix_transaction_user_date', TransactionModel.user_id)
+list_index('ix_transaction_user_account_date', TransactionModel.user_id, TransactionModel.account_id)
+list_index('ix_transaction_user_category_date', TransactionModel.user_id, TransactionModel.categories_id)
+
+
+# Full-text search over merchant, original_statement and notes (see api/transaction/search.py).
+# PostgreSQL keeps a generated tsvector column with a GIN index; SQLite keeps an FTS5
+# table in sync with triggers. Both are filled by the same INSERT that writes the row,
+# including the CSV importer's multi-row and COPY paths. "transaction" has a TEXT primary
+# key, so its rowid is not stable (VACUUM may renumber it); the FTS5 table stores id and
+# is joined on it. id is indexed so the triggers find a row's entry with a MATCH on it,
+# and searches are limited to SEARCH_COLUMNS so ids never match.
+SEARCH_TABLE = 'transaction_search'
+SEARCH_COLUMNS = ('merchant', 'original_statement', 'notes')
+_SEARCH_ENTRY = f"""{SEARCH_TABLE} MATCH 'id : "' || replace(old.id, '"', '""') || '"' AND id = old.id"""
+SEARCH_DDL = {
+    'postgresql': [
+        """ALTER TABLE "transaction" ADD COLUMN IF NOT EXISTS search_vector tsvector
+           GENERATED ALWAYS AS (to_tsvector('simple',
+               coalesce(merchant, '') || ' ' || coalesce(original_statement, '') || ' ' || coalesce(notes, '')
+           )) STORED""",
+        """CREATE INDEX IF NOT EXISTS ix_transaction_search_vector ON "transaction" USING GIN (search_vector)""",
+    ],
+    'sqlite': [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE}
+            USING fts5(id, merchant, original_statement, notes)""",
+        f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ai AFTER INSERT ON "transaction" BEGIN
+              INSERT INTO {SEARCH_TABLE}(id, merchant, original_statement, notes)
+              VALUES (new.id, new.merchant, new.original_statement, new.notes);
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ad AFTER DELETE ON "transaction" BEGIN
+              DELETE FROM {SEARCH_TABLE} WHERE {_SEARCH_ENTRY};
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_au AFTER UPDATE OF id, merchant, original_statement, notes
+            ON "transaction" BEGIN
+              DELETE FROM {SEARCH_TABLE} WHERE {_SEARCH_ENTRY};
+              INSERT INTO {SEARCH_TABLE}(id, merchant, original_statement, notes)
+              VALUES (new.id, new.merchant, new.original_statement, new.notes);
+            END""",
+    ]
+}
+
+for _dialect, _statements in SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(TransactionModel.__table__, 'after_create', DDL(_statement).execute_if(dialect=_dialect))
+# The FTS5 table outlives "transaction" unless it is dropped with it
+event.listen(TransactionModel.__table__, 'after_drop', DDL(f'DROP TABLE IF EXISTS {SEARCH_TABLE}').execute_if(dialect='sqlite'))
@@ -0,0 +1,145 @@
+import json
+import base64
+import binascii
+from datetime import datetime
+from sqlalchemy import and_, tuple_
+from api.transaction.models import TransactionModel
+from api.transaction.filters import parse_sort, DEFAULT_SORT
+
+DEFAULT_PER_PAGE = 100
+MAX_PER_PAGE = 1000
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor that was not produced by encode_cursor"""
+
+
+def encode_cursor(transaction, sort=DEFAULT_SORT):
+    """
+    Build the opaque cursor that points just past a transaction.
+
+    Args:
+        transaction (TransactionModel): The last transaction on the page.
+        sort (str): The sort the page was fetched with, see filters.parse_sort().
+
+    Returns:
+        str: URL-safe base64 of the sort and the row's (sort value, id) key.
+    """
+    sort, column, _ = parse_sort(sort)
+    value = getattr(transaction, column.key)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({'s': sort, 'v': value, 'id': transaction.id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort=DEFAULT_SORT):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor (str): The cursor from the query string.
+        sort (str): The sort of the current request; it must match the cursor's.
+
+    Returns:
+        tuple: (sort value, id) of the last transaction on the previous page.
+
+    Raises:
+        InvalidCursor: If the cursor is malformed or was issued for another sort.
+    """
+    sort, column, _ = parse_sort(sort)
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        cursor_sort, value, id = payload['s'], payload['v'], str(payload['id'])
+        if value is not None and column.type.python_type is datetime:
+            value = datetime.fromisoformat(value)
+    except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError):
+        raise InvalidCursor('Invalid cursor')
+
+    if cursor_sort != sort:
+        raise InvalidCursor('Cursor was issued for a different sort')
+    return value, id
+
+
+def keyset_order(sort=DEFAULT_SORT):
+    """
+    Build the ORDER BY for a transaction list.
+
+    Rows are ordered by the sort column with NULLs last, then by id in the
+    same direction so every row has a unique position.
+
+    Args:
+        sort (str): The sort, see filters.parse_sort().
+
+    Returns:
+        tuple: ORDER BY clauses, (external_date DESC NULLS LAST, id DESC) by default.
+    """
+    _, column, descending = parse_sort(sort)
+    if descending:
+        return (column.desc().nulls_last(), TransactionModel.id.desc())
+    return (column.asc().nulls_last(), TransactionModel.id.asc())
+
+
+def after_cursor(value, id, sort=DEFAULT_SORT):
+    """
+    Build the WHERE clause that selects rows sorting after a cursor under keyset_order().
+
+    Non-NULL rows are matched with one row-value comparison, (column, id) < (value, id)
+    for descending sorts, which the database can use as an index range
+    condition, so a deep page costs the same as the first. Rows with a NULL
+    sort value never match it; keyset_page() reads that tail separately.
+
+    Args:
+        value: The cursor's sort value, or None for a row with a NULL sort value.
+        id (str): The cursor's transaction ID.
+        sort (str): The sort, see filters.parse_sort().
+
+    Returns:
+        ColumnElement: The filter condition.
+    """
+    _, column, descending = parse_sort(sort)
+    beyond = (lambda a, b: a < b) if descending else (lambda a, b: a > b)
+
+    if value is None:
+        # NULLs sort last, so only other NULL rows further along by id follow
+        return and_(column.is_(None), beyond(TransactionModel.id, id))
+    return beyond(tuple_(column, TransactionModel.id), (value, id))
+
+
+def keyset_page(query, per_page, cursor=None, sort=DEFAULT_SORT):
+    """
+    Fetch one page of a transaction query using keyset pagination.
+
+    One extra row is fetched to tell whether another page follows, so no
+    COUNT or OFFSET is needed and deep pages cost the same as the first.
+
+    Args:
+        query (Query): A TransactionModel query with any filters applied.
+        per_page (int): Page size.
+        cursor (str): The next_cursor from the previous page, or None for the first page.
+        sort (str): The sort, see filters.parse_sort().
+
+    Returns:
+        tuple: (transactions, next_cursor), where next_cursor is None on the last page.
+
+    Raises:
+        InvalidCursor: If the cursor is malformed.
+        InvalidFilter: If the sort is not whitelisted.
+    """
+    order = keyset_order(sort)
+    if not cursor:
+        rows = query.order_by(*order).limit(per_page + 1).all()
+    else:
+        value, id = decode_cursor(cursor, sort)
+        rows = query.filter(after_cursor(value, id, sort)).order_by(*order).limit(per_page + 1).all()
+
+        # The non-NULL rows ran out on this page; NULLs sort last, so continue with them from the start
+        _, column, _ = parse_sort(sort)
+        if value is not None and len(rows) <= per_page and getattr(column.expression, 'nullable', True):
+            rows += query.filter(column.is_(None)).order_by(order[1]).limit(per_page + 1 - len(rows)).all()
+
+    if len(rows) <= per_page:
+        return rows, None
+    rows = rows[:per_page]
+    return rows, encode_cursor(rows[-1], sort)
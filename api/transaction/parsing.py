@@ -0,0 +1,309 @@
+import io
+import os
+import csv
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from api.helpers import positive_or_negative, clean_dollar_value
+
+# Accepted CSV date layouts, in order of preference for ambiguous values
+DATE_FORMATS = ["%m/%d/%Y", "%Y-%m-%d", "%m-%d-%Y", "%d/%m/%Y"]
+DATE_SNIFF_ROWS = 50
+
+# Separator and position of (year, month, day) in the split value for each layout
+_DATE_LAYOUTS = {
+    "%m/%d/%Y": ('/', 2, 0, 1),
+    "%Y-%m-%d": ('-', 0, 1, 2),
+    "%m-%d-%Y": ('-', 2, 0, 1),
+    "%d/%m/%Y": ('/', 2, 1, 0),
+}
+
+
+def parse_date_layout(value, date_format):
+    """
+    Parse a date with a hand-written splitter for one of DATE_FORMATS.
+
+    Args:
+        value (str): The date string from the CSV.
+        date_format (str): One of DATE_FORMATS.
+
+    Returns:
+        datetime: The parsed date.
+
+    Raises:
+        ValueError: If the value does not match the layout.
+    """
+    separator, year, month, day = _DATE_LAYOUTS[date_format]
+    parts = value.split(separator)
+    if len(parts) != 3 or len(parts[year]) != 4:
+        raise ValueError(f"Unable to parse date: {value}")
+    return datetime(int(parts[year]), int(parts[month]), int(parts[day]))
+
+
+class DateParser:
+    """
+    Parse CSV dates using a layout detected once per file.
+
+    sniff() picks the first of DATE_FORMATS that fits every sampled value and
+    locks it in, so each row costs one split and three int() calls instead of
+    up to four strptime attempts. Values that do not fit the detected layout
+    fall back to trying every format in order.
+
+    Attributes:
+        date_format (str): The detected layout, or None before sniffing.
+    """
+
+    def __init__(self, date_format=None):
+        """
+        Initialize a DateParser instance.
+
+        Args:
+            date_format (str): A layout that is already known, e.g. from another chunk of the same file.
+        """
+        self.date_format = date_format
+
+    def sniff(self, samples):
+        """
+        Detect the layout from sample values.
+
+        Args:
+            samples (list): Date strings from the first rows of the file.
+
+        Returns:
+            str: The detected layout, or None if no single layout fits the samples.
+        """
+        samples = [sample for sample in samples if sample]
+        for date_format in DATE_FORMATS:
+            try:
+                for sample in samples:
+                    parse_date_layout(sample, date_format)
+            except ValueError:
+                continue
+            if samples:
+                self.date_format = date_format
+                break
+        return self.date_format
+
+    def parse(self, value):
+        """
+        Parse a date string.
+
+        Args:
+            value (str): The date string from the CSV.
+
+        Returns:
+            datetime: The parsed date.
+
+        Raises:
+            ValueError: If the value matches none of DATE_FORMATS.
+        """
+        if self.date_format:
+            try:
+                return parse_date_layout(value, self.date_format)
+            except ValueError:
+                pass
+
+        for date_format in DATE_FORMATS:
+            try:
+                return datetime.strptime(value, date_format)
+            except ValueError:
+                continue
+        raise ValueError(f"Unable to parse date: {value}")
+
+
+def parse_external_date(value):
+    """
+    Parse an external_date sent to the API.
+
+    Accepts ISO 8601, the RFC 1123 form the API itself returns (e.g.
+    'Mon, 15 Jan 2024 00:00:00 GMT') and the CSV layouts in DATE_FORMATS.
+    Time zones are dropped, keeping the wall-clock time, as the column has none.
+
+    Args:
+        value (str | datetime): The value from the request body.
+
+    Returns:
+        datetime: The parsed date, or None for None or an empty string.
+
+    Raises:
+        ValueError: If the value is not a date in any accepted format.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    if not isinstance(value, str):
+        raise ValueError(f"Unable to parse date: {value}")
+
+    try:
+        return datetime.fromisoformat(value).replace(tzinfo=None)
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value).replace(tzinfo=None)
+    except (TypeError, ValueError, IndexError):
+        pass
+    return DateParser().parse(value.strip())
+
+
+def parse_row(row, date_parser):
+    """
+    Parse and validate one CSV row without touching the database.
+
+    This is the CPU-bound half of the import. It is safe to run in a worker
+    process because it only needs the row and the date parser.
+
+    Args:
+        row (dict): The row as returned by csv.DictReader.
+        date_parser (DateParser): The parser for the file's date layout.
+
+    Returns:
+        tuple: ('skipped', None) for empty rows, ('error', message) for invalid
+        rows, or ('ok', values) with the parsed fields.
+    """
+    try:
+        # Get required fields
+        date_str = row.get('Date', '').strip()
+        merchant = row.get('Merchant', '').strip()
+        category_name = row.get('Category', '').strip()
+        account_name = row.get('Account', '').strip()
+        amount_str = row.get('Amount', '').strip()
+
+        # Get optional fields
+        original_statement = row.get('Original Statement', '').strip()
+        notes = row.get('Notes', '').strip()
+        tags = row.get('Tags', '').strip()
+
+        # Skip empty rows
+        if not all([date_str, merchant, category_name, account_name, amount_str]):
+            return ('skipped', None)
+
+        # Parse date
+        try:
+            external_date = date_parser.parse(date_str)
+        except ValueError as e:
+            return ('error', str(e))
+
+        # Parse amount
+        try:
+            amount = clean_dollar_value(amount_str)
+        except ValueError:
+            return ('error', f"Invalid amount '{amount_str}'")
+
+        return ('ok', {
+            'external_date': external_date,
+            'merchant': merchant,
+            'category_name': category_name,
+            'account_name': account_name,
+            'amount': amount,
+            'transaction_type': positive_or_negative(amount),
+            # Create unique external ID from date + merchant + amount
+            'external_id': f"{date_str}-{merchant}-{amount_str}".replace('/', '-').replace(' ', '-'),
+            'original_statement': original_statement,
+            'notes': notes,
+            'tags': tags
+        })
+    except Exception as e:
+        return ('error', str(e))
+
+
+def find_record_end(f, offset, in_quotes=False, block_size=1 << 16):
+    """
+    Find the end of the CSV record that contains a byte offset.
+
+    Args:
+        f (file): The CSV file opened in binary mode.
+        offset (int): Where to start looking.
+        in_quotes (bool): Whether offset falls inside a quoted field.
+        block_size (int): How many bytes to read at a time.
+
+    Returns:
+        int: The offset just past the next newline that is outside quotes, or EOF.
+    """
+    f.seek(offset)
+    position = offset
+    while True:
+        block = f.read(block_size)
+        if not block:
+            return position
+        start = 0
+        while True:
+            newline = block.find(b'\n', start)
+            if newline == -1:
+                if block.count(b'"', start) % 2:
+                    in_quotes = not in_quotes
+                break
+            if block.count(b'"', start, newline) % 2:
+                in_quotes = not in_quotes
+            if not in_quotes:
+                return position + newline + 1
+            start = newline + 1
+        position += len(block)
+
+
+def split_csv_ranges(path, data_start, chunk_bytes, block_size=1 << 16):
+    """
+    Split a CSV file into byte ranges that start and end on record boundaries.
+
+    Quote parity is tracked across the whole file so a newline inside a
+    quoted field is never used as a split point.
+
+    Args:
+        path (str): The CSV file.
+        data_start (int): The offset of the first record after the header.
+        chunk_bytes (int): The approximate size of each range.
+        block_size (int): How many bytes to read at a time.
+
+    Yields:
+        tuple: (start, end) byte offsets for each range.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        start = data_start
+        while start < size:
+            target = start + chunk_bytes
+            if target >= size:
+                yield (start, size)
+                return
+
+            # Work out whether the target falls inside a quoted field
+            f.seek(start)
+            in_quotes = False
+            position = start
+            while position < target:
+                block = f.read(min(block_size, target - position))
+                if not block:
+                    break
+                if block.count(b'"') % 2:
+                    in_quotes = not in_quotes
+                position += len(block)
+
+            end = find_record_end(f, position, in_quotes, block_size)
+            yield (start, end)
+            start = end
+
+
+def parse_csv_range(path, start, end, fieldnames, date_format, encoding='utf-8'):
+    """
+    Parse the records in one byte range of a CSV file.
+
+    Runs in a worker process. Returns one result per record, in file order,
+    so the caller can number rows by counting the results of earlier ranges.
+
+    Args:
+        path (str): The CSV file.
+        start (int): The offset of the first record in the range.
+        end (int): The offset just past the last record in the range.
+        fieldnames (list): The header row.
+        date_format (str): The date layout detected for the file.
+        encoding (str): The file encoding.
+
+    Returns:
+        list: parse_row() results for each record.
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    date_parser = DateParser(date_format)
+    reader = csv.DictReader(io.StringIO(data.decode(encoding), newline=''), fieldnames=fieldnames)
+    return [parse_row(row, date_parser) for row in reader]
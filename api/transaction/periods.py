@@ -0,0 +1,74 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import Date, cast, func, type_coerce
+from api.transaction.parsing import parse_external_date
+
+PERIODS = ('day', 'week', 'month')
+
+
+def truncate_date(column, period, dialect):
+    """
+    SQL expression for the first day of the period a datetime falls in.
+
+    PostgreSQL uses date_trunc; SQLite uses date() modifiers. Weeks start on
+    Monday in both.
+
+    Args:
+        column (ColumnElement): A DateTime column or expression.
+        period (str): One of PERIODS.
+        dialect (str): The database dialect name.
+
+    Returns:
+        ColumnElement: A Date-typed expression, NULL where the column is NULL.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"period must be one of: {', '.join(PERIODS)}")
+    if dialect == 'postgresql':
+        return cast(func.date_trunc(period, column), Date)
+    if period == 'day':
+        return type_coerce(func.date(column), Date)
+    if period == 'week':
+        # 'weekday 0' moves forward to Sunday (or stays on it); six days back is that week's Monday
+        return type_coerce(func.date(column, 'weekday 0', '-6 days'), Date)
+    return type_coerce(func.date(column, 'start of month'), Date)
+
+
+def period_start(value, period):
+    """
+    First day of the period a Python date or datetime falls in.
+
+    Args:
+        value (date | datetime | str): The value; strings are parsed with parsing.parse_external_date().
+        period (str): One of PERIODS.
+
+    Returns:
+        date: The period start, or None for None.
+    """
+    if isinstance(value, str):
+        value = parse_external_date(value)
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        value = value.date()
+    if period == 'day':
+        return value
+    if period == 'week':
+        return value - timedelta(days=value.weekday())
+    return value.replace(day=1)
+
+
+def next_period(start, period):
+    """
+    First day of the period after the one starting at start.
+
+    Args:
+        start (date): A period start, see period_start().
+        period (str): One of PERIODS.
+
+    Returns:
+        date: The next period start.
+    """
+    if period == 'day':
+        return start + timedelta(days=1)
+    if period == 'week':
+        return start + timedelta(days=7)
+    return date(start.year + start.month // 12, start.month % 12 + 1, 1)
@@ -0,0 +1,219 @@
+from datetime import datetime, time
+from sqlalchemy import bindparam, delete, event, func, inspect, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from app import db
+from api.transaction.models import TransactionModel
+from api.transaction.periods import truncate_date, period_start, next_period
+from api.transaction_rollup.models import TransactionRollupModel
+
+RECOMPUTE_CHUNK_SIZE = 200
+
+
+def _dialect(connection):
+    return (connection if isinstance(connection, Connection) else connection.get_bind()).dialect.name
+
+
+def rollup_key(user_id, categories_id, account_id, external_date):
+    """
+    The rollup row a transaction counts towards.
+
+    Args:
+        user_id (str): The transaction's user.
+        categories_id (str): The transaction's category.
+        account_id (str): The transaction's account.
+        external_date (datetime | str): The transaction's date.
+
+    Returns:
+        tuple: (user_id, month, categories_id, account_id), or None without a date.
+    """
+    month = period_start(external_date, 'month')
+    if month is None:
+        return None
+    return user_id, month, categories_id, account_id
+
+
+def add_to_rollups(connection, user_id, rows):
+    """
+    Add newly inserted transactions to their rollup rows.
+
+    Rows are aggregated per key in Python and written with one multi-row
+    upsert that adds the sums and counts and widens min/max, so a bulk
+    insert costs one statement however many months it touches. Dialects
+    without an upsert recompute the touched keys instead.
+
+    Args:
+        connection (Connection | Session): Where the write is happening.
+        user_id (str): The user the transactions belong to.
+        rows (iterable): (account_id, amount, categories_id, external_date) per inserted row.
+    """
+    totals = {}
+    for account_id, amount, categories_id, external_date in rows:
+        key = rollup_key(user_id, categories_id, account_id, external_date)
+        if key is None:
+            continue
+        total, count, low, high = totals.get(key, (0.0, 0, amount, amount))
+        totals[key] = (total + amount, count + 1, min(low, amount), max(high, amount))
+    if not totals:
+        return
+
+    dialect = _dialect(connection)
+    if dialect not in ('postgresql', 'sqlite'):
+        recompute_rollups(connection, totals)
+        return
+
+    table = TransactionRollupModel.__table__
+    insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    # SQLite's two-argument min()/max() are scalar, like least()/greatest()
+    least, greatest = (func.least, func.greatest) if dialect == 'postgresql' else (func.min, func.max)
+    stmt = insert(table).values([
+        {
+            'user_id': user, 'month': month, 'categories_id': categories_id, 'account_id': account_id,
+            'total': total, 'count': count, 'min_amount': low, 'max_amount': high
+        }
+        for (user, month, categories_id, account_id), (total, count, low, high) in totals.items()
+    ])
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=['user_id', 'month', 'categories_id', 'account_id'],
+        set_={
+            'total': table.c.total + stmt.excluded.total,
+            'count': table.c.count + stmt.excluded.count,
+            'min_amount': least(table.c.min_amount, stmt.excluded.min_amount),
+            'max_amount': greatest(table.c.max_amount, stmt.excluded.max_amount)
+        }
+    ))
+
+
+def recompute_rollups(connection, keys):
+    """
+    Rebuild rollup rows from the transactions they cover.
+
+    Minimums and maximums cannot be taken back when a transaction leaves a
+    row, so updates and deletes recompute the keys they touched. Each key is
+    one indexed aggregate over a single month of one category and account.
+
+    Args:
+        connection (Connection | Session): Where the write is happening.
+        keys (iterable): (user_id, month, categories_id, account_id) tuples.
+    """
+    keys = [key for key in set(keys) if key is not None]
+    table = TransactionRollupModel.__table__
+    transaction = TransactionModel.__table__
+
+    # One INSERT ... SELECT per key, sent as an executemany; HAVING skips keys with no rows left
+    refill = table.insert().from_select(
+        ['user_id', 'month', 'categories_id', 'account_id', 'total', 'count', 'min_amount', 'max_amount'],
+        select(
+            bindparam('r_user_id'), bindparam('r_month', type_=TransactionRollupModel.month.type),
+            bindparam('r_categories_id'), bindparam('r_account_id'),
+            func.sum(transaction.c.amount), func.count(), func.min(transaction.c.amount), func.max(transaction.c.amount)
+        ).where(
+            transaction.c.user_id == bindparam('r_user_id'),
+            transaction.c.categories_id == bindparam('r_categories_id'),
+            transaction.c.account_id == bindparam('r_account_id'),
+            transaction.c.external_date >= bindparam('r_start', type_=transaction.c.external_date.type),
+            transaction.c.external_date < bindparam('r_end', type_=transaction.c.external_date.type)
+        ).having(func.count() > 0)
+    )
+
+    for start in range(0, len(keys), RECOMPUTE_CHUNK_SIZE):
+        chunk = keys[start:start + RECOMPUTE_CHUNK_SIZE]
+        connection.execute(delete(table).where(
+            tuple_(table.c.user_id, table.c.month, table.c.categories_id, table.c.account_id).in_(chunk)
+        ))
+        connection.execute(refill, [
+            {
+                'r_user_id': user_id, 'r_month': month, 'r_categories_id': categories_id, 'r_account_id': account_id,
+                'r_start': datetime.combine(month, time()),
+                'r_end': datetime.combine(next_period(month, 'month'), time())
+            }
+            for user_id, month, categories_id, account_id in chunk
+        ])
+
+
+def rollup_keys(query):
+    """
+    The rollup keys of every transaction a query matches.
+
+    Args:
+        query (Query): A TransactionModel query.
+
+    Returns:
+        set: (user_id, month, categories_id, account_id) tuples.
+    """
+    month = truncate_date(TransactionModel.external_date, 'month', db.session.get_bind().dialect.name)
+    rows = query.order_by(None).filter(TransactionModel.external_date.isnot(None)).with_entities(
+        TransactionModel.user_id, month, TransactionModel.categories_id, TransactionModel.account_id
+    ).distinct()
+    return {tuple(row) for row in rows}
+
+
+def rebuild_rollups(user_id=None):
+    """
+    Rebuild the rollup table from scratch, for backfills and after bulk fixes.
+
+    Each user's rows are replaced with one grouped INSERT ... SELECT and
+    committed on their own.
+
+    Args:
+        user_id (str): Only rebuild this user's rows.
+
+    Returns:
+        int: The number of rollup rows written.
+    """
+    table = TransactionRollupModel.__table__
+    transaction = TransactionModel.__table__
+    month = truncate_date(transaction.c.external_date, 'month', db.session.get_bind().dialect.name)
+
+    if user_id is not None:
+        users = [user_id]
+    else:
+        users = db.session.execute(select(transaction.c.user_id).distinct()).scalars().all()
+        # Users whose transactions are all gone still have rows to clear
+        users += [user for user in db.session.execute(select(table.c.user_id).distinct()).scalars() if user not in set(users)]
+
+    written = 0
+    for user in users:
+        db.session.execute(delete(table).where(table.c.user_id == user))
+        result = db.session.execute(table.insert().from_select(
+            ['user_id', 'month', 'categories_id', 'account_id', 'total', 'count', 'min_amount', 'max_amount'],
+            select(
+                transaction.c.user_id, month, transaction.c.categories_id, transaction.c.account_id,
+                func.sum(transaction.c.amount), func.count(), func.min(transaction.c.amount), func.max(transaction.c.amount)
+            )
+            .where(transaction.c.user_id == user, transaction.c.external_date.isnot(None))
+            .group_by(transaction.c.user_id, month, transaction.c.categories_id, transaction.c.account_id)
+        ))
+        written += result.rowcount
+        db.session.commit()
+    return written
+
+
+def _old_key(target):
+    state = inspect(target)
+
+    def old(name):
+        history = state.attrs[name].history
+        return history.deleted[0] if history.deleted else getattr(target, name)
+
+    return rollup_key(target.user_id, old('categories_id'), old('account_id'), old('external_date'))
+
+
+@event.listens_for(TransactionModel, 'after_insert')
+def _rollup_insert(mapper, connection, target):
+    add_to_rollups(connection, target.user_id, [(target.account_id, target.amount, target.categories_id, target.external_date)])
+
+
+@event.listens_for(TransactionModel, 'after_delete')
+def _rollup_delete(mapper, connection, target):
+    recompute_rollups(connection, [_old_key(target)])
+
+
+@event.listens_for(TransactionModel, 'after_update')
+def _rollup_update(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in ('amount', 'categories_id', 'account_id', 'external_date')):
+        recompute_rollups(connection, [
+            _old_key(target),
+            rollup_key(target.user_id, target.categories_id, target.account_id, target.external_date)
+        ])
@@ -0,0 +1,136 @@
+import re
+import json
+import base64
+import binascii
+from sqlalchemy import Float, and_, or_, cast, func, literal_column, table, column, text
+from api.transaction.models import TransactionModel, SEARCH_TABLE, SEARCH_COLUMNS
+from api.transaction.pagination import InvalidCursor
+
+# Only word characters reach the tsquery / MATCH expression, so user input
+# can never inject query syntax
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+MAX_TOKENS = 8
+
+
+def search_tokens(q):
+    """
+    Split a search string into lowercase word tokens.
+
+    Args:
+        q (str): The raw ?q= parameter.
+
+    Returns:
+        list: Up to MAX_TOKENS tokens, empty when q has no words.
+    """
+    return [token.lower() for token in _TOKEN.findall(q or '')][:MAX_TOKENS]
+
+
+def search_rank(query, tokens, dialect):
+    """
+    Restrict a transaction query to rows matching every token and compute their rank.
+
+    Each token is matched as a prefix, so 'walm' finds 'Walmart'. PostgreSQL
+    uses the GIN-indexed search_vector column and ts_rank; SQLite joins the
+    FTS5 table on id and uses bm25 (negated so that, as with ts_rank, higher is better).
+
+    Args:
+        query (Query): A TransactionModel query.
+        tokens (list): Tokens from search_tokens(); must not be empty.
+        dialect (str): The database dialect name.
+
+    Returns:
+        tuple: (filtered query, rank expression).
+    """
+    if dialect == 'postgresql':
+        vector = literal_column('"transaction".search_vector')
+        tsquery = func.to_tsquery('simple', ' & '.join(f'{token}:*' for token in tokens))
+        # ts_rank returns real; compare as double so cursor values round-trip exactly
+        return query.filter(vector.op('@@')(tsquery)), cast(func.ts_rank(vector, tsquery), Float)
+
+    # The FTS5 table also indexes id; only the text columns are searched
+    phrases = ' '.join(f'"{token}"*' for token in tokens)
+    match = '{' + ' '.join(SEARCH_COLUMNS) + '} : (' + phrases + ')'
+    fts = table(SEARCH_TABLE, column('id'))
+    query = query.join(fts, fts.c.id == TransactionModel.id).filter(
+        text(f'{SEARCH_TABLE} MATCH :match').bindparams(match=match)
+    )
+    return query, -func.bm25(literal_column(SEARCH_TABLE))
+
+
+def encode_search_cursor(q, rank, id):
+    """
+    Build the cursor that points just past a search result.
+
+    Args:
+        q (str): The search string the page was fetched with.
+        rank (float): The last result's rank.
+        id (str): The last result's transaction ID.
+
+    Returns:
+        str: URL-safe base64 of the query and the row's (rank, id) key.
+    """
+    payload = json.dumps({'q': q, 'r': rank, 'id': id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_search_cursor(cursor, q):
+    """
+    Decode a cursor produced by encode_search_cursor.
+
+    Args:
+        cursor (str): The cursor from the query string.
+        q (str): The search string of the current request; it must match the cursor's.
+
+    Returns:
+        tuple: (rank, id) of the last result on the previous page.
+
+    Raises:
+        InvalidCursor: If the cursor is malformed or was issued for another search.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        cursor_q, rank, id = payload['q'], float(payload['r']), str(payload['id'])
+    except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError):
+        raise InvalidCursor('Invalid cursor')
+
+    if cursor_q != q:
+        raise InvalidCursor('Cursor was issued for a different search')
+    return rank, id
+
+
+def search_page(query, q, dialect, per_page, cursor=None):
+    """
+    Fetch one page of ranked search results using keyset pagination.
+
+    Results are ordered by (rank DESC, id DESC). The rank is recomputed in
+    SQL on every page, so the cursor compares against the same expression
+    the previous page was ordered by.
+
+    Args:
+        query (Query): A TransactionModel query with any filters applied.
+        q (str): The search string.
+        dialect (str): The database dialect name.
+        per_page (int): Page size.
+        cursor (str): The next_cursor from the previous page, or None for the first page.
+
+    Returns:
+        tuple: (list of (transaction, rank) pairs, next_cursor), where next_cursor
+            is None on the last page.
+
+    Raises:
+        InvalidCursor: If the cursor is malformed.
+    """
+    query, rank = search_rank(query, search_tokens(q), dialect)
+    rank = rank.label('rank')
+    if cursor:
+        last_rank, last_id = decode_search_cursor(cursor, q)
+        query = query.filter(or_(rank < last_rank, and_(rank == last_rank, TransactionModel.id < last_id)))
+
+    rows = query.add_columns(rank).order_by(rank.desc(), TransactionModel.id.desc()).limit(per_page + 1).all()
+    rows = [(transaction, float(rank)) for transaction, rank in rows]
+    if len(rows) <= per_page:
+        return rows, None
+    rows = rows[:per_page]
+    transaction, rank = rows[-1]
+    return rows, encode_search_cursor(q, rank, transaction.id)
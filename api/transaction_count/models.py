@@ -0,0 +1,58 @@
+from app import db
+
+
+class TransactionCountModel(db.Model):
+    """
+    TransactionCountModel represents the transaction_count table in the database.
+
+    One row per user holds the number of transactions the user has and a
+    version that is bumped on every write to the user's transactions. Rows
+    are created from a real COUNT(*) by the user's first write, and kept
+    current by the write paths (see api/transaction/counts.py).
+
+    Attributes:
+        user_id (str): The ID of the user the counter belongs to.
+        total (int): The number of transactions the user has.
+        version (int): Incremented on every insert, update or delete.
+    """
+
+    __tablename__ = 'transaction_count'
+    # No foreign key: the list may be scoped to any ?user_id=, and a counter is only a cache
+    user_id = db.Column('user_id', db.Text, primary_key=True)
+    total = db.Column(db.BigInteger, nullable=False, default=0)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __init__(self, user_id, total, version=0):
+        """
+        Initialize a TransactionCountModel instance.
+
+        Args:
+            user_id (str): The ID of the user the counter belongs to.
+            total (int): The number of transactions the user has.
+            version (int): The starting version.
+        """
+        self.user_id = user_id
+        self.total = total
+        self.version = version
+
+    def __repr__(self):
+        """
+        Return a string representation of the TransactionCountModel instance.
+
+        Returns:
+            str: String representation of the counter.
+        """
+        return f'<TransactionCount {self.user_id!r} {self.total!r}>'
+
+    def to_dict(self):
+        """
+        Convert the TransactionCountModel instance to a dictionary.
+
+        Returns:
+            dict: Dictionary representation of the counter.
+        """
+        return {
+            'user_id': self.user_id,
+            'total': self.total,
+            'version': self.version
+        }
@@ -0,0 +1,86 @@
+from app import db
+
+
+class TransactionRollupModel(db.Model):
+    """
+    TransactionRollupModel represents the transaction_rollup table in the database.
+
+    One row per (user, month, category, account) holds the sum, count, minimum
+    and maximum of the matching transactions' amounts, so monthly reports read
+    a few rows per month instead of scanning transactions. Transactions
+    without an external_date have no month and are left out. Rows are kept
+    current by the write paths (see api/transaction/rollups.py), backfilled on
+    existing databases by scripts/add_transaction_rollups.py and can be
+    rebuilt with 'flask rebuild-rollups'.
+
+    Attributes:
+        user_id (str): The ID of the user the transactions belong to.
+        month (date): The first day of the month.
+        categories_id (str): The category of the transactions.
+        account_id (str): The account of the transactions.
+        total (float): The sum of the amounts.
+        count (int): The number of transactions.
+        min_amount (float): The smallest amount.
+        max_amount (float): The largest amount.
+    """
+
+    __tablename__ = 'transaction_rollup'
+    # No foreign keys: a rollup row is derived data and must not block writes or deletes
+    user_id = db.Column('user_id', db.Text, primary_key=True)
+    month = db.Column(db.Date, primary_key=True)
+    categories_id = db.Column('categories_id', db.Text, primary_key=True)
+    account_id = db.Column('account_id', db.Text, primary_key=True)
+    total = db.Column(db.Float, nullable=False, default=0)
+    count = db.Column(db.BigInteger, nullable=False, default=0)
+    min_amount = db.Column(db.Float, nullable=True)
+    max_amount = db.Column(db.Float, nullable=True)
+
+    def __init__(self, user_id, month, categories_id, account_id, total=0, count=0, min_amount=None, max_amount=None):
+        """
+        Initialize a TransactionRollupModel instance.
+
+        Args:
+            user_id (str): The ID of the user the transactions belong to.
+            month (date): The first day of the month.
+            categories_id (str): The category of the transactions.
+            account_id (str): The account of the transactions.
+            total (float): The sum of the amounts.
+            count (int): The number of transactions.
+            min_amount (float): The smallest amount.
+            max_amount (float): The largest amount.
+        """
+        self.user_id = user_id
+        self.month = month
+        self.categories_id = categories_id
+        self.account_id = account_id
+        self.total = total
+        self.count = count
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+
+    def __repr__(self):
+        """
+        Return a string representation of the TransactionRollupModel instance.
+
+        Returns:
+            str: String representation of the rollup row.
+        """
+        return f'<TransactionRollup {self.user_id!r} {self.month!r} {self.categories_id!r} {self.account_id!r}>'
+
+    def to_dict(self):
+        """
+        Convert the TransactionRollupModel instance to a dictionary.
+
+        Returns:
+            dict: Dictionary representation of the rollup row.
+        """
+        return {
+            'user_id': self.user_id,
+            'month': self.month.isoformat(),
+            'categories_id': self.categories_id,
+            'account_id': self.account_id,
+            'total': self.total,
+            'count': self.count,
+            'min_amount': self.min_amount,
+            'max_amount': self.max_amount
+        }
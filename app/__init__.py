@@ -2,6 +2,7 @@
 from datetime import datetime
 # Flask
 import babel.dates
+import click
 from flask import Flask
 from flask import g
 # Flask Restx
@@ -61,13 +62,50 @@ def create_app():
         from api.categories_type.controllers import CategoriesType
         from api.categories.controllers import Categories
         from api.transaction.controllers import Transaction
+        from api.reports.controllers import ReportSummary
+
+        # ETags on list endpoints follow per-user data versions
+        from api.data_version.tracking import track_data_versions
+        track_data_versions()
 
         #CLI
-        from app.cli import insert_categories
+        from app.cli import (
+            insert_categories, recompute_balances, verify_balances, verify_transaction_counts, rebuild_rollups,
+            recover_import_jobs, DEFAULT_RECOMPUTE_CHUNK_SIZE
+        )
         @app.cli.command('insert-categories')
         def insert_cat():
             insert_categories()
 
+        @app.cli.command('recompute-balances')
+        @click.option('--chunk-size', default=DEFAULT_RECOMPUTE_CHUNK_SIZE, show_default=True, help='Accounts per UPDATE and commit')
+        def recompute_bal(chunk_size):
+            recompute_balances(chunk_size)
+
+        @app.cli.command('verify-balances')
+        @click.option('--user-id', default=None, help='Only check this user')
+        @click.option('--fix', is_flag=True, help='Recompute the balances that drifted')
+        def verify_bal(user_id, fix):
+            if verify_balances(user_id, fix) and not fix:
+                raise SystemExit(1)
+
+        @app.cli.command('verify-transaction-counts')
+        @click.option('--user-id', default=None, help='Only check this user')
+        @click.option('--fix', is_flag=True, help='Recount the counters that drifted')
+        def verify_counts(user_id, fix):
+            if verify_transaction_counts(user_id, fix) and not fix:
+                raise SystemExit(1)
+
+        @app.cli.command('rebuild-rollups')
+        @click.option('--user-id', default=None, help='Only rebuild this user')
+        def rebuild_roll(user_id):
+            rebuild_rollups(user_id)
+
+        @app.cli.command('recover-import-jobs')
+        def recover_imports():
+            """Run once per deployment, before the web workers start, to pick up imports a restart interrupted"""
+            recover_import_jobs(app)
+
         db.create_all()
 
     @login_manager.user_loader
@@ -7,6 +7,13 @@ from app.config import Config
 from api.categories_type.models import CategoriesTypeModel as CategoriesType
 from api.categories_group.models import CategoriesGroupModel as CategoriesGroup
 from api.categories.models import CategoriesModel as Categories
+from api.institution_account.balances import (
+    recompute_all_balances, recompute_balances as recompute_account_balances, verify_balances as find_balance_drift,
+    DEFAULT_RECOMPUTE_CHUNK_SIZE
+)
+from api.transaction.rollups import rebuild_rollups as rebuild_transaction_rollups
+from api.transaction.counts import recount_transactions, verify_transaction_counts as find_count_drift
+from api.transaction.importer import recover_import_jobs as recover_interrupted_imports
 
 def insert_categories():
     user_id = Config.DEFAULT_USER_ID
@@ -51,3 +58,44 @@ def insert_categories():
                 cat = Categories(name=category, categories_group_id=_category_group_id, categories_type_id=_category_type_id, user_id=user_id)
                 db.session.add(cat)
                 db.session.commit()
+
+def recompute_balances(chunk_size):
+    updated = recompute_all_balances(chunk_size)
+    print(f"Recomputed {updated} account balances")
+
+def verify_balances(user_id=None, fix=False):
+    drift = find_balance_drift(user_id)
+    for account in drift:
+        print(f"{account['account_id']} ({account['name']}): stored {account['stored']}, expected {account['expected']}")
+    if drift and fix:
+        recompute_account_balances(db.session, account_ids=[account['account_id'] for account in drift])
+        db.session.commit()
+        print(f"Fixed {len(drift)} account balances")
+    elif not drift:
+        print("All account balances match their transactions")
+    return drift
+
+def verify_transaction_counts(user_id=None, fix=False):
+    drift = find_count_drift(user_id)
+    for counter in drift:
+        print(f"{counter['user_id']}: stored {counter['stored']}, expected {counter['expected']}")
+    if drift and fix:
+        recount_transactions([counter['user_id'] for counter in drift])
+        db.session.commit()
+        print(f"Fixed {len(drift)} transaction counts")
+    elif not drift:
+        print("All transaction counts match their transactions")
+    return drift
+
+def recover_import_jobs(app):
+    recovered = recover_interrupted_imports(app)
+    print(
+        f"Resubmitted {recovered['resubmitted']} queued import jobs, failed {recovered['failed']} interrupted ones "
+        f"and removed {recovered['removed']} orphaned uploads"
+    )
+    # The pool's threads are joined at exit, so resubmitted imports finish before the command returns
+    return recovered
+
+def rebuild_rollups(user_id=None):
+    written = rebuild_transaction_rollups(user_id)
+    print(f"Rebuilt {written} transaction rollup rows")
@@ -89,12 +89,24 @@ uploadBtn.addEventListener('click', async () => {
     formData.append('file', selectedFile);
 
     try {
-        const response = await fetch('/api/transaction/csv_import', {
+        const response = await fetch('/api/transaction/csv_import?async=1', {
             method: 'POST',
             body: formData
         });
 
-        const data = await response.json();
+        let data = await response.json();
+
+        // Large imports run as a background job; poll until it finishes
+        if (response.status === 202) {
+            const job = await waitForImportJob(data.status_url);
+            if (job.status === 'failed') {
+                progressBar.style.display = 'none';
+                resultMessage.style.display = 'block';
+                showError(job.error || 'Import failed');
+                return;
+            }
+            data = job.result;
+        }
 
         // Hide progress bar
         progressBar.style.display = 'none';
@@ -113,6 +125,27 @@ uploadBtn.addEventListener('click', async () => {
     }
 });
 
+// Poll an import job, updating the progress text, until it completes or fails
+async function waitForImportJob(statusUrl) {
+    const progressText = progressBar.querySelector('p');
+    while (true) {
+        const response = await fetch(statusUrl);
+        const job = (await response.json()).job;
+        if (!response.ok || !job) {
+            throw new Error('Import job not found');
+        }
+        if (job.status === 'completed' || job.status === 'failed') {
+            return job;
+        }
+        let text = `Processed ${job.rows_parsed} rows (${job.rows_created} created)`;
+        if (job.eta_seconds !== null) {
+            text += ` - about ${Math.ceil(job.eta_seconds)}s remaining`;
+        }
+        progressText.textContent = text;
+        await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+}
+
 // Show success message
 function showSuccess(data) {
     let errorDetailsHtml = '';
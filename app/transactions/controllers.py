@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, url_for, session
+from flask import Blueprint, render_template, url_for, session, request
 from flask_login import login_required
 import requests
 
@@ -12,12 +12,15 @@ def transactions():
 
     This view function fetches the transactions from an external API and renders
     the transactions/index.html template with the fetched transactions and the user ID
-    from the session.
+    from the session. Query parameters such as ?date_from= or ?account_id= are
+    passed through to the API so filtering happens in SQL.
 
     Returns:
         str: Rendered HTML template for the transactions page.
     """
-    api_url = url_for('transaction', _external=True)
+    # The API call carries no session cookie, so scope it and pass the page's filters through
+    user_id = session.get('_user_id')
+    api_url = url_for('transaction', _external=True, **{**request.args.to_dict(), 'user_id': user_id})
     _transactions = requests.get(api_url, timeout=15).json().get('transactions', [])
 
     # Fetch categories and accounts for edit modal
@@ -27,7 +30,6 @@ def transactions():
     accounts_url = url_for('institution_account', _external=True)
     _accounts = requests.get(accounts_url, timeout=15).json().get('accounts', [])
 
-    user_id = session.get('_user_id')
     return render_template('transactions/index.html',
                          transactions=_transactions,
                          categories=_categories,
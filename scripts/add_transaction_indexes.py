@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Migration script to add indexes to the transaction table
+"""
+import os
+import sys
+
+# Change to project root directory (parent of scripts directory)
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(project_root)
+sys.path.insert(0, project_root)
+
+from app import create_app, db
+from sqlalchemy import text
+
+app = create_app()
+
+with app.app_context():
+    try:
+        # Imports rely on this index to skip duplicates with ON CONFLICT DO NOTHING.
+        # Creation fails if the table already holds duplicate (user_id, external_id) pairs.
+        db.session.execute(text("""
+            CREATE UNIQUE INDEX IF NOT EXISTS ix_transaction_user_external_id
+            ON transaction (user_id, external_id);
+        """))
+        db.session.commit()
+        print("✓ Successfully added ix_transaction_user_external_id to transaction table")
+    except Exception as e:
+        print(f"✗ Error adding ix_transaction_user_external_id: {e}")
+        db.session.rollback()
+
+    try:
+        # Serves the keyset-paginated transaction list ordered by (external_date DESC NULLS LAST, id DESC)
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_transaction_external_date_id
+            ON transaction (external_date DESC NULLS LAST, id DESC);
+        """))
+        db.session.commit()
+        print("✓ Successfully added ix_transaction_external_date_id to transaction table")
+    except Exception as e:
+        print(f"✗ Error adding ix_transaction_external_date_id: {e}")
+        db.session.rollback()
+
+    # Serve the per-user filters on the transaction list in the same order
+    composite_indexes = {
+        'ix_transaction_user_date': 'user_id',
+        'ix_transaction_user_account_date': 'user_id, account_id',
+        'ix_transaction_user_category_date': 'user_id, categories_id',
+    }
+    for name, prefix in composite_indexes.items():
+        try:
+            db.session.execute(text(f"""
+                CREATE INDEX IF NOT EXISTS {name}
+                ON transaction ({prefix}, external_date DESC NULLS LAST, id DESC);
+            """))
+            db.session.commit()
+            print(f"✓ Successfully added {name} to transaction table")
+        except Exception as e:
+            print(f"✗ Error adding {name}: {e}")
+            db.session.rollback()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the transaction_rollup table and backfill it from existing transactions
+"""
+import os
+import sys
+
+# Change to project root directory (parent of scripts directory)
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(project_root)
+sys.path.insert(0, project_root)
+
+from app import create_app, db
+from api.transaction.rollups import rebuild_rollups
+from api.transaction_rollup.models import TransactionRollupModel
+
+app = create_app()
+
+with app.app_context():
+    try:
+        TransactionRollupModel.__table__.create(db.engine, checkfirst=True)
+        print("✓ Successfully added transaction_rollup table")
+    except Exception as e:
+        print(f"✗ Error adding transaction_rollup table: {e}")
+
+    try:
+        # Month-grouped reports read these rows instead of scanning transactions
+        written = rebuild_rollups()
+        print(f"✓ Successfully backfilled {written} transaction rollup rows")
+    except Exception as e:
+        print(f"✗ Error backfilling transaction rollups: {e}")
+        db.session.rollback()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Migration script to add full-text search to the transaction table
+
+PostgreSQL gets the generated search_vector column and its GIN index; SQLite
+gets the FTS5 table and the triggers that keep it in sync, and is then
+filled from the existing rows. An earlier SQLite index keyed on rowid is
+dropped and rebuilt keyed on id.
+"""
+import os
+import sys
+
+# Change to project root directory (parent of scripts directory)
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(project_root)
+sys.path.insert(0, project_root)
+
+from app import create_app, db
+from sqlalchemy import text
+from api.transaction.models import SEARCH_DDL, SEARCH_TABLE, SEARCH_COLUMNS
+
+app = create_app()
+
+with app.app_context():
+    dialect = db.engine.dialect.name
+    if dialect not in SEARCH_DDL:
+        print(f"✗ Full-text search is not supported on {dialect}")
+        sys.exit(1)
+
+    try:
+        if dialect == 'sqlite':
+            for trigger in ('ai', 'ad', 'au'):
+                db.session.execute(text(f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_{trigger}'))
+            db.session.execute(text(f'DROP TABLE IF EXISTS {SEARCH_TABLE}'))
+        # Adding the generated column rewrites the table once, filling every row's vector
+        for statement in SEARCH_DDL[dialect]:
+            db.session.execute(text(statement))
+        if dialect == 'sqlite':
+            columns = ', '.join(('id',) + SEARCH_COLUMNS)
+            db.session.execute(text(f'INSERT INTO {SEARCH_TABLE}({columns}) SELECT {columns} FROM "transaction"'))
+        db.session.commit()
+        print("✓ Successfully added full-text search to transaction table")
+    except Exception as e:
+        print(f"✗ Error adding full-text search: {e}")
+        db.session.rollback()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark the transaction import write paths: COPY FROM STDIN vs multi-row INSERT
+
+Usage:
+    python scripts/benchmark_import.py [--rows 1000000] [--chunk-size 5000]
+
+Runs against the database configured in app/config.py. A throwaway user,
+category and account are created for the run and removed afterwards. The
+COPY path is only available on PostgreSQL with psycopg2.
+"""
+import os
+import sys
+import time
+import uuid
+import argparse
+from datetime import datetime, timedelta
+
+# Change to project root directory (parent of scripts directory)
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(project_root)
+sys.path.insert(0, project_root)
+
+from app import create_app, db
+from api.user.models import User
+from api.institution.models import InstitutionModel
+from api.institution_account.models import InstitutionAccountModel
+from api.categories_type.models import CategoriesTypeModel
+from api.categories_group.models import CategoriesGroupModel
+from api.categories.models import CategoriesModel
+from api.transaction.models import TransactionModel
+from api.transaction.importer import TransactionImporter
+
+
+def synthetic_rows(user_id, categories_id, account_id, count):
+    start = datetime(2015, 1, 1)
+    for i in range(count):
+        amount = round(((i * 7919) % 100000) / 100 - 500, 2)
+        yield {
+            'user_id': user_id,
+            'categories_id': categories_id,
+            'account_id': account_id,
+            'amount': amount,
+            'transaction_type': 'Withdrawal' if amount < 0 else 'Deposit',
+            'external_id': f'BENCH-{i}',
+            'external_date': start + timedelta(minutes=i),
+            'merchant': f'Merchant {i % 500}',
+            'original_statement': f'POS PURCHASE {i}',
+            'notes': '',
+            'tags': '',
+            'description': None
+        }
+
+
+def run(importer, rows, chunk_size):
+    created = 0
+    chunk = []
+    started = time.perf_counter()
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            created += len(importer.insert_chunk(chunk))
+            db.session.commit()
+            chunk = []
+    if chunk:
+        created += len(importer.insert_chunk(chunk))
+        db.session.commit()
+    return created, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        suffix = uuid.uuid4().hex[:8]
+        user = User(email=f'bench-{suffix}@example.com', username=f'bench-{suffix}', password='', first_name='Bench', last_name='User')
+        user.save()
+        institution = InstitutionModel(user_id=user.id, name='Bench Bank', location=None, description=None)
+        institution.save()
+        account = InstitutionAccountModel(
+            institution_id=institution.id, user_id=user.id, name='Bench Checking', status='active', balance=0,
+            starting_balance=0, account_type='checking', account_class='asset', number='0'
+        )
+        account.save()
+        cat_type = CategoriesTypeModel(user_id=user.id, name='Expense')
+        cat_type.save()
+        cat_group = CategoriesGroupModel(user_id=user.id, name='Bench')
+        cat_group.save()
+        category = CategoriesModel(user_id=user.id, categories_group_id=cat_group.id, categories_type_id=cat_type.id, name='Bench')
+        category.save()
+
+        bind = db.session.get_bind()
+        paths = [('insert', False)]
+        if bind.dialect.name == 'postgresql' and bind.dialect.driver == 'psycopg2':
+            paths.insert(0, ('copy', True))
+        else:
+            print(f'COPY not available on {bind.dialect.name}+{bind.dialect.driver}, benchmarking INSERT only')
+
+        try:
+            for name, use_copy in paths:
+                importer = TransactionImporter(user.id, use_copy=use_copy)
+                rows = synthetic_rows(user.id, category.id, account.id, args.rows)
+                created, elapsed = run(importer, rows, args.chunk_size)
+                print(f'{name:>6}: {created} rows in {elapsed:.2f}s ({created / elapsed:,.0f} rows/sec)')
+
+                TransactionModel.query.filter_by(user_id=user.id).delete()
+                db.session.commit()
+        finally:
+            db.session.rollback()
+            TransactionModel.query.filter_by(user_id=user.id).delete()
+            for model in (CategoriesModel, CategoriesGroupModel, CategoriesTypeModel, InstitutionAccountModel, InstitutionModel):
+                model.query.filter_by(user_id=user.id).delete()
+            User.query.filter_by(id=user.id).delete()
+            db.session.commit()
+
+
+if __name__ == '__main__':
+    main()
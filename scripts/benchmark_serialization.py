@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark transaction list serialization: ORM models + to_dict() vs projected rows
+
+Usage:
+    python scripts/benchmark_serialization.py [--rows 100000] [--fields amount,merchant]
+
+Runs against the database configured in app/config.py. A throwaway user,
+category and account are created, --rows transactions are bulk-inserted, and
+both read paths serialize all of them the way GET /api/transaction does:
+the ORM path with eager loading (api/transaction/models.py) and the projected
+path that builds dicts straight from rows (api/transaction/projection.py).
+Everything is removed afterwards.
+"""
+import os
+import sys
+import time
+import uuid
+import argparse
+
+# Change to project root directory (parent of scripts directory)
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(project_root)
+sys.path.insert(0, project_root)
+
+from app import create_app, db
+from api.user.models import User
+from api.institution.models import InstitutionModel
+from api.institution_account.models import InstitutionAccountModel
+from api.categories_type.models import CategoriesTypeModel
+from api.categories_group.models import CategoriesGroupModel
+from api.categories.models import CategoriesModel
+from api.transaction.models import TransactionModel, eager_relationships, sparse_columns
+from api.transaction.importer import TransactionImporter
+from api.transaction.projection import project
+from api.helpers import parse_fields
+from benchmark_import import synthetic_rows, run
+
+
+def orm_rows(user_id, fields, expand):
+    query = TransactionModel.query.filter_by(user_id=user_id).options(*eager_relationships(expand))
+    if expand is not None:
+        query = query.options(sparse_columns(fields, expand))
+    return [transaction.to_dict(fields, expand) for transaction in query.all()]
+
+
+def projected_rows(user_id, fields, expand):
+    query, serialize = project(TransactionModel.query.filter_by(user_id=user_id), fields, expand)
+    return serialize(query.all())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--fields', default=None, help='Benchmark sparse output, e.g. amount,merchant')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per path; the best is reported')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        fields = parse_fields(args.fields, TransactionModel.SERIALIZED_COLUMNS)
+        expand = {} if fields is not None else None
+
+        suffix = uuid.uuid4().hex[:8]
+        user = User(email=f'bench-{suffix}@example.com', username=f'bench-{suffix}', password='', first_name='Bench', last_name='User')
+        user.save()
+        institution = InstitutionModel(user_id=user.id, name='Bench Bank', location=None, description=None)
+        institution.save()
+        account = InstitutionAccountModel(
+            institution_id=institution.id, user_id=user.id, name='Bench Checking', status='active', balance=0,
+            starting_balance=0, account_type='checking', account_class='asset', number='0'
+        )
+        account.save()
+        cat_type = CategoriesTypeModel(user_id=user.id, name='Expense')
+        cat_type.save()
+        cat_group = CategoriesGroupModel(user_id=user.id, name='Bench')
+        cat_group.save()
+        category = CategoriesModel(user_id=user.id, categories_group_id=cat_group.id, categories_type_id=cat_type.id, name='Bench')
+        category.save()
+
+        user_id = user.id
+        try:
+            created, _ = run(TransactionImporter(user_id), synthetic_rows(user_id, category.id, account.id, args.rows), 5000)
+            print(f'Serializing {created} rows ({"fields=" + args.fields if args.fields else "full output"})')
+
+            results = {}
+            for name, serialize in (('orm', orm_rows), ('projected', projected_rows)):
+                best = None
+                for _ in range(args.repeat):
+                    db.session.expunge_all()
+                    started = time.perf_counter()
+                    results[name] = serialize(user_id, fields, expand)
+                    elapsed = time.perf_counter() - started
+                    best = elapsed if best is None else min(best, elapsed)
+                print(f'{name:>10}: {best:.2f}s ({created / best:,.0f} rows/sec)')
+
+            key = lambda row: row['id']
+            assert sorted(results['orm'], key=key) == sorted(results['projected'], key=key), 'Outputs differ'
+        finally:
+            db.session.rollback()
+            TransactionModel.query.filter_by(user_id=user_id).delete()
+            for model in (CategoriesModel, CategoriesGroupModel, CategoriesTypeModel, InstitutionAccountModel, InstitutionModel):
+                model.query.filter_by(user_id=user_id).delete()
+            User.query.filter_by(id=user_id).delete()
+            db.session.commit()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
 """Pytest configuration and fixtures for OSPF tests"""
 import os
 import pytest
+from contextlib import contextmanager
 from sqlalchemy import event
 from app import create_app
 from app.database import db as _db
@@ -86,6 +87,26 @@ def runner(app):
     return app.test_cli_runner()
 
 
+@pytest.fixture
+def record_statements(session):
+    """Record the SQL sent to the database, e.g. `with record_statements() as statements:`"""
+    @contextmanager
+    def record():
+        statements = []
+
+        def listener(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = session.get_bind()
+        event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', listener)
+
+    return record
+
+
 @pytest.fixture
 def test_user(session):
     """Create a test user"""
@@ -1,5 +1,6 @@
 """Tests for Categories API endpoints"""
 import json
+from io import BytesIO
 import pytest
 
 
@@ -131,6 +132,17 @@ class TestCategoriesAPI:
         assert test_cat_data['categories_type']['id'] == test_category.categories_type_id
         assert test_cat_data['categories_group']['id'] == test_category.categories_group_id
 
+    def test_category_sparse_fields(self, client, test_category):
+        """Test that ?fields= and ?expand= trim the category list"""
+        response = client.get('/api/categories?fields=name&expand=categories_type')
+
+        assert response.status_code == 200
+        category = json.loads(response.data)['categories'][0]
+        assert set(category) == {'id', 'name', 'categories_type'}
+        assert category['categories_type']['id'] == test_category.categories_type_id
+
+        assert client.get('/api/categories?expand=transaction').status_code == 400
+
     def test_create_full_hierarchy_via_api(self, client, test_user):
         """Test creating a complete category hierarchy via API"""
         # Create Type
@@ -218,3 +230,53 @@ class TestCategoriesAPI:
         })
 
         assert response.status_code in [400, 500]
+
+
+class TestCategoriesCSVImport:
+    """Test categories CSV import"""
+
+    def upload(self, client, csv_content, query=''):
+        return client.post(
+            f'/api/categories/csv_import{query}',
+            data={'file': (BytesIO(csv_content.encode('utf-8')), 'categories.csv')},
+            content_type='multipart/form-data'
+        )
+
+    def test_csv_import_creates_hierarchy(self, authenticated_client, test_category, test_categories_group, test_categories_type):
+        """Test that new categories are created and existing ones skipped"""
+        from api.categories.models import CategoriesModel
+
+        csv_content = f"""categories,categories_group,categories_type
+{test_category.name},{test_categories_group.name},{test_categories_type.name}
+Costco,{test_categories_group.name},{test_categories_type.name}
+Salary,Income,Income"""
+
+        response = self.upload(authenticated_client, csv_content)
+
+        assert response.status_code == 201
+        data = json.loads(response.data)
+        assert data['categories_created'] == 2
+        assert data['categories_skipped'] == 1
+        assert CategoriesModel.query.filter_by(name='Salary').first() is not None
+
+    def test_csv_import_dry_run_writes_nothing(self, authenticated_client, test_category, test_categories_group, test_categories_type):
+        """Test that ?dry_run=1 reports the same counts without creating anything"""
+        from api.categories.models import CategoriesModel
+        from api.categories_group.models import CategoriesGroupModel
+
+        csv_content = f"""categories,categories_group,categories_type
+{test_category.name},{test_categories_group.name},{test_categories_type.name}
+Costco,{test_categories_group.name},{test_categories_type.name}
+Salary,Income,Income
+Bonus,Income,Income"""
+
+        response = self.upload(authenticated_client, csv_content, '?dry_run=1')
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['dry_run'] is True
+        assert data['categories_created'] == 3
+        assert data['categories_skipped'] == 1
+        assert data['groups_processed'] == 2
+        assert CategoriesModel.query.count() == 1
+        assert CategoriesGroupModel.query.filter_by(name='Income').first() is None
@@ -1,6 +1,7 @@
 """Tests for Institution and Account API endpoints"""
 import json
 import pytest
+from datetime import datetime, timedelta
 
 
 class TestInstitutionAPI:
@@ -126,17 +127,71 @@ class TestInstitutionAccountAPI:
 
         assert response.status_code == 201
 
-    def test_update_balance_endpoint(self, client, test_account, session):
+    def test_update_balance_endpoint(self, authenticated_client, test_account, test_transaction, session):
         """Test the update balance endpoint"""
-        # First, verify initial balance
-        assert test_account.balance == 1000.00
+        # The stored balance was kept current from its arbitrary starting value
+        assert test_account.balance == 1050.00
 
         # Call update balance endpoint
-        response = client.get('/api/institution/account/update_balance')
+        response = authenticated_client.post('/api/institution/account/update_balance')
 
         assert response.status_code == 200
         data = json.loads(response.data)
         assert 'message' in data
+        assert data['updated'] == 1
+        # starting_balance plus the one 50.00 transaction
+        assert [account['balance'] for account in data['accounts']] == [550.00]
+
+    @pytest.fixture
+    def other_user_account(self, session):
+        """An account of another user, with a balance that does not match its transactions"""
+        from werkzeug.security import generate_password_hash
+        from api.user.models import User
+        from api.institution.models import InstitutionModel
+        from api.institution_account.models import InstitutionAccountModel
+
+        user = User(
+            email='other@example.com', username='otheruser',
+            password=generate_password_hash('otherpassword', method='scrypt'), first_name='Other', last_name='User'
+        )
+        user.save()
+        institution = InstitutionModel(user_id=user.id, name='Other Bank', location='Elsewhere', description='')
+        institution.save()
+        account = InstitutionAccountModel(
+            institution_id=institution.id, user_id=user.id, name='Other Checking', number='9',
+            status='active', balance=7.0, starting_balance=0, account_type='checking', account_class='asset'
+        )
+        account.save()
+        return account
+
+    def test_update_balance_without_transactions(self, client, session, test_user, test_institution, other_user_account):
+        """Test that accounts without transactions fall back to their starting balance"""
+        from api.institution_account.models import InstitutionAccountModel
+
+        account = InstitutionAccountModel(
+            institution_id=test_institution.id, user_id=test_user.id, name='Empty', number='1',
+            status='active', balance=99.0, starting_balance=None, account_type='checking', account_class='asset'
+        )
+        account.save()
+
+        # Only the session user's balances are recomputed; ?user_id= does not stand in for a session
+        assert client.post(f'/api/institution/account/update_balance?user_id={test_user.id}').status_code == 401
+        with client.session_transaction() as sess:
+            sess['_user_id'] = test_user.id
+        response = client.post(f'/api/institution/account/update_balance?user_id={other_user_account.user_id}')
+        assert [a['balance'] for a in json.loads(response.data)['accounts']] == [0.0]
+        session.expire_all()
+        assert session.get(InstitutionAccountModel, other_user_account.id).balance == 7.0
+
+    def test_recompute_balances_command(self, runner, session, test_account, test_transaction):
+        """Test the chunked recompute-balances CLI command"""
+        from api.institution_account.models import InstitutionAccountModel
+
+        result = runner.invoke(args=['recompute-balances', '--chunk-size', '1'])
+        assert result.exit_code == 0
+        assert 'Recomputed 1 account balances' in result.output
+        session.expire_all()
+        assert session.get(InstitutionAccountModel, test_account.id).balance == 550.00
 
     def test_account_includes_institution_data(self, client, test_account):
         """Test that account list includes institution data"""
@@ -156,6 +211,31 @@ class TestInstitutionAccountAPI:
         assert 'institution' in test_acc_data
         assert test_acc_data['institution']['id'] == test_account.institution_id
 
+    def test_account_sparse_fields(self, client, test_account):
+        """Test that ?fields= drops the institution unless it is expanded"""
+        response = client.get('/api/institution/account?fields=name,balance')
+
+        assert response.status_code == 200
+        account = json.loads(response.data)['accounts'][0]
+        assert set(account) == {'id', 'name', 'balance'}
+
+        response = client.get('/api/institution/account?fields=name&expand=institution')
+        account = json.loads(response.data)['accounts'][0]
+        assert account['institution']['id'] == test_account.institution_id
+
+    def test_list_etags(self, client, test_account, test_institution):
+        """Test that account and institution lists answer 304 until their data changes"""
+        etag = client.get('/api/institution/account').headers['ETag']
+        institutions_etag = client.get('/api/institution').headers['ETag']
+        assert client.get('/api/institution/account', headers={'If-None-Match': etag}).status_code == 304
+        assert client.get('/api/institution', headers={'If-None-Match': institutions_etag}).status_code == 304
+
+        # Accounts embed their institution, so an institution change invalidates both lists
+        test_institution.name = 'Renamed Bank'
+        test_institution.save()
+        assert client.get('/api/institution/account', headers={'If-None-Match': etag}).status_code == 200
+        assert client.get('/api/institution', headers={'If-None-Match': institutions_etag}).status_code == 200
+
     def test_create_account_invalid_status(self, client, test_user, test_institution):
         """Test creating account with invalid status"""
         response = client.post('/api/institution/account', json={
@@ -197,3 +277,99 @@ class TestInstitutionAccountAPI:
 
         # Should fail validation
         assert response.status_code in [400, 500]
+
+
+class TestInstitutionAccountBalanceHistory:
+    """Test the per-account balance time series"""
+
+    @pytest.fixture
+    def history(self, authenticated_client, test_user, test_account, test_category):
+        def add(*rows):
+            response = authenticated_client.post('/api/transaction/batch', json={'transactions': [
+                {'user_id': test_user.id, 'categories_id': test_category.id, 'account_id': test_account.id,
+                 'amount': amount, 'transaction_type': 'Withdrawal', 'external_id': f'HIST-{date}-{amount}',
+                 'external_date': date}
+                for date, amount in rows
+            ]})
+            return json.loads(response.data)['ids']
+
+        ids = add(('2024-01-02T09:00:00', -20.0), ('2024-01-04T18:00:00', 100.0), ('2024-01-04T19:00:00', -5.0), (None, -1000.0))
+
+        def get(**params):
+            response = authenticated_client.get(f'/api/institution/account/{test_account.id}/balance_history', query_string=params)
+            assert response.status_code == 200
+            return [(point['date'], point['balance']) for point in json.loads(response.data)['balances']]
+
+        return add, get, ids
+
+    def test_daily_balances(self, history):
+        _, get, _ = history
+        # starting_balance is 500; undated transactions are left out
+        assert get(**{'from': '2024-01-01', 'to': '2024-01-05'}) == [
+            ('2024-01-01', 500.0), ('2024-01-02', 480.0), ('2024-01-03', 480.0), ('2024-01-04', 575.0), ('2024-01-05', 575.0)
+        ]
+
+    def test_weekly_and_monthly_balances(self, history):
+        add, get, _ = history
+        add(('2024-02-20T00:00:00', -75.0))
+        assert get(interval='month', to='2024-03-15') == [('2024-01-01', 575.0), ('2024-02-01', 500.0), ('2024-03-01', 500.0)]
+        # Weeks start on Monday
+        assert get(interval='week', **{'from': '2023-12-30', 'to': '2024-01-09'}) == [
+            ('2023-12-25', 500.0), ('2024-01-01', 575.0), ('2024-01-08', 575.0)
+        ]
+
+    def test_cache_is_extended_for_later_dates(self, history, monkeypatch):
+        from api.institution_account import history as module
+        add, get, ids = history
+        calls = []
+        running_totals = module._running_totals
+        monkeypatch.setattr(module, '_running_totals', lambda *args: calls.append(args[2]) or running_totals(*args))
+
+        assert get(**{'from': '2024-01-30', 'to': '2024-01-31'}) == [('2024-01-30', 575.0), ('2024-01-31', 575.0)]
+        assert get(**{'from': '2024-01-01', 'to': '2024-01-02'}) == [('2024-01-01', 500.0), ('2024-01-02', 480.0)]
+        assert calls == [None]
+
+        # A later end date only adds the new days
+        assert get(**{'from': '2024-01-31', 'to': '2024-02-02'}) == [('2024-01-31', 575.0), ('2024-02-01', 575.0), ('2024-02-02', 575.0)]
+        assert calls[1:] == [module.datetime(2024, 2, 1)]
+
+        # Any transaction write rebuilds it
+        add(('2024-01-03T12:00:00', -10.0))
+        assert get(**{'from': '2024-01-02', 'to': '2024-01-03'}) == [('2024-01-02', 480.0), ('2024-01-03', 470.0)]
+        assert calls[2:] == [None]
+
+    def test_late_committed_writes_are_reflected(self, history, session):
+        from api.transaction.models import TransactionModel
+        _, get, ids = history
+        # On PostgreSQL updated_at is the writing transaction's start, which can predate the cached build
+        written_at = datetime(2000, 1, 1)
+        session.query(TransactionModel).update({'updated_at': written_at})
+        session.commit()
+        assert get(**{'from': '2024-01-04', 'to': '2024-01-04'}) == [('2024-01-04', 575.0)]
+
+        transaction = session.get(TransactionModel, ids[1])
+        transaction.amount = 200.0
+        transaction.updated_at = written_at + timedelta(days=1)
+        session.commit()
+        assert get(**{'from': '2024-01-04', 'to': '2024-01-04'}) == [('2024-01-04', 675.0)]
+
+    def test_updates_and_deletes_are_reflected(self, authenticated_client, history, test_account):
+        _, get, ids = history
+        assert get(**{'from': '2024-01-02', 'to': '2024-01-04'}) == [('2024-01-02', 480.0), ('2024-01-03', 480.0), ('2024-01-04', 575.0)]
+
+        authenticated_client.patch('/api/transaction/batch', json={'ids': ids[:1], 'changes': {'external_date': '2024-01-03T00:00:00'}})
+        assert get(**{'from': '2024-01-02', 'to': '2024-01-04'}) == [('2024-01-02', 500.0), ('2024-01-03', 480.0), ('2024-01-04', 575.0)]
+
+        authenticated_client.delete('/api/transaction/batch', json={'ids': ids[1:2]})
+        assert get(**{'from': '2024-01-02', 'to': '2024-01-04'}) == [('2024-01-02', 500.0), ('2024-01-03', 480.0), ('2024-01-04', 475.0)]
+
+        authenticated_client.put(f'/api/institution/account/{test_account.id}', json={'starting_balance': 0})
+        assert get(**{'from': '2024-01-04', 'to': '2024-01-04'}) == [('2024-01-04', -25.0)]
+
+    def test_invalid_requests(self, authenticated_client, history, test_account):
+        url = f'/api/institution/account/{test_account.id}/balance_history'
+        assert authenticated_client.get(url + '?interval=year').status_code == 400
+        assert authenticated_client.get(url + '?from=yesterday').status_code == 400
+        assert authenticated_client.get(url + '?from=2024-02-01&to=2024-01-01').status_code == 400
+        assert authenticated_client.get(url + '?from=1900-01-01&to=2024-01-01').status_code == 400
+        assert authenticated_client.get('/api/institution/account/missing/balance_history').status_code == 404
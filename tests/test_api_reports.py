@@ -0,0 +1,255 @@
+"""Tests for the reports API endpoints"""
+import json
+import pytest
+from io import BytesIO
+from datetime import datetime
+
+
+class TestReportSummary:
+    """Test the aggregated transaction summary"""
+
+    @pytest.fixture
+    def transactions(self, authenticated_client, test_user, test_account, test_category):
+        from api.categories.models import CategoriesModel
+
+        rent = CategoriesModel(
+            user_id=test_user.id, categories_group_id=test_category.categories_group_id,
+            categories_type_id=test_category.categories_type_id, name='Rent'
+        )
+        rent.save()
+        rows = [
+            (test_category.id, -20.0, 'Walmart', '2024-01-03T10:00:00'),
+            (test_category.id, -30.0, 'Walmart', '2024-01-08T10:00:00'),
+            (rent.id, -500.0, 'Landlord', '2024-01-01T00:00:00'),
+            (test_category.id, -12.5, 'Corner Shop', '2024-02-14T09:30:00'),
+            (rent.id, -500.0, 'Landlord', '2024-02-01T00:00:00'),
+            (test_category.id, 40.0, 'Walmart', '2024-03-31T23:00:00'),
+            (test_category.id, -7.0, 'Corner Shop', None)
+        ]
+        response = authenticated_client.post('/api/transaction/batch', json={'transactions': [
+            {'user_id': test_user.id, 'categories_id': categories_id, 'account_id': test_account.id, 'amount': amount,
+             'transaction_type': 'Withdrawal', 'external_id': f'REPORT-{i}', 'merchant': merchant, 'external_date': date}
+            for i, (categories_id, amount, merchant, date) in enumerate(rows)
+        ]})
+        assert response.status_code == 201
+        return test_category, rent
+
+    def _summary(self, client, **params):
+        response = client.get('/api/reports/summary', query_string=params)
+        assert response.status_code == 200
+        return json.loads(response.data)
+
+    def test_group_by_month(self, authenticated_client, transactions):
+        data = self._summary(authenticated_client)
+        assert data['group_by'] == 'month'
+        assert data['source'] == 'rollup'
+        # The undated transaction belongs to no month
+        assert [(group['key'], group['total'], group['count']) for group in data['groups']] == [
+            ('2024-01-01', -550.0, 3), ('2024-02-01', -512.5, 2), ('2024-03-01', 40.0, 1)
+        ]
+        assert data['groups'][0]['min'] == -500.0 and data['groups'][0]['max'] == -20.0
+        assert (data['total'], data['count']) == (-1022.5, 6)
+
+    def test_group_by_week(self, authenticated_client, transactions):
+        data = self._summary(authenticated_client, group_by='week', to='2024-01-31')
+        assert data['source'] == 'transactions'
+        # Weeks start on Monday; 2024-01-01 was a Monday
+        assert [(group['key'], group['total']) for group in data['groups']] == [('2024-01-01', -520.0), ('2024-01-08', -30.0)]
+
+    def test_group_by_category(self, authenticated_client, transactions):
+        walmart, rent = transactions
+        data = self._summary(authenticated_client, group_by='category')
+        # Without date bounds undated transactions count, so the rollups cannot be used
+        assert data['source'] == 'transactions'
+        assert [(group['key'], group['label'], group['total'], group['count']) for group in data['groups']] == [
+            (rent.id, 'Rent', -1000.0, 2), (walmart.id, 'Walmart', -29.5, 5)
+        ]
+
+    def test_rollups_match_transactions(self, authenticated_client, transactions):
+        walmart, _ = transactions
+        for group_by in ('month', 'category', 'categories_group', 'categories_type', 'account'):
+            for params in ({'from': '2024-01-01', 'to': '2024-02-29'}, {'from': '2024-02-01', 'categories_id': walmart.id}):
+                rollup = self._summary(authenticated_client, group_by=group_by, **params)
+                # Any filter the rollups cannot apply falls back to the transactions
+                scanned = self._summary(authenticated_client, group_by=group_by, amount_min=-10000, **params)
+                assert (rollup['source'], scanned['source']) == ('rollup', 'transactions')
+                assert rollup['groups'] == scanned['groups']
+
+    def test_partial_months_use_transactions(self, authenticated_client, transactions):
+        data = self._summary(authenticated_client, group_by='month', **{'from': '2024-01-02', 'to': '2024-02-14'})
+        assert data['source'] == 'transactions'
+        assert [(group['key'], group['total']) for group in data['groups']] == [('2024-01-01', -50.0), ('2024-02-01', -512.5)]
+
+    def test_group_by_merchant_with_filters(self, authenticated_client, transactions):
+        walmart, _ = transactions
+        data = self._summary(authenticated_client, group_by='merchant', categories_id=walmart.id, amount_max=0)
+        assert [(group['key'], group['total'], group['count']) for group in data['groups']] == [
+            ('Walmart', -50.0, 2), ('Corner Shop', -19.5, 2)
+        ]
+
+    def test_group_by_categories_group(self, authenticated_client, transactions, test_categories_group):
+        data = self._summary(authenticated_client, group_by='categories_group', **{'from': '2024-01-01'})
+        assert [(group['key'], group['label'], group['count']) for group in data['groups']] == [
+            (test_categories_group.id, 'Groceries', 6)
+        ]
+
+    def test_invalid_parameters(self, authenticated_client, transactions):
+        response = authenticated_client.get('/api/reports/summary?group_by=year')
+        assert response.status_code == 400
+        assert 'Cannot group by' in json.loads(response.data)['message']
+
+        response = authenticated_client.get('/api/reports/summary?from=January')
+        assert response.status_code == 400
+
+    def test_etag(self, authenticated_client, transactions, test_user, test_account, test_category):
+        response = authenticated_client.get('/api/reports/summary?group_by=account')
+        etag = response.headers['ETag']
+        assert authenticated_client.get('/api/reports/summary?group_by=account', headers={'If-None-Match': etag}).status_code == 304
+
+        authenticated_client.post('/api/transaction/batch', json={'transactions': [
+            {'user_id': test_user.id, 'categories_id': test_category.id, 'account_id': test_account.id, 'amount': -1.0,
+             'transaction_type': 'Withdrawal', 'external_id': 'REPORT-new', 'external_date': '2024-03-01T00:00:00'}
+        ]})
+        response = authenticated_client.get('/api/reports/summary?group_by=account', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert json.loads(response.data)['groups'][0]['count'] == 8
+
+    def test_without_rollups_reads_transactions(self, authenticated_client, session, transactions):
+        from api.transaction_rollup.models import TransactionRollupModel
+        expected = self._summary(authenticated_client)
+        # As on a database upgraded from before the rollup table
+        session.query(TransactionRollupModel).delete()
+        session.commit()
+
+        data = self._summary(authenticated_client)
+        assert data['source'] == 'transactions'
+        assert (data['groups'], data['total'], data['count']) == (expected['groups'], expected['total'], expected['count'])
+
+
+class TestTransactionRollups:
+    """Test that monthly rollups follow every transaction write"""
+
+    def _rollups(self, session):
+        from api.transaction_rollup.models import TransactionRollupModel
+        session.expire_all()
+        return {
+            (row.month.isoformat(), row.categories_id, row.account_id): (round(row.total, 2), row.count, row.min_amount, row.max_amount)
+            for row in session.query(TransactionRollupModel)
+        }
+
+    def _assert_consistent(self, app, session):
+        from api.transaction.rollups import rebuild_rollups
+        stored = self._rollups(session)
+        with app.app_context():
+            rebuild_rollups()
+        assert self._rollups(session) == stored
+        return stored
+
+    def test_single_writes(self, app, session, test_user, test_account, test_category, test_transaction):
+        from api.transaction.models import TransactionModel
+        month = test_transaction.external_date.date().replace(day=1).isoformat()
+        assert self._rollups(session) == {(month, test_category.id, test_account.id): (50.0, 1, 50.0, 50.0)}
+
+        other = TransactionModel(
+            user_id=test_user.id, categories_id=test_category.id, account_id=test_account.id, amount=-20.0,
+            transaction_type='Withdrawal', external_id='ROLL-1', external_date=datetime(2024, 3, 15)
+        )
+        other.save()
+        undated = TransactionModel(
+            user_id=test_user.id, categories_id=test_category.id, account_id=test_account.id, amount=5.0,
+            transaction_type='Deposit', external_id='ROLL-2', external_date=None
+        )
+        undated.save()
+        assert self._rollups(session)[('2024-03-01', test_category.id, test_account.id)] == (-20.0, 1, -20.0, -20.0)
+        assert len(self._rollups(session)) == 2
+
+        # Moving a transaction to another month takes it out of the old row
+        other.external_date = datetime(2024, 4, 2)
+        other.amount = -25.0
+        other.save()
+        assert self._rollups(session) == {
+            (month, test_category.id, test_account.id): (50.0, 1, 50.0, 50.0),
+            ('2024-04-01', test_category.id, test_account.id): (-25.0, 1, -25.0, -25.0)
+        }
+
+        test_transaction.delete()
+        assert list(self._rollups(session)) == [('2024-04-01', test_category.id, test_account.id)]
+        self._assert_consistent(app, session)
+
+    def test_import_and_batch_writes(self, app, authenticated_client, session, test_user, test_account, test_category, test_transaction):
+        csv_content = f"""Date,Merchant,Category,Account,Amount
+08/01/2024,Bakery,{test_category.name},{test_account.name},-$3.00
+08/20/2024,Bakery,{test_category.name},{test_account.name},-$4.00
+09/02/2024,Bakery,{test_category.name},{test_account.name},-$5.00"""
+        for _ in range(2):
+            # Duplicates found by the second import must not be counted again
+            authenticated_client.post(
+                '/api/transaction/csv_import',
+                data={'file': (BytesIO(csv_content.encode('utf-8')), 'rollup.csv')},
+                content_type='multipart/form-data'
+            )
+            rollups = self._rollups(session)
+            assert rollups[('2024-08-01', test_category.id, test_account.id)] == (-7.0, 2, -4.0, -3.0)
+            assert rollups[('2024-09-01', test_category.id, test_account.id)] == (-5.0, 1, -5.0, -5.0)
+
+        ids = json.loads(authenticated_client.post('/api/transaction/batch', json={'transactions': [
+            {'user_id': test_user.id, 'categories_id': test_category.id, 'account_id': test_account.id,
+             'amount': -10.0 * (i + 1), 'transaction_type': 'Withdrawal', 'external_id': f'ROLL-{i}',
+             'external_date': '2024-08-15T00:00:00'}
+            for i in range(3)
+        ] + [
+            {'user_id': test_user.id, 'categories_id': test_category.id, 'account_id': test_account.id,
+             'amount': -1.0, 'transaction_type': 'Withdrawal', 'external_id': 'ROLL-undated'}
+        ]}).data)['ids']
+        assert self._rollups(session)[('2024-08-01', test_category.id, test_account.id)] == (-67.0, 5, -30.0, -3.0)
+        self._assert_consistent(app, session)
+
+        # Dating the undated row gives it a rollup row; re-dating the others moves theirs
+        authenticated_client.patch('/api/transaction/batch', json={'ids': ids[2:], 'changes': {'external_date': '2024-10-05T00:00:00'}})
+        rollups = self._assert_consistent(app, session)
+        assert rollups[('2024-10-01', test_category.id, test_account.id)] == (-31.0, 2, -30.0, -1.0)
+        assert rollups[('2024-08-01', test_category.id, test_account.id)] == (-37.0, 4, -20.0, -3.0)
+
+        authenticated_client.patch('/api/transaction/batch', json={'ids': ids[:2], 'changes': {'amount': -2.0}})
+        assert self._assert_consistent(app, session)[('2024-08-01', test_category.id, test_account.id)] == (-11.0, 4, -4.0, -2.0)
+
+        authenticated_client.delete('/api/transaction/batch', json={'filter': {'account_id': test_account.id, 'amount_max': -1}})
+        assert list(self._assert_consistent(app, session)) == [
+            (test_transaction.external_date.date().replace(day=1).isoformat(), test_category.id, test_account.id)
+        ]
+
+    def test_non_iso_dates(self, app, authenticated_client, session, test_user, test_account, test_category):
+        """Test that dates in other accepted formats are stored and rolled up, and bad ones are rejected"""
+        for i, value in enumerate(['01/15/2024', 'Mon, 15 Jan 2024 00:00:00 GMT']):
+            response = authenticated_client.post('/api/transaction', json={
+                'user_id': test_user.id, 'categories_id': test_category.id, 'account_id': test_account.id,
+                'amount': -10.0, 'transaction_type': 'Withdrawal', 'external_id': f'ROLL-DATE-{i}', 'external_date': value
+            })
+            assert response.status_code == 201
+        assert self._rollups(session) == {('2024-01-01', test_category.id, test_account.id): (-20.0, 2, -10.0, -10.0)}
+
+        # The API's own output can be sent back unchanged
+        transaction = json.loads(authenticated_client.get('/api/transaction').data)['transactions'][0]
+        response = authenticated_client.put(f"/api/transaction/{transaction['id']}", json={
+            'external_date': transaction['external_date'], 'amount': -5.0
+        })
+        assert response.status_code == 200
+        assert self._assert_consistent(app, session)[('2024-01-01', test_category.id, test_account.id)][0] == -15.0
+
+        response = authenticated_client.post('/api/transaction', json={
+            'user_id': test_user.id, 'categories_id': test_category.id, 'account_id': test_account.id,
+            'amount': -10.0, 'transaction_type': 'Withdrawal', 'external_id': 'ROLL-DATE-bad', 'external_date': 'soon'
+        })
+        assert response.status_code == 400
+        response = authenticated_client.put(f"/api/transaction/{transaction['id']}", json={'external_date': 'soon'})
+        assert response.status_code == 400
+
+    def test_rebuild_rollups_command(self, runner, session, test_transaction):
+        from api.transaction_rollup.models import TransactionRollupModel
+        stored = self._rollups(session)
+        session.query(TransactionRollupModel).delete()
+        session.commit()
+
+        result = runner.invoke(args=['rebuild-rollups', '--user-id', test_transaction.user_id])
+        assert 'Rebuilt 1 transaction rollup rows' in result.output
+        assert self._rollups(session) == stored
@@ -127,7 +127,6 @@ class TestTransactionAPI:
 
         assert response.status_code in [400, 500]
 
-
 class TestTransactionCSVImport:
     """Test CSV import functionality"""
 
@@ -383,3 +382,515 @@ AUTH-001,Groceries,Test Bank,Checking,01/15/2024,$50.00,Test"""
 
         # Should fail because user_id from session will be None
         assert response.status_code in [400, 401, 500]
+
+class TestTransactionCursorPagination:
+    """Test keyset pagination of GET /api/transaction with ?cursor="""
+
+    def _create(self, test_user, test_account, test_category, external_id, external_date):
+        from api.transaction.models import TransactionModel
+        transaction = TransactionModel(
+            user_id=test_user.id,
+            categories_id=test_category.id,
+            account_id=test_account.id,
+            amount=-10.00,
+            transaction_type='Withdrawal',
+            external_id=external_id,
+            external_date=external_date
+        )
+        transaction.save()
+        return transaction
+
+    def test_cursor_walks_every_row_once(self, client, test_user, test_account, test_category):
+        """Test that following next_cursor visits all rows newest first, undated rows last"""
+        for i in range(7):
+            # Two rows share each date to exercise the id tie-breaker
+            self._create(test_user, test_account, test_category, f'CURSOR-{i}', datetime(2024, 1, 1 + i // 2))
+        self._create(test_user, test_account, test_category, 'CURSOR-NODATE-1', None)
+        self._create(test_user, test_account, test_category, 'CURSOR-NODATE-2', None)
+
+        seen = []
+        url = '/api/transaction?cursor=&per_page=3'
+        while True:
+            response = client.get(url)
+            assert response.status_code == 200
+            data = json.loads(response.data)
+            assert 'total' not in data['pagination']
+            seen.extend(data['transactions'])
+            if not data['pagination']['has_more']:
+                assert data['pagination']['next_cursor'] is None
+                break
+            url = f"/api/transaction?cursor={data['pagination']['next_cursor']}&per_page=3"
+
+        assert len(seen) == 9
+        assert len({t['id'] for t in seen}) == 9
+        assert all(t['external_date'] is None for t in seen[-2:])
+        dates = [datetime.strptime(t['external_date'], '%a, %d %b %Y %H:%M:%S %Z') for t in seen[:7]]
+        assert dates == sorted(dates, reverse=True)
+
+    def test_cursor_include_total(self, client, test_transaction):
+        """Test that the count is only run when include_total=1 is passed"""
+        response = client.get('/api/transaction?cursor=&include_total=1')
+        data = json.loads(response.data)
+        assert data['pagination']['total'] == 1
+        assert data['pagination']['has_more'] is False
+
+    def test_invalid_cursor(self, client):
+        """Test that a tampered cursor is rejected"""
+        response = client.get('/api/transaction?cursor=not-a-cursor')
+        assert response.status_code == 400
+
+    def test_cursor_condition_is_an_index_range(self, session, test_user):
+        """Test that a deep page seeks into the list index instead of filtering every row before the cursor"""
+        from werkzeug.datastructures import MultiDict
+        from api.transaction.models import TransactionModel
+        from api.transaction.filters import apply_filters
+        from api.transaction.pagination import after_cursor, keyset_order
+
+        query = (
+            apply_filters(TransactionModel.query, MultiDict(), test_user.id)
+            .filter(after_cursor(datetime(2024, 1, 1), 'cursor-id'))
+            .order_by(*keyset_order()).limit(101)
+        )
+        bind = session.get_bind()
+        sql = str(query.statement.compile(dialect=bind.dialect, compile_kwargs={'literal_binds': True}))
+        connection = session.connection()
+        if bind.dialect.name == 'postgresql':
+            # The test table is tiny; make the planner show the plan it would use on a large one,
+            # reading the list index in order instead of sorting a handful of rows
+            connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+            connection.exec_driver_sql('SET LOCAL enable_sort = off')
+            plan = [row[0] for row in connection.exec_driver_sql('EXPLAIN ' + sql)]
+            condition = next(line for line in plan if 'ROW(external_date, id)' in line)
+            assert 'Index Cond' in condition
+        else:
+            plan = [row[-1] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql)]
+            assert any('USING INDEX ix_transaction_user_date' in line and '(external_date,id)<' in line for line in plan)
+
+class TestTransactionEagerLoading:
+    """Test that listing transactions does not issue per-row relationship queries"""
+
+    def _count_selects(self, session, record_statements, client, url):
+        # Start from an empty identity map so lazy loads cannot be served from it
+        session.expunge_all()
+        with record_statements() as statements:
+            response = client.get(url)
+
+        assert response.status_code == 200
+        # The ETag lookup on data_version is a fixed cost, not a relationship load
+        return response, [s for s in statements if s.lstrip().upper().startswith('SELECT') and 'FROM data_version' not in s]
+
+    def test_list_query_count_is_fixed(self, client, session, record_statements, test_user, test_institution, test_categories_group, test_categories_type):
+        """Test that a page touching many categories and accounts costs the same three queries"""
+        from api.categories.models import CategoriesModel
+        from api.institution_account.models import InstitutionAccountModel
+        from api.transaction.models import TransactionModel
+
+        group_id, institution_id = test_categories_group.id, test_institution.id
+        for i in range(6):
+            category = CategoriesModel(test_user.id, test_categories_group.id, test_categories_type.id, f'Eager {i}')
+            category.save()
+            account = InstitutionAccountModel(
+                institution_id=test_institution.id, user_id=test_user.id, name=f'Eager {i}', number=str(i),
+                status='active', balance=0, starting_balance=0, account_type='checking', account_class='asset'
+            )
+            account.save()
+            TransactionModel(
+                user_id=test_user.id, categories_id=category.id, account_id=account.id, amount=-1.0 * i,
+                transaction_type='Withdrawal', external_id=f'EAGER-{i}', external_date=datetime(2024, 3, 1 + i)
+            ).save()
+
+        response, selects = self._count_selects(session, record_statements, client, '/api/transaction?cursor=&per_page=100')
+        data = json.loads(response.data)
+        assert len(data['transactions']) == 6
+        assert data['transactions'][0]['categories']['categories_group']['id'] == group_id
+        assert data['transactions'][0]['account']['institution']['id'] == institution_id
+        # The page, then one SELECT ... IN each for categories and accounts
+        assert len(selects) == 3
+
+        _, selects = self._count_selects(session, record_statements, client, '/api/transaction?page=1&per_page=100')
+        # Paged mode adds its COUNT
+        assert len(selects) == 4
+
+    def test_detail_query_count_is_fixed(self, client, session, record_statements, test_transaction):
+        """Test that a single transaction is loaded with its relationships in three queries"""
+        response, selects = self._count_selects(session, record_statements, client, f'/api/transaction/{test_transaction.id}')
+        assert json.loads(response.data)['transaction']['account']['institution']['name'] == 'Test Bank'
+        assert len(selects) == 3
+
+class TestTransactionListFilters:
+    """Test server-side filtering and sorting of GET /api/transaction"""
+
+    @pytest.fixture
+    def filter_transactions(self, session, test_user, test_account, test_category, test_institution, test_categories_group):
+        from api.categories.models import CategoriesModel
+        from api.categories_type.models import CategoriesTypeModel
+        from api.institution_account.models import InstitutionAccountModel
+        from api.transaction.models import TransactionModel
+
+        income = CategoriesTypeModel(user_id=test_user.id, name='Income')
+        income.save()
+        salary = CategoriesModel(test_user.id, test_categories_group.id, income.id, 'Salary')
+        salary.save()
+        savings = InstitutionAccountModel(
+            institution_id=test_institution.id, user_id=test_user.id, name='Filter Savings', number='9',
+            status='active', balance=0, starting_balance=0, account_type='savings', account_class='asset'
+        )
+        savings.save()
+
+        rows = [
+            ('F-1', test_category.id, test_account.id, -20.00, datetime(2024, 4, 1), 'Corner Grocer', 'food'),
+            ('F-2', test_category.id, savings.id, -75.50, datetime(2024, 4, 15), 'Hardware_Store', 'home'),
+            ('F-3', salary.id, test_account.id, 2500.00, datetime(2024, 4, 30), 'Employer', 'pay'),
+            ('F-4', test_category.id, test_account.id, -5.25, datetime(2024, 5, 2), 'Corner Cafe', 'food,coffee'),
+        ]
+        for external_id, categories_id, account_id, amount, external_date, merchant, tags in rows:
+            TransactionModel(
+                user_id=test_user.id, categories_id=categories_id, account_id=account_id, amount=amount,
+                transaction_type='Withdrawal' if amount < 0 else 'Deposit', external_id=external_id,
+                external_date=external_date, merchant=merchant, tags=tags
+            ).save()
+        return {'salary': salary, 'income': income, 'savings': savings}
+
+    def _external_ids(self, client, query):
+        response = client.get(f'/api/transaction?{query}')
+        assert response.status_code == 200, response.data
+        return [t['external_id'] for t in json.loads(response.data)['transactions']]
+
+    def test_default_order_is_newest_first(self, authenticated_client, filter_transactions):
+        assert self._external_ids(authenticated_client, '') == ['F-4', 'F-3', 'F-2', 'F-1']
+
+    def test_filters(self, authenticated_client, test_account, filter_transactions):
+        client = authenticated_client
+        assert self._external_ids(client, 'date_from=2024-04-15&date_to=2024-04-30') == ['F-3', 'F-2']
+        assert self._external_ids(client, f'account_id={filter_transactions["savings"].id}') == ['F-2']
+        assert self._external_ids(client, f'categories_id={filter_transactions["salary"].id}') == ['F-3']
+        assert self._external_ids(client, f'categories_type_id={filter_transactions["income"].id}') == ['F-3']
+        assert self._external_ids(client, 'amount_min=-50&amount_max=0') == ['F-4', 'F-1']
+        assert self._external_ids(client, 'transaction_type=Deposit') == ['F-3']
+        assert self._external_ids(client, 'merchant=corner') == ['F-4', 'F-1']
+        # LIKE wildcards in the search term are matched literally
+        assert self._external_ids(client, 'merchant=e_s') == ['F-2']
+        assert self._external_ids(client, 'tags=coffee') == ['F-4']
+        assert self._external_ids(client, f'account_id={test_account.id}&tags=food') == ['F-4', 'F-1']
+
+    def test_sort_with_cursor(self, authenticated_client, filter_transactions):
+        """Test that a whitelisted sort pages consistently with cursors"""
+        seen = []
+        url = '/api/transaction?sort=amount&per_page=3&cursor='
+        while url:
+            data = json.loads(authenticated_client.get(url).data)
+            seen.extend(t['external_id'] for t in data['transactions'])
+            cursor = data['pagination']['next_cursor']
+            url = f'/api/transaction?sort=amount&per_page=3&cursor={cursor}' if cursor else None
+        assert seen == ['F-2', 'F-1', 'F-4', 'F-3']
+
+        # A cursor cannot be replayed under another sort
+        first = json.loads(authenticated_client.get('/api/transaction?sort=amount&per_page=1&cursor=').data)
+        response = authenticated_client.get(f"/api/transaction?sort=-amount&cursor={first['pagination']['next_cursor']}")
+        assert response.status_code == 400
+
+    def test_invalid_filters(self, authenticated_client):
+        assert authenticated_client.get('/api/transaction?sort=notes').status_code == 400
+        assert authenticated_client.get('/api/transaction?date_from=04/01/2024').status_code == 400
+        assert authenticated_client.get('/api/transaction?amount_min=lots').status_code == 400
+
+    def test_scoped_by_user_id_without_session(self, client, filter_transactions, test_user):
+        """Test that ?user_id= scopes the list for callers without a session"""
+        assert self._external_ids(client, 'user_id=someone-else') == []
+        assert len(self._external_ids(client, f'user_id={test_user.id}')) == 4
+
+    def test_session_user_wins_over_user_id(self, authenticated_client, filter_transactions):
+        """Test that a logged-in user cannot list another user's transactions"""
+        assert len(self._external_ids(authenticated_client, 'user_id=someone-else')) == 4
+
+class TestTransactionSparseFields:
+    """Test ?fields= and ?expand= on transaction responses"""
+
+    def test_legacy_output_without_params(self, client, test_transaction):
+        data = json.loads(client.get('/api/transaction').data)
+        transaction = data['transactions'][0]
+        assert 'categories_group' in transaction['categories']
+        assert 'institution' in transaction['account']
+
+    def test_fields_only(self, client, session, record_statements, test_transaction):
+        """Test that ?fields= returns just those columns and skips relationship queries"""
+        session.expunge_all()
+        with record_statements() as statements:
+            response = client.get('/api/transaction?cursor=&fields=amount,merchant')
+
+        data = json.loads(response.data)
+        assert set(data['transactions'][0]) == {'id', 'amount', 'merchant'}
+        statements = [s for s in statements if 'FROM data_version' not in s]
+        assert len(statements) == 1
+        assert 'notes' not in statements[0]
+
+    def test_expand(self, client, test_transaction):
+        """Test that expanded relationships carry their columns and nest only what is asked for"""
+        response = client.get('/api/transaction?fields=amount&expand=categories,account.institution')
+        transaction = json.loads(response.data)['transactions'][0]
+        assert set(transaction) == {'id', 'amount', 'categories', 'account'}
+        assert transaction['categories']['id'] == test_transaction.categories_id
+        assert 'categories_group' not in transaction['categories']
+        assert transaction['account']['institution']['name'] == 'Test Bank'
+
+        detail = json.loads(client.get(f'/api/transaction/{test_transaction.id}?expand=account').data)['transaction']
+        assert detail['amount'] == 50.0
+        assert 'categories' not in detail
+        assert 'institution' not in detail['account']
+
+    def test_unknown_field(self, client):
+        assert client.get('/api/transaction?fields=password').status_code == 400
+        assert client.get('/api/transaction?expand=user').status_code == 400
+
+class TestTransactionExport:
+    """Test GET /api/transaction/export"""
+
+    @pytest.fixture
+    def export_transactions(self, session, test_user, test_account, test_category):
+        from api.transaction.models import TransactionModel
+        for i in range(5):
+            TransactionModel(
+                user_id=test_user.id, categories_id=test_category.id, account_id=test_account.id,
+                amount=-10.0 - i, transaction_type='Withdrawal', external_id=f'EXPORT-{i}',
+                external_date=datetime(2024, 6, 1 + i), merchant=f'Shop, "{i}"'
+            ).save()
+
+    def test_export_ndjson(self, app, authenticated_client, export_transactions, monkeypatch):
+        """Test that NDJSON is streamed newest first in small batches"""
+        monkeypatch.setitem(app.config, 'EXPORT_BATCH_SIZE', 2)
+        response = authenticated_client.get('/api/transaction/export?format=ndjson')
+
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        assert response.is_streamed
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert [line['external_id'] for line in lines] == [f'EXPORT-{i}' for i in range(4, -1, -1)]
+        assert lines[0]['external_date'] == '2024-06-05T00:00:00'
+        assert 'categories' not in lines[0]
+
+    def test_export_csv_with_filters(self, app, authenticated_client, export_transactions, monkeypatch):
+        """Test that CSV export quotes values and applies the list filters and ?fields="""
+        import csv
+        monkeypatch.setitem(app.config, 'EXPORT_BATCH_SIZE', 2)
+        response = authenticated_client.get(
+            '/api/transaction/export?format=csv&date_from=2024-06-02&sort=amount&fields=external_id,merchant,amount'
+        )
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/csv'
+        assert 'attachment' in response.headers['Content-Disposition']
+        rows = list(csv.reader(response.get_data(as_text=True).splitlines()))
+        assert rows[0] == ['id', 'amount', 'external_id', 'merchant']
+        assert [row[2] for row in rows[1:]] == ['EXPORT-4', 'EXPORT-3', 'EXPORT-2', 'EXPORT-1']
+        assert rows[1][3] == 'Shop, "4"'
+
+    def test_export_invalid_format(self, authenticated_client):
+        assert authenticated_client.get('/api/transaction/export?format=xml').status_code == 400
+
+class TestTransactionCounts:
+    """Test the per-user transaction counter behind pagination totals"""
+
+    def _count_statements(self, record_statements, client, url):
+        with record_statements() as statements:
+            response = client.get(url)
+        return json.loads(response.data), [s for s in statements if 'count(' in s.lower() and 'data_version' not in s]
+
+    def test_counter_tracks_writes(self, authenticated_client, session, record_statements, test_user, test_account, test_category, test_transaction):
+        """Test that create, delete and import keep the counter exact without COUNT(*) per page"""
+        from api.transaction_count.models import TransactionCountModel
+
+        data, counts = self._count_statements(record_statements, authenticated_client, '/api/transaction?page=1')
+        assert data['pagination']['total'] == 1
+        # The fixture's insert built the counter from COUNT(*) in the same statement
+        assert counts == []
+
+        response = authenticated_client.post('/api/transaction', json={
+            'user_id': test_user.id, 'categories_id': test_category.id, 'account_id': test_account.id,
+            'amount': -5.0, 'transaction_type': 'Withdrawal', 'external_id': 'COUNT-1'
+        })
+        assert response.status_code == 201
+
+        csv_content = f"""Date,Merchant,Category,Account,Amount
+08/01/2024,Bakery,{test_category.name},{test_account.name},-$3.00
+08/02/2024,Bakery,{test_category.name},{test_account.name},-$4.00"""
+        response = authenticated_client.post(
+            '/api/transaction/csv_import',
+            data={'file': (BytesIO(csv_content.encode('utf-8')), 'count.csv')},
+            content_type='multipart/form-data'
+        )
+        assert response.status_code == 201
+
+        authenticated_client.delete(f'/api/transaction/{test_transaction.id}')
+
+        data, counts = self._count_statements(record_statements, authenticated_client, '/api/transaction?page=1&per_page=2')
+        assert data['pagination']['total'] == 3
+        assert data['pagination']['pages'] == 2
+        assert counts == []
+        session.expire_all()
+        assert session.get(TransactionCountModel, test_user.id).total == 3
+
+    def test_filtered_counts_are_cached_per_version(self, authenticated_client, session, record_statements, test_user, test_account, test_category, test_transaction):
+        """Test that a filtered total is counted once, then recounted after a write"""
+        from api.transaction.models import TransactionModel
+
+        url = '/api/transaction?cursor=&include_total=1&transaction_type=Withdrawal'
+        data, counts = self._count_statements(record_statements, authenticated_client, url)
+        assert data['pagination']['total'] == 1
+        data, counts = self._count_statements(record_statements, authenticated_client, url)
+        assert counts == []
+
+        TransactionModel(
+            user_id=test_user.id, categories_id=test_category.id, account_id=test_account.id, amount=-1.0,
+            transaction_type='Withdrawal', external_id='COUNT-2', external_date=datetime(2024, 8, 3)
+        ).save()
+        data, counts = self._count_statements(record_statements, authenticated_client, url)
+        assert data['pagination']['total'] == 2
+        assert len(counts) == 1
+
+
+    def test_category_filters_recount_after_category_changes(self, authenticated_client, session, record_statements, test_user, test_category, test_transaction):
+        """Test that moving a category to another group invalidates counts filtered by group"""
+        from api.categories_group.models import CategoriesGroupModel
+
+        url = f'/api/transaction?cursor=&include_total=1&categories_group_id={test_category.categories_group_id}'
+        data, counts = self._count_statements(record_statements, authenticated_client, url)
+        assert data['pagination']['total'] == 1
+
+        other = CategoriesGroupModel(user_id=test_user.id, name='Dining')
+        other.save()
+        test_category.categories_group_id = other.id
+        test_category.save()
+
+        data, counts = self._count_statements(record_statements, authenticated_client, url)
+        assert data['pagination']['total'] == 0
+        assert len(counts) == 1
+
+    def test_counter_created_by_first_write(self, session, test_user, test_account, test_category, test_transaction):
+        """Test that a write for a user without a counter row creates it from a count that includes the write"""
+        from api.transaction.models import TransactionModel
+        from api.transaction.counts import _create_counter, get_transaction_counter
+        from api.transaction_count.models import TransactionCountModel
+
+        TransactionCountModel.query.filter_by(user_id=test_user.id).delete()
+        session.commit()
+
+        TransactionModel(
+            user_id=test_user.id, categories_id=test_category.id, account_id=test_account.id, amount=-1.0,
+            transaction_type='Withdrawal', external_id='COUNT-3', external_date=datetime(2024, 8, 4)
+        ).save()
+        assert get_transaction_counter(test_user.id) == (2, 1)
+
+        # A writer that lost the race to create the row adds its delta to it
+        _create_counter(session, test_user.id, 5)
+        session.commit()
+        assert get_transaction_counter(test_user.id) == (7, 2)
+
+    def test_reads_do_not_create_counters(self, client, session, test_transaction):
+        """Test that listing for a user without a counter row counts without writing one"""
+        from api.transaction_count.models import TransactionCountModel
+
+        TransactionCountModel.query.delete()
+        session.commit()
+
+        data = json.loads(client.get(f'/api/transaction?page=1&user_id={test_transaction.user_id}').data)
+        assert data['pagination']['total'] == 1
+        assert json.loads(client.get('/api/transaction?page=1&user_id=nobody').data)['pagination']['total'] == 0
+        assert TransactionCountModel.query.count() == 0
+
+    def test_verify_transaction_counts_command(self, runner, session, test_user, test_transaction):
+        from api.transaction_count.models import TransactionCountModel
+
+        result = runner.invoke(args=['verify-transaction-counts'])
+        assert result.exit_code == 0
+
+        TransactionCountModel.query.filter_by(user_id=test_user.id).update({'total': 7})
+        session.commit()
+        result = runner.invoke(args=['verify-transaction-counts'])
+        assert result.exit_code == 1
+        assert 'stored 7, expected 1' in result.output
+
+        result = runner.invoke(args=['verify-transaction-counts', '--fix'])
+        assert 'Fixed 1 transaction counts' in result.output
+        session.expire_all()
+        assert session.get(TransactionCountModel, test_user.id).total == 1
+
+class TestTransactionListETags:
+    """Test ETag / If-None-Match on GET /api/transaction"""
+
+    def test_not_modified_until_a_write(self, authenticated_client, test_transaction, test_account):
+        response = authenticated_client.get('/api/transaction')
+        etag = response.headers['ETag']
+        assert etag
+
+        response = authenticated_client.get('/api/transaction', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+
+        # Another query string is another representation
+        response = authenticated_client.get('/api/transaction?per_page=5', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+
+        # Renaming the account changes the nested output, so the list ETag moves too
+        authenticated_client.put(f'/api/institution/account/{test_account.id}', json={'name': 'Renamed'})
+        response = authenticated_client.get('/api/transaction', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        etag = response.headers['ETag']
+
+        authenticated_client.delete(f'/api/transaction/{test_transaction.id}')
+        response = authenticated_client.get('/api/transaction', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert json.loads(response.data)['transactions'] == []
+
+    def test_import_changes_etag(self, authenticated_client, test_category, test_account):
+        etag = authenticated_client.get('/api/transaction').headers['ETag']
+        csv_content = f"Date,Merchant,Category,Account,Amount\n09/01/2024,Deli,{test_category.name},{test_account.name},-$9.00"
+        authenticated_client.post(
+            '/api/transaction/csv_import',
+            data={'file': (BytesIO(csv_content.encode('utf-8')), 'etag.csv')},
+            content_type='multipart/form-data'
+        )
+        response = authenticated_client.get('/api/transaction', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+
+class TestTransactionProjectedReads:
+    """Test that PROJECTED_READS serves the list from plain rows with identical output"""
+
+    @pytest.fixture
+    def projected_transactions(self, session, test_user, test_account, test_category):
+        from api.transaction.models import TransactionModel
+        for i in range(5):
+            TransactionModel(
+                user_id=test_user.id, categories_id=test_category.id, account_id=test_account.id,
+                amount=-3.0 * i, transaction_type='Withdrawal', external_id=f'PROJ-{i}',
+                external_date=datetime(2024, 4, 1 + i) if i else None, merchant=f'Shop {i}'
+            ).save()
+
+    @pytest.mark.parametrize('url', [
+        '/api/transaction',
+        '/api/transaction?page=2&per_page=2&sort=amount',
+        '/api/transaction?fields=amount,merchant',
+        '/api/transaction?fields=amount&expand=categories.categories_type,account',
+        '/api/transaction?expand=account.institution&merchant=shop',
+    ])
+    def test_same_output(self, app, client, monkeypatch, projected_transactions, url):
+        expected = json.loads(client.get(url).data)
+        monkeypatch.setitem(app.config, 'PROJECTED_READS', True)
+        assert json.loads(client.get(url).data) == expected
+
+    def test_cursor_pages_in_one_select(self, app, client, session, record_statements, monkeypatch, projected_transactions):
+        expected = [t['id'] for t in json.loads(client.get('/api/transaction?cursor=&sort=merchant').data)['transactions']]
+        monkeypatch.setitem(app.config, 'PROJECTED_READS', True)
+
+        seen = []
+        cursor = ''
+        while cursor is not None:
+            response, selects = TestTransactionEagerLoading()._count_selects(
+                session, record_statements, client, f'/api/transaction?cursor={cursor}&per_page=2&sort=merchant&fields=amount'
+            )
+            data = json.loads(response.data)
+            # Rows without a merchant sort last and are read by a second SELECT once the others run out
+            assert len([select for select in selects if 'merchant IS NULL' not in select]) == 1
+            assert all(set(t) == {'id', 'amount'} for t in data['transactions'])
+            seen.extend(t['id'] for t in data['transactions'])
+            cursor = data['pagination']['next_cursor']
+        assert seen == expected
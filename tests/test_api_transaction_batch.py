@@ -0,0 +1,298 @@
+"""Tests for batch transaction writes and the balances they keep"""
+import json
+import pytest
+from io import BytesIO
+from datetime import datetime
+
+
+class TestTransactionBatch:
+    """Test POST/PATCH/DELETE /api/transaction/batch"""
+
+    def _new(self, test_user, test_category, test_account, external_id, **extra):
+        return {
+            'user_id': test_user.id, 'categories_id': test_category.id, 'account_id': test_account.id,
+            'amount': -1.0, 'transaction_type': 'Withdrawal', 'external_id': external_id, **extra
+        }
+
+    def test_batch_create(self, authenticated_client, session, test_user, test_category, test_account):
+        from api.transaction_count.models import TransactionCountModel
+
+        assert json.loads(authenticated_client.get('/api/transaction').data)['pagination']['total'] == 0
+        response = authenticated_client.post('/api/transaction/batch', json={'transactions': [
+            self._new(test_user, test_category, test_account, f'BATCH-{i}', external_date='2024-05-0%d' % (i + 1))
+            for i in range(3)
+        ]})
+        assert response.status_code == 201
+        data = json.loads(response.data)
+        assert data['created'] == 3
+        assert len(data['ids']) == 3
+
+        # Counter and list ETag follow the bulk insert
+        assert json.loads(authenticated_client.get('/api/transaction').data)['pagination']['total'] == 3
+        session.expire_all()
+        assert session.get(TransactionCountModel, test_user.id).total == 3
+
+    def test_batch_create_is_all_or_nothing(self, authenticated_client, test_user, test_category, test_account, test_transaction):
+        response = authenticated_client.post('/api/transaction/batch', json={'transactions': [
+            self._new(test_user, test_category, test_account, 'OK-1'),
+            self._new(test_user, test_category, test_account, 'OK-2', account_id='missing'),
+            self._new(test_user, test_category, test_account, 'OK-3', amount='abc'),
+        ]})
+        assert response.status_code == 400
+        errors = json.loads(response.data)['errors']
+        assert [error['index'] for error in errors] == [2]
+
+        response = authenticated_client.post('/api/transaction/batch', json={'transactions': [
+            self._new(test_user, test_category, test_account, 'OK-1'),
+            self._new(test_user, test_category, test_account, 'OK-2', account_id='missing'),
+        ]})
+        assert response.status_code == 400
+        assert json.loads(response.data)['errors'] == [{'index': 1, 'message': 'Invalid account_id'}]
+
+        response = authenticated_client.post('/api/transaction/batch', json={'transactions': [
+            self._new(test_user, test_category, test_account, 'OK-1'),
+            self._new(test_user, test_category, test_account, 'TEST-001'),
+        ]})
+        assert response.status_code == 409
+        assert [error['index'] for error in json.loads(response.data)['errors']] == [1]
+
+        data = json.loads(authenticated_client.get('/api/transaction').data)
+        assert [t['external_id'] for t in data['transactions']] == ['TEST-001']
+
+    def test_batch_update_by_ids(self, authenticated_client, session, test_user, test_category, test_account):
+        from api.categories.models import CategoriesModel
+        from api.transaction.models import TransactionModel
+
+        other = CategoriesModel(
+            user_id=test_user.id, categories_group_id=test_category.categories_group_id,
+            categories_type_id=test_category.categories_type_id, name='Costco'
+        )
+        other.save()
+        ids = json.loads(authenticated_client.post('/api/transaction/batch', json={'transactions': [
+            self._new(test_user, test_category, test_account, f'UPD-{i}') for i in range(3)
+        ]}).data)['ids']
+        etag = authenticated_client.get('/api/transaction').headers['ETag']
+
+        response = authenticated_client.patch('/api/transaction/batch', json={
+            'ids': ids[:2], 'changes': {'categories_id': other.id, 'notes': 'bulk'}
+        })
+        assert response.status_code == 200
+        assert json.loads(response.data)['updated'] == 2
+
+        session.expire_all()
+        rows = {t.id: t for t in TransactionModel.query.all()}
+        assert [rows[id].categories_id for id in ids] == [other.id, other.id, test_category.id]
+        assert rows[ids[0]].notes == 'bulk'
+        assert authenticated_client.get('/api/transaction', headers={'If-None-Match': etag}).status_code == 200
+
+    def test_batch_update_validation(self, authenticated_client, test_transaction):
+        def patch(body):
+            return authenticated_client.patch('/api/transaction/batch', json=body)
+
+        assert patch({'ids': [test_transaction.id], 'changes': {'external_id': 'X'}}).status_code == 400
+        assert patch({'ids': [test_transaction.id], 'changes': {'categories_id': 'missing'}}).status_code == 400
+        assert patch({'ids': [test_transaction.id], 'changes': {'amount': 'abc'}}).status_code == 400
+        assert patch({'ids': [test_transaction.id, 'missing'], 'changes': {'notes': 'x'}}).status_code == 404
+        assert patch({'filter': {}, 'changes': {'notes': 'x'}}).status_code == 400
+        assert patch({'changes': {'notes': 'x'}}).status_code == 400
+
+    def test_batch_update_and_delete_by_filter(self, authenticated_client, session, test_user, test_category, test_account):
+        from api.transaction_count.models import TransactionCountModel
+
+        authenticated_client.post('/api/transaction/batch', json={'transactions': [
+            self._new(test_user, test_category, test_account, f'FLT-{i}', amount=-10.0 * (i + 1)) for i in range(4)
+        ]})
+        assert json.loads(authenticated_client.get('/api/transaction').data)['pagination']['total'] == 4
+
+        response = authenticated_client.patch('/api/transaction/batch', json={
+            'filter': {'amount_max': -25}, 'changes': {'tags': 'large'}
+        })
+        assert json.loads(response.data)['updated'] == 2
+        data = json.loads(authenticated_client.get('/api/transaction?tags=large').data)
+        assert sorted(t['amount'] for t in data['transactions']) == [-40.0, -30.0]
+
+        response = authenticated_client.delete('/api/transaction/batch', json={'filter': {'tags': 'large'}})
+        assert response.status_code == 200
+        assert json.loads(response.data)['deleted'] == 2
+        assert json.loads(authenticated_client.get('/api/transaction').data)['pagination']['total'] == 2
+        session.expire_all()
+        assert session.get(TransactionCountModel, test_user.id).total == 2
+
+    def test_batch_delete_by_ids(self, authenticated_client, test_transaction):
+        response = authenticated_client.delete('/api/transaction/batch', json={'ids': [test_transaction.id, 'missing']})
+        assert response.status_code == 404
+        assert json.loads(response.data)['errors'] == [{'id': 'missing', 'message': 'Transaction not found'}]
+
+        response = authenticated_client.delete('/api/transaction/batch', json={'ids': [test_transaction.id]})
+        assert json.loads(response.data)['deleted'] == 1
+        assert json.loads(authenticated_client.get('/api/transaction').data)['transactions'] == []
+
+    @pytest.fixture
+    def other_user(self, session, test_categories_type, test_categories_group):
+        """A second user with an account, a category and one transaction"""
+        from werkzeug.security import generate_password_hash
+        from api.user.models import User
+        from api.institution.models import InstitutionModel
+        from api.institution_account.models import InstitutionAccountModel
+        from api.categories.models import CategoriesModel
+        from api.transaction.models import TransactionModel
+
+        user = User(
+            email='other@example.com', username='otheruser',
+            password=generate_password_hash('otherpassword', method='scrypt'), first_name='Other', last_name='User'
+        )
+        user.save()
+        institution = InstitutionModel(user_id=user.id, name='Other Bank', location='Elsewhere', description='')
+        institution.save()
+        account = InstitutionAccountModel(
+            institution_id=institution.id, user_id=user.id, name='Other Checking', number='9',
+            status='active', balance=100, starting_balance=100, account_type='checking', account_class='asset'
+        )
+        account.save()
+        category = CategoriesModel(user.id, test_categories_group.id, test_categories_type.id, 'Other Groceries')
+        category.save()
+        transaction = TransactionModel(
+            user_id=user.id, categories_id=category.id, account_id=account.id, amount=-5.0,
+            transaction_type='Withdrawal', external_id='OTHER-1', external_date=datetime(2024, 5, 1)
+        )
+        transaction.save()
+        return user, account, category, transaction
+
+    def test_batch_requires_a_session(self, client, other_user):
+        from api.transaction.models import TransactionModel
+
+        assert client.post('/api/transaction/batch', json={'transactions': []}).status_code == 401
+        assert client.patch('/api/transaction/batch', json={'filter': {'amount_max': '0'}, 'changes': {'notes': 'x'}}).status_code == 401
+        assert client.delete('/api/transaction/batch', json={'filter': {'amount_max': '0'}}).status_code == 401
+        assert TransactionModel.query.count() == 1
+
+    def test_batch_stays_within_the_session_user(self, authenticated_client, session, test_user, test_category, test_account, test_transaction, other_user):
+        from api.transaction.models import TransactionModel
+        user, account, category, transaction = other_user
+
+        # Another user's accounts and categories are as good as missing
+        response = authenticated_client.post('/api/transaction/batch', json={'transactions': [
+            self._new(test_user, test_category, test_account, 'MINE-1', account_id=account.id),
+            self._new(test_user, test_category, test_account, 'MINE-2', categories_id=category.id),
+        ]})
+        assert json.loads(response.data)['errors'] == [
+            {'index': 1, 'message': 'Invalid categories_id'}, {'index': 0, 'message': 'Invalid account_id'}
+        ]
+        response = authenticated_client.patch('/api/transaction/batch', json={
+            'ids': [test_transaction.id], 'changes': {'account_id': account.id}
+        })
+        assert response.status_code == 400
+
+        # A user_id in the body does not pick the owner
+        response = authenticated_client.post('/api/transaction/batch', json={'transactions': [
+            self._new(test_user, test_category, test_account, 'MINE-3', user_id=user.id)
+        ]})
+        assert response.status_code == 201
+        assert session.get(TransactionModel, json.loads(response.data)['ids'][0]).user_id == test_user.id
+
+        # Other users' transactions cannot be targeted by id or by filter
+        response = authenticated_client.delete('/api/transaction/batch', json={'ids': [transaction.id]})
+        assert response.status_code == 404
+        response = authenticated_client.delete('/api/transaction/batch', json={'filter': {'amount_max': '0', 'user_id': user.id}})
+        assert json.loads(response.data)['deleted'] == 1
+        session.expire_all()
+        assert sorted(t.external_id for t in TransactionModel.query.all()) == ['OTHER-1', 'TEST-001']
+
+
+class TestTransactionBalances:
+    """Test that account balances follow every transaction write"""
+
+    @pytest.fixture
+    def accounts(self, authenticated_client, session, test_user, test_institution, test_account, test_transaction):
+        from api.institution_account.models import InstitutionAccountModel
+
+        savings = InstitutionAccountModel(
+            institution_id=test_institution.id, user_id=test_user.id, name='Test Savings', number='2',
+            status='active', balance=0, starting_balance=100.0, account_type='savings', account_class='asset'
+        )
+        savings.save()
+        # Start from balances that match the transactions
+        authenticated_client.post('/api/institution/account/update_balance')
+        return test_account.id, savings.id
+
+    def _balances(self, session, *ids):
+        from api.institution_account.models import InstitutionAccountModel
+        session.expire_all()
+        return [session.get(InstitutionAccountModel, id).balance for id in ids]
+
+    def _assert_consistent(self, app):
+        from api.institution_account.balances import verify_balances
+        with app.app_context():
+            assert verify_balances() == []
+
+    def test_single_writes(self, app, authenticated_client, session, accounts, test_user, test_category, test_transaction):
+        checking, savings = accounts
+        assert self._balances(session, checking, savings) == [550.0, 100.0]
+
+        authenticated_client.post('/api/transaction', json={
+            'user_id': test_user.id, 'categories_id': test_category.id, 'account_id': savings,
+            'amount': -30.0, 'transaction_type': 'Withdrawal', 'external_id': 'BAL-1'
+        })
+        assert self._balances(session, checking, savings) == [550.0, 70.0]
+
+        # Changing the amount nets out the old one
+        authenticated_client.put(f'/api/transaction/{test_transaction.id}', json={'amount': 20.0})
+        assert self._balances(session, checking, savings) == [520.0, 70.0]
+
+        # Moving to another account takes the amount along
+        authenticated_client.put(f'/api/transaction/{test_transaction.id}', json={'account_id': savings, 'amount': 25.0})
+        assert self._balances(session, checking, savings) == [500.0, 95.0]
+
+        authenticated_client.delete(f'/api/transaction/{test_transaction.id}')
+        assert self._balances(session, checking, savings) == [500.0, 70.0]
+        self._assert_consistent(app)
+
+    def test_import_and_batch_writes(self, app, authenticated_client, session, accounts, test_user, test_category, test_account):
+        checking, savings = accounts
+
+        csv_content = f"""Date,Merchant,Category,Account,Amount
+08/01/2024,Bakery,{test_category.name},{test_account.name},-$3.00
+08/02/2024,Bakery,{test_category.name},{test_account.name},-$4.00"""
+        for _ in range(2):
+            # The second import only finds duplicates and must not move the balance again
+            authenticated_client.post(
+                '/api/transaction/csv_import',
+                data={'file': (BytesIO(csv_content.encode('utf-8')), 'balance.csv')},
+                content_type='multipart/form-data'
+            )
+            assert self._balances(session, checking, savings) == [543.0, 100.0]
+
+        ids = json.loads(authenticated_client.post('/api/transaction/batch', json={'transactions': [
+            {'user_id': test_user.id, 'categories_id': test_category.id, 'account_id': savings,
+             'amount': -10.0, 'transaction_type': 'Withdrawal', 'external_id': f'BAL-{i}'}
+            for i in range(3)
+        ]}).data)['ids']
+        assert self._balances(session, checking, savings) == [543.0, 70.0]
+
+        authenticated_client.patch('/api/transaction/batch', json={'ids': ids[:2], 'changes': {'account_id': checking, 'amount': -1.0}})
+        assert self._balances(session, checking, savings) == [541.0, 90.0]
+
+        authenticated_client.patch('/api/transaction/batch', json={'ids': ids, 'changes': {'notes': 'no balance change'}})
+        assert self._balances(session, checking, savings) == [541.0, 90.0]
+
+        authenticated_client.delete('/api/transaction/batch', json={'filter': {'account_id': checking, 'amount_max': -1}})
+        assert self._balances(session, checking, savings) == [550.0, 90.0]
+        self._assert_consistent(app)
+
+    def test_verify_balances_command(self, runner, session, accounts):
+        from api.institution_account.models import InstitutionAccountModel
+        checking, _ = accounts
+
+        result = runner.invoke(args=['verify-balances'])
+        assert result.exit_code == 0
+
+        account = session.get(InstitutionAccountModel, checking)
+        account.balance = 1.0
+        account.save()
+        result = runner.invoke(args=['verify-balances'])
+        assert result.exit_code == 1
+        assert 'expected 550.0' in result.output
+
+        result = runner.invoke(args=['verify-balances', '--fix'])
+        assert 'Fixed 1 account balances' in result.output
+        assert self._balances(session, checking) == [550.0]
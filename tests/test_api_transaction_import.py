@@ -0,0 +1,393 @@
+"""Tests for the streaming, background and dry-run transaction CSV import"""
+import json
+import pytest
+from io import BytesIO
+from datetime import datetime
+
+
+class TestTransactionCSVStreamingImport:
+    """Test CSV import using the Date,Merchant,Category,Account,... layout"""
+
+    def test_csv_import_streams_without_saving(self, authenticated_client, test_category, monkeypatch):
+        """Test that the upload is parsed from the request stream, not spooled to UPLOAD_FOLDER"""
+        from werkzeug.datastructures import FileStorage
+
+        def fail_save(*args, **kwargs):
+            raise AssertionError('upload should not be written to disk')
+
+        monkeypatch.setattr(FileStorage, 'save', fail_save)
+
+        csv_content = f"""Date,Merchant,Category,Account,Original Statement,Notes,Amount,Tags
+01/15/2024,Walmart,{test_category.name},Stream Checking,WMT SUPERCENTER,,-$125.50,groceries
+01/16/2024,Target,{test_category.name},Stream Checking,TARGET,,-$20.00,"""
+
+        response = authenticated_client.post(
+            '/api/transaction/csv_import',
+            data={'file': (BytesIO(csv_content.encode('utf-8')), 'stream.csv')},
+            content_type='multipart/form-data'
+        )
+
+        assert response.status_code == 201
+        data = json.loads(response.data)
+        assert data['transactions_created'] == 2
+        assert data['errors'] == 0
+
+    def test_csv_import_flushes_in_chunks(self, app, authenticated_client, test_category, monkeypatch):
+        """Test that rows are written in chunks and in-file duplicates are skipped"""
+        monkeypatch.setitem(app.config, 'IMPORT_CHUNK_SIZE', 2)
+
+        rows = '\n'.join(
+            f"01/{day:02d}/2024,Store {day},{test_category.name},Chunk Checking,,,-$1{day}.00,"
+            for day in range(1, 6)
+        )
+        duplicate = f"01/01/2024,Store 1,{test_category.name},Chunk Checking,,,-$11.00,"
+        csv_content = f"Date,Merchant,Category,Account,Original Statement,Notes,Amount,Tags\n{rows}\n{duplicate}"
+
+        response = authenticated_client.post(
+            '/api/transaction/csv_import',
+            data={'file': (BytesIO(csv_content.encode('utf-8')), 'chunks.csv')},
+            content_type='multipart/form-data'
+        )
+
+        assert response.status_code == 201
+        data = json.loads(response.data)
+        assert data['transactions_created'] == 5
+        assert data['transactions_skipped'] == 1
+
+    def test_csv_import_preloads_lookups(self, authenticated_client, record_statements, test_category, test_account):
+        """Test that categories, accounts and institutions are looked up once per import, not per row"""
+        rows = '\n'.join(
+            f"02/{day:02d}/2024,Shop {day},{test_category.name},{test_account.name if day % 2 else 'Lookup Savings'},,,-$2{day}.00,"
+            for day in range(1, 11)
+        )
+        csv_content = f"Date,Merchant,Category,Account,Original Statement,Notes,Amount,Tags\n{rows}"
+
+        with record_statements() as statements:
+            response = authenticated_client.post(
+                '/api/transaction/csv_import',
+                data={'file': (BytesIO(csv_content.encode('utf-8')), 'lookups.csv')},
+                content_type='multipart/form-data'
+            )
+
+        assert response.status_code == 201
+        assert json.loads(response.data)['transactions_created'] == 10
+
+        selects = [s for s in statements if s.lstrip().upper().startswith('SELECT')]
+        assert len([s for s in selects if 'FROM categories' in s]) == 1
+        assert len([s for s in selects if 'FROM account' in s]) == 1
+        assert len([s for s in selects if 'FROM institution' in s]) == 1
+
+    def test_csv_reimport_skips_existing_rows(self, authenticated_client, test_category):
+        """Test that re-importing a file skips every row already stored"""
+        csv_content = f"""Date,Merchant,Category,Account,Original Statement,Notes,Amount,Tags
+03/01/2024,Cafe,{test_category.name},Dedup Checking,,,-$4.50,
+03/02/2024,Cafe,{test_category.name},Dedup Checking,,,-$5.50,"""
+
+        def upload():
+            return authenticated_client.post(
+                '/api/transaction/csv_import',
+                data={'file': (BytesIO(csv_content.encode('utf-8')), 'dedup.csv')},
+                content_type='multipart/form-data'
+            )
+
+        first = json.loads(upload().data)
+        assert first['transactions_created'] == 2
+
+        response = upload()
+        assert response.status_code == 200
+        second = json.loads(response.data)
+        assert second['transactions_created'] == 0
+        assert second['transactions_skipped'] == 2
+
+    def test_create_transaction_duplicate_external_id(self, client, test_transaction):
+        """Test that the (user_id, external_id) unique index rejects duplicates"""
+        response = client.post('/api/transaction', json={
+            'user_id': test_transaction.user_id,
+            'categories_id': test_transaction.categories_id,
+            'account_id': test_transaction.account_id,
+            'amount': 10.00,
+            'transaction_type': 'Withdrawal',
+            'external_id': test_transaction.external_id
+        })
+
+        assert response.status_code == 409
+
+    @pytest.mark.parametrize('use_copy', [True, False])
+    def test_csv_import_copy_and_insert_paths_match(self, app, authenticated_client, test_category, monkeypatch, use_copy):
+        """Test that the COPY fast path and the INSERT fallback store the same values"""
+        from api.transaction.models import TransactionModel
+
+        monkeypatch.setitem(app.config, 'IMPORT_USE_COPY', use_copy)
+        csv_content = (
+            'Date,Merchant,Category,Account,Original Statement,Notes,Amount,Tags\n'
+            f'06/01/2024,"Joe\'s, Diner",{test_category.name},Copy Checking,"SAYS ""HI""",,-$9.99,food\n'
+            f'06/02/2024,Backslash,{test_category.name},Copy Checking,,\\N,-$1.00,'
+        )
+
+        response = authenticated_client.post(
+            '/api/transaction/csv_import',
+            data={'file': (BytesIO(csv_content.encode('utf-8')), 'copy.csv')},
+            content_type='multipart/form-data'
+        )
+
+        assert json.loads(response.data)['transactions_created'] == 2
+        transaction = TransactionModel.query.filter_by(merchant="Joe's, Diner").first()
+        assert transaction.original_statement == 'SAYS "HI"'
+        assert transaction.notes == ''
+        assert transaction.description is None
+        assert transaction.amount == -9.99
+        assert transaction.external_date == datetime(2024, 6, 1)
+        assert transaction.created_at is not None
+        # A literal \N is text, not NULL
+        assert TransactionModel.query.filter_by(merchant='Backslash').first().notes == '\\N'
+
+class TestTransactionCSVImportJobs:
+    """Test background CSV import jobs"""
+
+    def test_async_import_reports_progress(self, app, authenticated_client, test_category, tmp_path, monkeypatch):
+        """Test that ?async=1 queues a job whose progress can be polled until it completes"""
+        import time
+
+        monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(tmp_path))
+        csv_content = f"""Date,Merchant,Category,Account,Original Statement,Notes,Amount,Tags
+04/01/2024,Bakery,{test_category.name},Job Checking,,,-$6.00,
+04/02/2024,Bakery,{test_category.name},Job Checking,,,-$7.00,"""
+
+        response = authenticated_client.post(
+            '/api/transaction/csv_import?async=1',
+            data={'file': (BytesIO(csv_content.encode('utf-8')), 'job.csv')},
+            content_type='multipart/form-data'
+        )
+
+        assert response.status_code == 202
+        job_id = json.loads(response.data)['job_id']
+
+        job = None
+        for _ in range(100):
+            job = json.loads(authenticated_client.get(f'/api/transaction/csv_import/{job_id}').data)['job']
+            if job['status'] in ('completed', 'failed'):
+                break
+            time.sleep(0.1)
+
+        assert job['status'] == 'completed'
+        assert job['rows_parsed'] == 2
+        assert job['rows_created'] == 2
+        assert job['result']['transactions_created'] == 2
+        assert list(tmp_path.iterdir()) == []
+
+    def test_parallel_import_keeps_row_numbers(self, app, authenticated_client, test_category, tmp_path, monkeypatch):
+        """Test that byte-range parsing in worker processes reports the same row numbers as a sequential import"""
+        import time
+        from api.transaction.models import TransactionModel
+
+        monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(tmp_path))
+        monkeypatch.setitem(app.config, 'IMPORT_PARALLEL_WORKERS', 2)
+        monkeypatch.setitem(app.config, 'IMPORT_PARALLEL_MIN_BYTES', 0)
+        monkeypatch.setitem(app.config, 'IMPORT_PARALLEL_CHUNK_BYTES', 64)
+
+        csv_content = f"""Date,Merchant,Category,Account,Original Statement,Notes,Amount,Tags
+05/01/2024,Deli,{test_category.name},Parallel Checking,"DELI
+LINE TWO",,-$1.00,
+05/02/2024,Deli,{test_category.name},Parallel Checking,,,-$2.00,
+05/03/2024,Deli,{test_category.name},Parallel Checking,,,-$3.00,
+bad,Deli,{test_category.name},Parallel Checking,,,-$4.00,
+05/05/2024,Deli,{test_category.name},Parallel Checking,,,-$5.00,
+05/06/2024,Deli,{test_category.name},Parallel Checking,,,oops,"""
+
+        response = authenticated_client.post(
+            '/api/transaction/csv_import?async=1',
+            data={'file': (BytesIO(csv_content.encode('utf-8')), 'parallel.csv')},
+            content_type='multipart/form-data'
+        )
+        job_id = json.loads(response.data)['job_id']
+
+        job = None
+        for _ in range(300):
+            job = json.loads(authenticated_client.get(f'/api/transaction/csv_import/{job_id}').data)['job']
+            if job['status'] in ('completed', 'failed'):
+                break
+            time.sleep(0.1)
+
+        assert job['status'] == 'completed', job['error']
+        assert job['rows_parsed'] == 6
+        assert job['rows_created'] == 4
+        assert job['result']['error_details'] == [
+            "Row 5: Unable to parse date: bad",
+            "Row 7: Invalid amount 'oops'"
+        ]
+        statement = TransactionModel.query.filter_by(amount=-1.00).first().original_statement
+        assert statement == 'DELI\nLINE TWO'
+
+    def test_recover_import_jobs_after_restart(self, app, runner, session, test_user, test_category, tmp_path, monkeypatch):
+        """Test that recover-import-jobs resubmits queued jobs, fails abandoned ones and removes orphaned spool files"""
+        import os
+        import time
+        from datetime import timedelta
+        from api.base.models import database_now
+        from api.import_job.models import ImportJobModel
+        from api.transaction.importer import recover_import_jobs
+
+        monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(tmp_path))
+
+        def spool(name, content='', age=0):
+            path = tmp_path / f'import-{name}.csv'
+            path.write_text(content)
+            if age:
+                os.utime(path, (time.time() - age, time.time() - age))
+            return str(path)
+
+        def job(name, status, file_path, idle=None):
+            row = ImportJobModel(user_id=test_user.id, kind='transactions', filename=f'{name}.csv', file_path=file_path, total_bytes=0)
+            row.save()
+            values = {'status': status}
+            if idle:
+                values['updated_at'] = database_now() - timedelta(seconds=idle)
+            ImportJobModel.query.filter_by(id=row.id).update(values)
+            session.commit()
+            return row.id
+
+        queued = job('queued', 'queued', spool('queued', f"""Date,Merchant,Category,Account,Original Statement,Notes,Amount,Tags
+06/01/2024,Cafe,{test_category.name},Recovered Checking,,,-$3.00,"""))
+        lost = job('lost', 'queued', str(tmp_path / 'import-lost.csv'))
+        abandoned = job('abandoned', 'running', spool('abandoned', age=3600), idle=3600)
+        busy = job('busy', 'running', spool('busy', age=3600))
+        spool('orphan', age=3600)
+        spool('uploading')
+
+        result = runner.invoke(args=['recover-import-jobs'])
+        assert 'Resubmitted 1 queued import jobs, failed 2 interrupted ones and removed 1 orphaned uploads' in result.output
+
+        status = None
+        for _ in range(100):
+            session.expire_all()
+            status = session.get(ImportJobModel, queued).status
+            if status in ('completed', 'failed'):
+                break
+            time.sleep(0.1)
+        assert status == 'completed'
+        assert session.get(ImportJobModel, queued).rows_created == 1
+        assert session.get(ImportJobModel, lost).status == 'failed'
+        assert 'Interrupted' in session.get(ImportJobModel, abandoned).error
+        assert session.get(ImportJobModel, busy).status == 'running'
+        assert sorted(path.name for path in tmp_path.iterdir()) == ['import-busy.csv', 'import-uploading.csv']
+
+        # A job already claimed by a worker is not run twice
+        assert recover_import_jobs(app)['resubmitted'] == 0
+
+    def test_import_job_not_found(self, authenticated_client):
+        """Test polling an unknown job"""
+        response = authenticated_client.get('/api/transaction/csv_import/does-not-exist')
+        assert response.status_code == 404
+
+class TestTransactionCSVDateDetection:
+    """Test per-file date format detection during CSV import"""
+
+    def import_csv(self, client, csv_content):
+        return client.post(
+            '/api/transaction/csv_import',
+            data={'file': (BytesIO(csv_content.encode('utf-8')), 'dates.csv')},
+            content_type='multipart/form-data'
+        )
+
+    def test_detects_day_first_layout(self, authenticated_client, test_category):
+        """Test that a DD/MM/YYYY file is detected from its first rows and parsed consistently"""
+        from api.transaction.models import TransactionModel
+
+        csv_content = f"""Date,Merchant,Category,Account,Amount
+25/12/2023,Gift Shop,{test_category.name},Dates Checking,-$30.00
+03/01/2024,Grocer,{test_category.name},Dates Checking,-$12.00"""
+
+        response = self.import_csv(authenticated_client, csv_content)
+        assert response.status_code == 201
+
+        dates = sorted(t.external_date for t in TransactionModel.query.all())
+        assert dates == [datetime(2023, 12, 25), datetime(2024, 1, 3)]
+
+    def test_falls_back_on_mismatched_rows(self, authenticated_client, test_category):
+        """Test that rows not matching the detected layout still parse, and bad dates are reported"""
+        csv_content = f"""Date,Merchant,Category,Account,Amount
+2024-02-01,Cinema,{test_category.name},Dates Checking,-$15.00
+02/02/2024,Cinema,{test_category.name},Dates Checking,-$16.00
+not-a-date,Cinema,{test_category.name},Dates Checking,-$17.00"""
+
+        response = self.import_csv(authenticated_client, csv_content)
+        data = json.loads(response.data)
+
+        assert data['transactions_created'] == 2
+        assert data['errors'] == 1
+        assert data['error_summary'] == {'date_parse_error': 1}
+
+class TestTransactionCSVDryRun:
+    """Test ?dry_run=1 validation mode for CSV import"""
+
+    def test_dry_run_reports_without_writing(self, authenticated_client, test_category, test_account):
+        """Test that a dry run counts creates, duplicates and unknown categories but writes nothing"""
+        from api.transaction.models import TransactionModel
+        from api.institution_account.models import InstitutionAccountModel
+
+        csv_content = f"""Date,Merchant,Category,Account,Amount
+07/01/2024,Florist,{test_category.name},{test_account.name},-$40.00
+07/02/2024,Florist,{test_category.name},Dry Run Savings,-$41.00
+07/03/2024,Florist,Unknown Category,Dry Run Savings,-$42.00"""
+
+        # Store the first row so the dry run sees it as a duplicate
+        TransactionModel(
+            user_id=test_account.user_id,
+            categories_id=test_category.id,
+            account_id=test_account.id,
+            amount=-40.00,
+            transaction_type='Withdrawal',
+            external_id='07-01-2024-Florist--$40.00',
+            external_date=datetime(2024, 7, 1)
+        ).save()
+        accounts_before = InstitutionAccountModel.query.count()
+        transactions_before = TransactionModel.query.count()
+
+        response = authenticated_client.post(
+            '/api/transaction/csv_import?dry_run=1',
+            data={'file': (BytesIO(csv_content.encode('utf-8')), 'dry.csv')},
+            content_type='multipart/form-data'
+        )
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['dry_run'] is True
+        assert data['transactions_created'] == 1
+        assert data['transactions_skipped'] == 1
+        assert data['error_summary'] == {'category_not_found': 1}
+        assert TransactionModel.query.count() == transactions_before
+        assert InstitutionAccountModel.query.count() == accounts_before
+
+class TestTransactionCSVImportTimings:
+    """Test the per-stage timings block and per-chunk log lines"""
+
+    def test_import_reports_stage_timings(self, app, authenticated_client, test_category, caplog, monkeypatch):
+        """Test that the response includes per-stage timings and one log line per chunk"""
+        import logging
+        monkeypatch.setitem(app.config, 'IMPORT_CHUNK_SIZE', 2)
+
+        rows = '\n'.join(
+            f"02/{day:02d}/2024,Store {day},{test_category.name},Timed Checking,,,-$1{day}.00,"
+            for day in range(1, 6)
+        )
+        csv_content = f"Date,Merchant,Category,Account,Original Statement,Notes,Amount,Tags\n{rows}"
+
+        with caplog.at_level(logging.INFO, logger='api.transaction.importer'):
+            response = authenticated_client.post(
+                '/api/transaction/csv_import',
+                data={'file': (BytesIO(csv_content.encode('utf-8')), 'timed.csv')},
+                content_type='multipart/form-data'
+            )
+
+        assert response.status_code == 201
+        timings = json.loads(response.data)['timings']
+        assert set(timings['stages']) >= {'read', 'parse', 'dedup', 'lookup', 'insert', 'commit'}
+        assert timings['stages']['read']['rows'] == 5
+        assert timings['stages']['parse']['rows'] == 5
+        assert timings['stages']['insert']['rows'] == 5
+        assert timings['total_seconds'] >= 0
+
+        chunks = [json.loads(record.getMessage().split(' ', 1)[1])
+                  for record in caplog.records if record.getMessage().startswith('import_chunk ')]
+        assert [chunk['rows'] for chunk in chunks] == [2, 2, 1]
+        assert sum(chunk['created'] for chunk in chunks) == 5
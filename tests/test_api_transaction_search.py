@@ -0,0 +1,99 @@
+"""Tests for transaction full-text search"""
+import json
+import pytest
+from io import BytesIO
+from datetime import datetime
+
+
+class TestTransactionSearch:
+    """Test GET /api/transaction/search"""
+
+    @pytest.fixture
+    def search_transactions(self, session, test_user, test_account, test_category):
+        from api.transaction.models import TransactionModel
+        rows = [
+            ('Coffee Corner', 'POS COFFEE CORNER #12', None),
+            ('Corner Hardware', 'CORNER HARDWARE', 'coffee maker'),
+            ('Grocery Outlet', 'GROCERY OUTLET 554', 'weekly shop'),
+            ('Coffee Coffee', 'COFFEE COFFEE', 'coffee beans'),
+        ]
+        for i, (merchant, statement, notes) in enumerate(rows):
+            TransactionModel(
+                user_id=test_user.id, categories_id=test_category.id, account_id=test_account.id,
+                amount=-5.0 - i, transaction_type='Withdrawal', external_id=f'SEARCH-{i}',
+                external_date=datetime(2024, 7, 1 + i), merchant=merchant,
+                original_statement=statement, notes=notes
+            ).save()
+
+    def search(self, client, **params):
+        response = client.get('/api/transaction/search', query_string=params)
+        assert response.status_code == 200
+        return json.loads(response.data)
+
+    def test_ranked_prefix_search(self, authenticated_client, search_transactions):
+        data = self.search(authenticated_client, q='coff')
+        merchants = [t['merchant'] for t in data['transactions']]
+        assert sorted(merchants) == ['Coffee Coffee', 'Coffee Corner', 'Corner Hardware']
+        # The row mentioning coffee most often ranks first
+        assert merchants[0] == 'Coffee Coffee'
+        ranks = [t['rank'] for t in data['transactions']]
+        assert ranks == sorted(ranks, reverse=True)
+        assert data['pagination']['has_more'] is False
+
+        # Every word must match
+        data = self.search(authenticated_client, q='corner coffee')
+        assert sorted(t['merchant'] for t in data['transactions']) == ['Coffee Corner', 'Corner Hardware']
+
+    def test_cursor_pagination(self, authenticated_client, search_transactions):
+        expected = [t['id'] for t in self.search(authenticated_client, q='coffee')['transactions']]
+        seen = []
+        cursor = ''
+        while True:
+            data = self.search(authenticated_client, q='coffee', per_page=1, cursor=cursor)
+            seen.extend(t['id'] for t in data['transactions'])
+            cursor = data['pagination']['next_cursor']
+            if cursor is None:
+                break
+        assert seen == expected
+
+        response = authenticated_client.get(f'/api/transaction/search?q=corner&cursor={cursor or "bogus"}')
+        assert response.status_code == 400
+
+    def test_index_follows_writes(self, authenticated_client, search_transactions):
+        [grocery] = self.search(authenticated_client, q='grocery')['transactions']
+        authenticated_client.put(f'/api/transaction/{grocery["id"]}', json={'notes': 'espresso'})
+        assert [t['id'] for t in self.search(authenticated_client, q='espresso')['transactions']] == [grocery['id']]
+        assert self.search(authenticated_client, q='weekly')['transactions'] == []
+
+        authenticated_client.delete(f'/api/transaction/{grocery["id"]}')
+        assert self.search(authenticated_client, q='grocery')['transactions'] == []
+
+    def test_index_is_keyed_on_id(self, authenticated_client, session, search_transactions):
+        """Test that search hits survive rowid renumbering (as VACUUM may do) and ids are not search terms"""
+        from sqlalchemy import text
+
+        [grocery] = self.search(authenticated_client, q='grocery')['transactions']
+        if session.get_bind().dialect.name == 'sqlite':
+            session.execute(text('UPDATE "transaction" SET rowid = rowid + 1000'))
+            session.commit()
+            assert [t['id'] for t in self.search(authenticated_client, q='grocery')['transactions']] == [grocery['id']]
+
+        assert self.search(authenticated_client, q=grocery['id'].split('-')[0])['transactions'] == []
+
+    def test_imported_rows_are_searchable(self, authenticated_client, test_category, test_account):
+        csv_content = (
+            "Date,Merchant,Category,Account,Original Statement,Amount\n"
+            f"09/01/2024,Deli,{test_category.name},{test_account.name},PASTRAMI PALACE,-$9.00\n"
+            f"09/02/2024,Bakery,{test_category.name},{test_account.name},SOURDOUGH SHOP,-$4.00"
+        )
+        authenticated_client.post(
+            '/api/transaction/csv_import',
+            data={'file': (BytesIO(csv_content.encode('utf-8')), 'search.csv')},
+            content_type='multipart/form-data'
+        )
+        data = self.search(authenticated_client, q='pastrami')
+        assert [t['merchant'] for t in data['transactions']] == ['Deli']
+
+    def test_requires_query(self, authenticated_client):
+        assert authenticated_client.get('/api/transaction/search').status_code == 400
+        assert authenticated_client.get('/api/transaction/search?q=%26%7C!').status_code == 400